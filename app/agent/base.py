@@ -150,7 +150,7 @@ class BaseAgent(BaseModel, ABC):
                 self.current_step = 0
                 self.state = AgentState.IDLE
                 results.append(f"Terminated: Reached max steps ({self.max_steps})")
-        await SANDBOX_CLIENT.cleanup()
+        await SANDBOX_CLIENT.finish_run()
         return "\n".join(results) if results else "No steps executed"
 
     @abstractmethod
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Optional
 from pydantic import Field, model_validator
 
 from app.agent.toolcall import ToolCallAgent
+from app.llm import MULTIMODAL_MODELS
 from app.logger import logger
 from app.prompt.browser import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import Message, ToolChoice
@@ -30,12 +31,20 @@ class BrowserContextHelper:
         if not browser_tool or not hasattr(browser_tool, "get_current_state"):
             logger.warning("BrowserUseTool not found or doesn't have get_current_state")
             return None
+        # Screenshots cost latency and tokens; skip them for text-only models
+        llm = getattr(self.agent, "llm", None)
+        supports_images = llm is not None and llm.model in MULTIMODAL_MODELS
         try:
-            result = await browser_tool.get_current_state()
+            if isinstance(browser_tool, BrowserUseTool):
+                result = await browser_tool.get_current_state(
+                    include_screenshot=supports_images
+                )
+            else:
+                result = await browser_tool.get_current_state()
             if result.error:
                 logger.debug(f"Browser state error: {result.error}")
                 return None
-            if hasattr(result, "base64_image") and result.base64_image:
+            if supports_images and getattr(result, "base64_image", None):
                 self._current_base64_image = result.base64_image
             else:
                 self._current_base64_image = None
@@ -49,12 +58,17 @@ class BrowserContextHelper:
         browser_state = await self.get_browser_state()
         url_info, tabs_info, content_above_info, content_below_info = "", "", "", ""
         results_info = ""  # Or get from agent if needed elsewhere
+        elements_info = ""
 
         if browser_state and not browser_state.get("error"):
             url_info = f"\n   URL: {browser_state.get('url', 'N/A')}\n   Title: {browser_state.get('title', 'N/A')}"
             tabs = browser_state.get("tabs", [])
             if tabs:
                 tabs_info = f"\n   {len(tabs)} tab(s) available"
+            # The full list after navigation, otherwise only what changed
+            elements = browser_state.get("interactive_elements")
+            if elements:
+                elements_info = f"\n{elements}"
             pixels_above = browser_state.get("pixels_above", 0)
             pixels_below = browser_state.get("pixels_below", 0)
             if pixels_above > 0:
@@ -69,10 +83,17 @@ class BrowserContextHelper:
                 )
                 self.agent.memory.add_message(image_message)
                 self._current_base64_image = None  # Consume the image after adding
+            elif browser_state.get("screenshot_unchanged"):
+                self.agent.memory.add_message(
+                    Message.user_message(
+                        "Browser screenshot unchanged since the previous step."
+                    )
+                )
 
         return NEXT_STEP_PROMPT.format(
             url_placeholder=url_info,
             tabs_placeholder=tabs_info,
+            elements_placeholder=elements_info,
             content_above_placeholder=content_above_info,
             content_below_placeholder=content_below_info,
             results_placeholder=results_info,
@@ -9,7 +9,9 @@ from app.logger import logger
 from app.prompt.manus import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.tool import Terminate, ToolCollection
 from app.tool.ask_human import AskHuman
+from app.tool.browser_pool import get_browser_pool
 from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.code_search import CodeSearch
 from app.tool.mcp import MCPClients, MCPClientTool
 from app.tool.python_execute import PythonExecute
 from app.tool.str_replace_editor import StrReplaceEditor
@@ -36,6 +38,7 @@ class Manus(ToolCallAgent):
             PythonExecute(),
             BrowserUseTool(),
             StrReplaceEditor(),
+            CodeSearch(),
             AskHuman(),
             Terminate(),
         )
@@ -60,13 +63,33 @@ class Manus(ToolCallAgent):
     async def create(cls, **kwargs) -> "Manus":
         """Factory method to create and properly initialize a Manus instance."""
         instance = cls(**kwargs)
+        settings = config.browser_config
+        if (
+            settings
+            and settings.pool_prewarm
+            and any(
+                isinstance(tool, BrowserUseTool)
+                for tool in instance.available_tools.tools
+            )
+        ):
+            # Launch the browser while the agent starts thinking
+            get_browser_pool().prewarm()
         await instance.initialize_mcp_servers()
         instance._initialized = True
         return instance
 
     async def initialize_mcp_servers(self) -> None:
         """Initialize connections to configured MCP servers."""
+        # Tools shared from another agent (e.g. a planning flow's executor)
+        # already carry a connection to their server
+        shared_servers = {
+            tool.server_id
+            for tool in self.available_tools.tools
+            if isinstance(tool, MCPClientTool)
+        }
         for server_id, server_config in config.mcp_config.servers.items():
+            if server_id in shared_servers:
+                continue
             try:
                 if server_config.type == "sse":
                     if server_config.url:
@@ -1,7 +1,8 @@
 import asyncio
 import json
 import uuid
-from typing import Any, Callable, Dict, List, Optional, Union
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from pydantic import Field
 
@@ -11,6 +12,11 @@ from app.logger import logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.utils.json_scan import (
+    iter_fenced_blocks,
+    iter_json_objects,
+    loads_lenient,
+)
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
@@ -138,35 +144,55 @@ class ToolCallAgent(ReActAgent):
             return False
 
     def _parse_fallback_tool_call(self, content: str) -> Optional[ToolCall]:
-        """Attempt to parse a tool call embedded in text content."""
-        decoder = json.JSONDecoder()
-        for idx, char in enumerate(content):
-            if char != "{":
-                continue
-            try:
-                obj, _ = decoder.raw_decode(content[idx:])
-            except json.JSONDecodeError:
-                continue
-            if not isinstance(obj, dict):
+        """Attempt to parse a tool call embedded in text content.
+
+        Fenced code blocks are checked first, then the full content. Each
+        source is scanned for embedded JSON objects, and the first one that
+        resolves to a known tool call wins.
+        """
+        sources = [*iter_fenced_blocks(content), content]
+        for source in sources:
+            # Spans without "name" are skipped before paying for a parse
+            for _, obj in iter_json_objects(source, must_contain="name"):
+                call = self._find_tool_call_payload(obj)
+                if call is None:
+                    continue
+                name, args = call
+                if isinstance(args, str):
+                    parsed_args = loads_lenient(args) if args.strip() else {}
+                    args = parsed_args if parsed_args is not None else {"input": args}
+                if args is None:
+                    args = {}
+                if not isinstance(args, dict):
+                    args = {"input": args}
+                logger.warning(
+                    f"Fallback tool call parsed from content: {name}({args})"
+                )
+                return ToolCall(
+                    id=f"fallback-{uuid.uuid4().hex}",
+                    function={"name": name, "arguments": json.dumps(args)},
+                )
+        return None
+
+    def _find_tool_call_payload(self, obj: Any) -> Optional[Tuple[str, Any]]:
+        """Find the first ``{"name": ..., "arguments": ...}`` for a known tool.
+
+        Walks nested dicts/lists (e.g. ``{"tool_calls": [{"function": {...}}]}``)
+        breadth-first over the already-parsed object, so the work is linear in
+        its size.
+        """
+        queue = deque([obj])
+        while queue:
+            node = queue.popleft()
+            if isinstance(node, list):
+                queue.extend(node)
                 continue
-            name = obj.get("name")
-            args = obj.get("arguments")
-            if not name or name not in self.available_tools.tool_map:
+            if not isinstance(node, dict):
                 continue
-            if isinstance(args, str):
-                try:
-                    args = json.loads(args)
-                except json.JSONDecodeError:
-                    args = {"input": args}
-            if not isinstance(args, dict):
-                args = {"input": args}
-            logger.warning(
-                f"Fallback tool call parsed from content: {name}({args})"
-            )
-            return ToolCall(
-                id=f"fallback-{uuid.uuid4().hex}",
-                function={"name": name, "arguments": json.dumps(args)},
-            )
+            name = node.get("name")
+            if isinstance(name, str) and name in self.available_tools.tool_map:
+                return name, node.get("arguments", node.get("parameters"))
+            queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
         return None
 
     async def act(self) -> str:
@@ -219,6 +245,11 @@ class ToolCallAgent(ReActAgent):
 
             self._emit_event({"type": "tool_start", "tool": name, "args": args})
 
+            # Stream output of tools that produce it incrementally
+            tool = self.available_tools.tool_map[name]
+            if hasattr(tool, "output_callback"):
+                tool.output_callback = self._output_streamer(name)
+
             # Execute the tool
             logger.info(f"🔧 Activating tool: '{name}'...")
             result = await self.available_tools.execute(name=name, tool_input=args)
@@ -231,11 +262,13 @@ class ToolCallAgent(ReActAgent):
                 # Store the base64_image for later use in tool_message
                 self._current_base64_image = result.base64_image
 
-            self._emit_event({
-                "type": "tool_result",
-                "tool": name,
-                "result": self._format_tool_result(result),
-            })
+            self._emit_event(
+                {
+                    "type": "tool_result",
+                    "tool": name,
+                    "result": self._format_tool_result(result),
+                }
+            )
 
             # Format result for display (standard case)
             observation = (
@@ -267,32 +300,30 @@ class ToolCallAgent(ReActAgent):
             logger.info(f"🏁 Special tool '{name}' has completed the task!")
             self.state = AgentState.FINISHED
 
-    def _emit_event(self, event: dict) -> None:
-
+    def _output_streamer(self, name: str) -> Optional[Callable[[str], None]]:
+        """Builds a callback forwarding a tool's output chunks to the event sink."""
         if not self.event_sink:
+            return None
+        return lambda chunk: self._emit_event(
+            {"type": "tool_output", "tool": name, "data": chunk}
+        )
 
+    def _emit_event(self, event: dict) -> None:
+        if not self.event_sink:
             return
 
         try:
-
             self.event_sink(event)
 
         except Exception:
-
             logger.debug("Event sink raised an exception.")
 
-
-
     @staticmethod
-
     def _format_tool_result(result: Any) -> str:
-
         if isinstance(result, str):
-
             return result
 
         if hasattr(result, "output") or hasattr(result, "error"):
-
             output = getattr(result, "output", None)
 
             error = getattr(result, "error", None)
@@ -301,8 +332,6 @@ class ToolCallAgent(ReActAgent):
 
         return str(result)
 
-
-
     @staticmethod
     def _should_finish_execution(**kwargs) -> bool:
         """Determine if tool execution should finish the agent"""
@@ -14,6 +14,7 @@ def get_project_root() -> Path:
 
 PROJECT_ROOT = get_project_root()
 WORKSPACE_ROOT = PROJECT_ROOT / "workspace"
+CACHE_ROOT = PROJECT_ROOT / ".cache"
 
 
 class LLMSettings(BaseModel):
@@ -50,6 +51,39 @@ class SearchSettings(BaseModel):
         default=3,
         description="Maximum number of times to retry all engines when all fail",
     )
+    strategy: str = Field(
+        default="fallback",
+        description="How engines are queried: 'fallback' (one after another), "
+        "'race' (several at once) or 'hedge' (add an engine when one is slow)",
+    )
+    parallel_engines: int = Field(
+        default=2,
+        description="Number of engines queried at once in 'race' mode",
+    )
+    hedge_delay: float = Field(
+        default=2.0,
+        description="Seconds to wait for an engine before starting the next in 'hedge' mode",
+    )
+    merge_results: bool = Field(
+        default=False,
+        description="Merge results of engines answering within merge_window, deduplicated by URL",
+    )
+    merge_window: float = Field(
+        default=1.0,
+        description="Seconds to wait for more engines after the first answer when merging",
+    )
+    cache_ttl: int = Field(
+        default=3600,
+        description="Seconds search results are cached on disk across runs (0 disables)",
+    )
+    breaker_failure_threshold: int = Field(
+        default=3,
+        description="Consecutive failures after which an engine is skipped for a cool-down",
+    )
+    breaker_cooldown: float = Field(
+        default=300.0,
+        description="Seconds a failing engine is skipped; doubles while it keeps failing",
+    )
     lang: str = Field(
         default="en",
         description="Language code for search results (e.g., en, zh, fr)",
@@ -64,6 +98,13 @@ class RunflowSettings(BaseModel):
     use_data_analysis_agent: bool = Field(
         default=False, description="Enable data analysis agent in run flow"
     )
+    plan_cache_enabled: bool = Field(
+        default=False, description="Reuse cached plans for recurring requests"
+    )
+    plan_cache_similarity: float = Field(
+        default=0.85,
+        description="Minimum request similarity (0-1) to reuse a cached plan",
+    )
 
 
 class BrowserSettings(BaseModel):
@@ -89,6 +130,39 @@ class BrowserSettings(BaseModel):
     max_content_length: int = Field(
         2000, description="Maximum length for content retrieval operations"
     )
+    extract_main_content: bool = Field(
+        False,
+        description="Give 'extract_content' only the page's main content instead "
+        "of the whole page converted to markdown",
+    )
+    screenshot_full_page: bool = Field(
+        False, description="Capture the whole page instead of the viewport for state"
+    )
+    screenshot_quality: int = Field(
+        75, description="JPEG quality (1-100) of browser state screenshots"
+    )
+    screenshot_dedup_distance: int = Field(
+        2,
+        description="Skip screenshots within this perceptual hash distance of the "
+        "previous one on the same page state (negative disables)",
+    )
+    pool_max_browsers: int = Field(
+        2, description="Maximum browser processes shared by all agents"
+    )
+    pool_max_contexts_per_browser: int = Field(
+        8, description="Maximum browser contexts hosted by one browser process"
+    )
+    pool_warm_contexts: int = Field(
+        1, description="Browser contexts created ahead of time (0 disables)"
+    )
+    pool_idle_timeout: float = Field(
+        300.0, description="Seconds after which an unused browser process is closed"
+    )
+    pool_prewarm: bool = Field(
+        False,
+        description="Launch the browser when an agent with the browser tool starts, "
+        "before its first browser step",
+    )
 
 
 class SandboxSettings(BaseModel):
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import CACHE_ROOT, config
+from app.logger import logger
+
+
+# Request fragments that vary between runs of the same task shape. They are
+# replaced by placeholders for matching and substituted back when a cached
+# plan is adapted to a new request.
+_SLOT_PATTERN = re.compile(
+    r"(?P<url>https?://\S+)"
+    r"|(?P<quoted>\"[^\"]+\"|'[^']+')"
+    r"|(?P<path>(?:[\w.-]+/)+[\w.-]+)"
+    r"|(?P<number>\b\d+(?:\.\d+)?\b)"  # numbers and dates
+)
+# Positional slot reference in a cached step template
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{slot:(\d+)\}\}")
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_<>]+")
+
+
+class PlanCache:
+    """Local cache of successful plans keyed by normalized request.
+
+    Requests are normalized by lowercasing, collapsing whitespace and
+    replacing variable fragments (URLs, quoted strings, paths, numbers) with
+    placeholders. A lookup first tries the exact hash of the normalized
+    request, then a lexical similarity search over an inverted token index.
+    Steps are cached as templates in which the request's variable fragments
+    are positional placeholders; hits substitute the new request's
+    fragments in a single pass, and are refused when the two requests do
+    not have the same number and kinds of fragments.
+
+    Plans are stored only after they complete without blocked steps, and a
+    cached plan is invalidated as soon as a run that reused it ends with
+    blocked steps.
+
+    Attributes:
+        path: JSON file the cache is persisted to.
+        similarity_threshold: Minimum similarity (0-1) for a non-exact hit.
+        max_entries: Maximum cached plans; least recently used are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        similarity_threshold: float = 0.85,
+        max_entries: int = 200,
+    ):
+        """Initializes the plan cache.
+
+        Args:
+            path: Cache file path. Defaults to `plan_cache.json` in the cache root.
+            similarity_threshold: Minimum similarity for a non-exact match.
+            max_entries: Maximum number of cached plans.
+        """
+        self.path = Path(path) if path else CACHE_ROOT / "plan_cache.json"
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+
+        self._entries: Dict[str, dict] = {}
+        self._index: Dict[str, Set[str]] = {}
+        self._loaded = False
+        self._metrics = Counter()
+
+    @classmethod
+    def from_config(cls) -> Optional["PlanCache"]:
+        """Creates a plan cache from the run flow config, or None if disabled."""
+        settings = config.run_flow_config
+        if not settings or not settings.plan_cache_enabled:
+            return None
+        return cls(similarity_threshold=settings.plan_cache_similarity)
+
+    @staticmethod
+    def normalize(request: str) -> Tuple[str, List[str]]:
+        """Normalizes a request and extracts its variable fragments.
+
+        Args:
+            request: Raw user request.
+
+        Returns:
+            Tuple of (normalized request, extracted slot values in order).
+        """
+        slots = [match.group(0) for match in _SLOT_PATTERN.finditer(request)]
+        normalized = _SLOT_PATTERN.sub(" <slot> ", request).lower()
+        normalized = " ".join(_TOKEN_PATTERN.findall(normalized))
+        return normalized, slots
+
+    @staticmethod
+    def slot_kinds(request: str) -> List[str]:
+        """Kinds (url, quoted, path, number) of a request's variable fragments."""
+        return [match.lastgroup for match in _SLOT_PATTERN.finditer(request)]
+
+    @staticmethod
+    def _templatize(steps: List[str], slots: List[str]) -> List[str]:
+        """Replaces slot values in steps with positional placeholders.
+
+        All values are matched in one pass, longest first, and only as whole
+        tokens, so a value never matches inside another value or number.
+        """
+        positions: Dict[str, int] = {}
+        for position, value in enumerate(slots):
+            positions.setdefault(value, position)
+        if not positions:
+            return list(steps)
+
+        alternatives = "|".join(
+            re.escape(value) for value in sorted(positions, key=len, reverse=True)
+        )
+        pattern = re.compile(rf"(?<![\w.])(?:{alternatives})(?![\w]|\.\w)")
+        return [
+            pattern.sub(lambda m: f"{{{{slot:{positions[m.group(0)]}}}}}", step)
+            for step in steps
+        ]
+
+    @staticmethod
+    def _hash(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _tokens(normalized: str) -> Set[str]:
+        words = normalized.split()
+        return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+    def lookup(self, request: str) -> Optional[Tuple[str, dict]]:
+        """Finds a cached plan for a request.
+
+        Args:
+            request: Raw user request.
+
+        Returns:
+            Tuple of (cache key, plan dict with `title`, `steps` and
+            `step_dependencies` adapted to the request), or None on a miss.
+        """
+        self._load()
+        normalized, slots = self.normalize(request)
+        key = self._hash(normalized)
+
+        entry = self._entries.get(key)
+        hit = "exact_hits"
+        if not entry:
+            key, score = self._most_similar(normalized)
+            entry = self._entries.get(key) if key else None
+            if not entry or score < self.similarity_threshold:
+                self._metrics["misses"] += 1
+                return None
+            hit = "similar_hits"
+            logger.info(f"Plan cache similarity hit ({score:.2f}) for key {key}")
+
+        kinds = self.slot_kinds(request)
+        if len(slots) != len(entry.get("slots", [])) or kinds != entry.get(
+            "slot_kinds", kinds
+        ):
+            # The cached steps may reference values this request cannot fill
+            logger.info(f"Plan cache hit {key} refused: request slots differ")
+            self._metrics["refused"] += 1
+            self._metrics["misses"] += 1
+            return None
+        self._metrics[hit] += 1
+
+        entry["hits"] = entry.get("hits", 0) + 1
+        entry["last_used_at"] = time.time()
+        self._save()
+        return key, self._adapt(entry, slots)
+
+    def _most_similar(self, normalized: str) -> Tuple[Optional[str], float]:
+        """Returns the cached key with the highest Jaccard similarity."""
+        tokens = self._tokens(normalized)
+        overlaps = Counter()
+        for token in tokens:
+            for key in self._index.get(token, ()):
+                overlaps[key] += 1
+
+        best_key, best_score = None, 0.0
+        for key, overlap in overlaps.items():
+            entry_tokens = len(self._tokens(self._entries[key]["normalized"]))
+            score = overlap / (len(tokens) + entry_tokens - overlap)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    @classmethod
+    def _adapt(cls, entry: dict, slots: List[str]) -> dict:
+        """Fills the cached step templates with the new request's slot values."""
+        template = entry.get("template") or cls._templatize(
+            entry["steps"], entry.get("slots", [])
+        )
+        steps = [
+            _PLACEHOLDER_PATTERN.sub(lambda m: slots[int(m.group(1))], step)
+            for step in template
+        ]
+        return {
+            "title": entry["title"],
+            "steps": steps,
+            "step_dependencies": entry.get("step_dependencies"),
+        }
+
+    def store(self, request: str, plan: dict) -> None:
+        """Stores a successfully completed plan for a request.
+
+        Args:
+            request: Raw user request the plan was created for.
+            plan: Plan dict from `PlanningTool.plans`.
+        """
+        self._load()
+        normalized, slots = self.normalize(request)
+        key = self._hash(normalized)
+        previous = self._entries.get(key, {})
+
+        self._entries[key] = {
+            "normalized": normalized,
+            "slots": slots,
+            "slot_kinds": self.slot_kinds(request),
+            "title": plan.get("title", ""),
+            "steps": list(plan.get("steps", [])),
+            "template": self._templatize(list(plan.get("steps", [])), slots),
+            "step_dependencies": plan.get("step_dependencies"),
+            "hits": previous.get("hits", 0),
+            "successes": previous.get("successes", 0) + 1,
+            "created_at": previous.get("created_at", time.time()),
+            "last_used_at": time.time(),
+        }
+        self._index_entry(key)
+        self._metrics["stores"] += 1
+
+        if len(self._entries) > self.max_entries:
+            lru = sorted(self._entries, key=lambda k: self._entries[k]["last_used_at"])
+            for stale_key in lru[: len(self._entries) - self.max_entries]:
+                self._remove(stale_key)
+
+        self._save()
+
+    def record_success(self, key: str) -> None:
+        """Records that a reused plan completed without blocked steps."""
+        self._load()
+        if key in self._entries:
+            self._entries[key]["successes"] = self._entries[key].get("successes", 0) + 1
+            self._save()
+
+    def invalidate(self, key: str) -> None:
+        """Drops a cached plan, e.g. after it led to blocked steps."""
+        self._load()
+        if key in self._entries:
+            self._remove(key)
+            self._metrics["invalidations"] += 1
+            logger.info(f"Invalidated cached plan {key}")
+            self._save()
+
+    def get_stats(self) -> Dict:
+        """Gets cache statistics.
+
+        Returns:
+            Dict: Hit/miss counters and entry count.
+        """
+        self._load()
+        hits = self._metrics["exact_hits"] + self._metrics["similar_hits"]
+        lookups = hits + self._metrics["misses"]
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            **self._metrics,
+        }
+
+    def _index_entry(self, key: str) -> None:
+        for token in self._tokens(self._entries[key]["normalized"]):
+            self._index.setdefault(token, set()).add(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for token in self._tokens(entry["normalized"]):
+            keys = self._index.get(token)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._index[token]
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if self.path.exists():
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"Failed to load plan cache from {self.path}: {e}")
+            self._entries = {}
+        for key in self._entries:
+            self._index_entry(key)
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            tmp_path.replace(self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save plan cache to {self.path}: {e}")
@@ -1,16 +1,20 @@
+import asyncio
 import json
+import re
 import time
 from enum import Enum
 from typing import Dict, List, Optional, Union
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 
 from app.agent.base import BaseAgent
 from app.flow.base import BaseFlow
+from app.flow.plan_cache import PlanCache
 from app.llm import LLM
 from app.logger import logger
-from app.schema import AgentState, Message, ToolChoice
-from app.tool import PlanningTool
+from app.sandbox.client import SANDBOX_CLIENT
+from app.schema import AgentState, Memory, Message, ToolChoice
+from app.tool import PlanningTool, ToolCollection
 
 
 class PlanStepStatus(str, Enum):
@@ -42,6 +46,30 @@ class PlanStepStatus(str, Enum):
         }
 
 
+class PlanExecutionMode(str, Enum):
+    """Enum class defining how plan steps are scheduled"""
+
+    SEQUENTIAL = "sequential"
+    PARALLEL = "parallel"
+
+
+class StepRecord(BaseModel):
+    """Structured outcome of a single executed plan step"""
+
+    index: int
+    text: str
+    executor: str
+    status: str = PlanStepStatus.IN_PROGRESS.value
+    summary: str = ""
+    result: str = ""
+    started_at: float = Field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+
+# Agent fields that hold per-run state and must not be copied into step clones
+_PER_RUN_AGENT_FIELDS = {"memory", "state", "current_step", "tool_calls"}
+
+
 class PlanningFlow(BaseFlow):
     """A flow that manages planning and execution of tasks using agents."""
 
@@ -50,6 +78,22 @@ class PlanningFlow(BaseFlow):
     executor_keys: List[str] = Field(default_factory=list)
     active_plan_id: str = Field(default_factory=lambda: f"plan_{int(time.time())}")
     current_step_index: Optional[int] = None
+    execution_mode: PlanExecutionMode = PlanExecutionMode.SEQUENTIAL
+    max_concurrent_steps: int = Field(
+        default=3, description="Maximum plan steps executed at once in parallel mode"
+    )
+    step_result_note_length: int = Field(
+        default=500, description="Characters of each step result kept in plan notes"
+    )
+    isolate_step_memory: bool = Field(
+        default=True,
+        description="Give each step a fresh executor memory seeded with the plan status",
+    )
+    step_records: Dict[int, StepRecord] = Field(default_factory=dict)
+    plan_cache: Optional[PlanCache] = Field(default_factory=PlanCache.from_config)
+
+    _plan_request: Optional[str] = None
+    _cached_plan_key: Optional[str] = None
 
     def __init__(
         self, agents: Union[BaseAgent, List[BaseAgent], Dict[str, BaseAgent]], **data
@@ -93,49 +137,181 @@ class PlanningFlow(BaseFlow):
 
     async def execute(self, input_text: str) -> str:
         """Execute the planning flow with agents."""
-        try:
-            if not self.primary_agent:
-                raise ValueError("No primary agent available")
+        parallel = self.execution_mode == PlanExecutionMode.PARALLEL
 
-            # Create initial plan if input provided
-            if input_text:
-                await self._create_initial_plan(input_text)
-
-                # Verify plan was created successfully
-                if self.active_plan_id not in self.planning_tool.plans:
-                    logger.error(
-                        f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
-                    )
-                    return f"Failed to create plan for: {input_text}"
+        # Keep one warm sandbox for the whole flow. Sequential step runs reset
+        # it; concurrent steps share it, so it is kept as-is until the flow ends.
+        async with SANDBOX_CLIENT.lease(reset_between_runs=not parallel):
+            try:
+                if not self.primary_agent:
+                    raise ValueError("No primary agent available")
+
+                # Create initial plan if input provided
+                if input_text:
+                    self.step_records.clear()
+                    await self._create_initial_plan(input_text)
+
+                    # Verify plan was created successfully
+                    if self.active_plan_id not in self.planning_tool.plans:
+                        logger.error(
+                            f"Plan creation failed. Plan ID {self.active_plan_id} not found in planning tool."
+                        )
+                        return f"Failed to create plan for: {input_text}"
+
+                if parallel:
+                    return await self._execute_parallel()
+
+                while True:
+                    # Get current step to execute
+                    (
+                        self.current_step_index,
+                        step_info,
+                    ) = await self._get_current_step_info()
+
+                    # Exit if no more steps or plan completed
+                    if self.current_step_index is None:
+                        break
+
+                    # Execute current step with appropriate agent
+                    step_type = step_info.get("type") if step_info else None
+                    executor = self.get_executor(step_type)
+                    await self._execute_step(executor, step_info)
+
+                    # Check if agent wants to terminate
+                    if (
+                        hasattr(executor, "state")
+                        and executor.state == AgentState.FINISHED
+                    ):
+                        self._update_plan_cache()
+                        return self._format_step_results()
+
+                self._update_plan_cache()
+                return self._format_step_results() + await self._finalize_plan()
+            except Exception as e:
+                logger.error(f"Error in PlanningFlow: {str(e)}")
+                return f"Execution failed: {str(e)}"
+
+    async def _execute_parallel(self) -> str:
+        """Execute plan steps as a DAG, running ready steps concurrently.
+
+        A step is ready once all the steps it depends on are completed. Each
+        step runs on its own clone of the selected executor so concurrent
+        steps never share memory, and at most `max_concurrent_steps` run at
+        once. Steps whose dependencies never complete are left not started.
+        """
+        running: Dict[asyncio.Task, int] = {}
+
+        while True:
+            capacity = self.max_concurrent_steps - len(running)
+            for step_info in self._get_ready_steps()[: max(capacity, 0)]:
+                step_index = step_info["index"]
+                await self._mark_step_status(
+                    step_index, PlanStepStatus.IN_PROGRESS.value
+                )
+                executor = self._clone_executor(
+                    self.get_executor(step_info.get("type"))
+                )
+                task = asyncio.create_task(self._execute_step(executor, step_info))
+                running[task] = step_index
+                logger.info(f"Started step {step_index} ({len(running)} running)")
 
-            result = ""
-            while True:
-                # Get current step to execute
-                self.current_step_index, step_info = await self._get_current_step_info()
+            if not running:
+                break
 
-                # Exit if no more steps or plan completed
-                if self.current_step_index is None:
-                    result += await self._finalize_plan()
-                    break
+            done, _ = await asyncio.wait(
+                running.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                step_index = running.pop(task)
+                if self._get_step_status(step_index) != PlanStepStatus.COMPLETED.value:
+                    await self._mark_step_status(
+                        step_index, PlanStepStatus.BLOCKED.value
+                    )
 
-                # Execute current step with appropriate agent
-                step_type = step_info.get("type") if step_info else None
-                executor = self.get_executor(step_type)
-                step_result = await self._execute_step(executor, step_info)
-                result += step_result + "\n"
+        self._update_plan_cache()
+        return self._format_step_results() + await self._finalize_plan()
+
+    def _get_ready_steps(self) -> List[dict]:
+        """Return info for not-started steps whose dependencies are completed."""
+        plan_data = self.planning_tool.plans.get(self.active_plan_id)
+        if not plan_data:
+            return []
+
+        steps = plan_data.get("steps", [])
+        dependencies = plan_data.get("step_dependencies") or [
+            [i - 1] if i > 0 else [] for i in range(len(steps))
+        ]
+        completed = PlanStepStatus.COMPLETED.value
+
+        ready = []
+        for i, step in enumerate(steps):
+            if self._get_step_status(i) != PlanStepStatus.NOT_STARTED.value:
+                continue
+            deps = dependencies[i] if i < len(dependencies) else []
+            if all(self._get_step_status(dep) == completed for dep in deps):
+                ready.append(self._build_step_info(i, step))
+        return ready
+
+    def _get_step_status(self, step_index: int) -> str:
+        """Get the stored status of a step."""
+        plan_data = self.planning_tool.plans.get(self.active_plan_id, {})
+        step_statuses = plan_data.get("step_statuses", [])
+        if step_index < len(step_statuses):
+            return step_statuses[step_index]
+        return PlanStepStatus.NOT_STARTED.value
+
+    async def _mark_step_status(self, step_index: int, step_status: str) -> None:
+        """Set the status of a step in the active plan."""
+        try:
+            await self.planning_tool.execute(
+                command="mark_step",
+                plan_id=self.active_plan_id,
+                step_index=step_index,
+                step_status=step_status,
+            )
+        except Exception as e:
+            logger.warning(f"Error marking step {step_index} as {step_status}: {e}")
 
-                # Check if agent wants to terminate
-                if hasattr(executor, "state") and executor.state == AgentState.FINISHED:
-                    break
+    @staticmethod
+    def _clone_executor(executor: BaseAgent) -> BaseAgent:
+        """Create a fresh copy of an executor for a single concurrent step.
 
-            return result
-        except Exception as e:
-            logger.error(f"Error in PlanningFlow: {str(e)}")
-            return f"Execution failed: {str(e)}"
+        The clone is built from the fields explicitly set on the original, so
+        it gets its own memory and freshly constructed default tools, and it
+        shares the (stateless) LLM client. Tools the original was given or
+        gained later (e.g. from MCP servers) are shared with the clone.
+        """
+        init_kwargs = {
+            name: getattr(executor, name)
+            for name in executor.model_fields_set
+            if name not in _PER_RUN_AGENT_FIELDS and name != "available_tools"
+        }
+        init_kwargs["llm"] = executor.llm
+        init_kwargs["memory"] = Memory(max_messages=executor.memory.max_messages)
+        if getattr(executor, "event_sink", None):
+            init_kwargs["event_sink"] = executor.event_sink
+        clone = type(executor)(**init_kwargs)
+
+        tools = getattr(executor, "available_tools", None)
+        if tools is not None:
+            fresh = (
+                {}
+                if "available_tools" in executor.model_fields_set
+                else clone.available_tools.tool_map
+            )
+            clone.available_tools = ToolCollection(
+                *(fresh.get(tool.name, tool) for tool in tools)
+            )
+        return clone
 
     async def _create_initial_plan(self, request: str) -> None:
         """Create an initial plan based on the request using the flow's LLM and PlanningTool."""
         logger.info(f"Creating initial plan with ID: {self.active_plan_id}")
+        self._plan_request = request
+        self._cached_plan_key = None
+
+        if self.plan_cache and await self._create_plan_from_cache(request):
+            return
 
         system_message_content = (
             "You are a planning assistant. Create a concise, actionable plan with clear steps. "
@@ -158,6 +334,12 @@ class PlanningFlow(BaseFlow):
                 f"The infomation of them are below: {json.dumps(agents_description)}\n"
                 "When creating steps in the planning tool, please specify the agent names using the format '[agent_name]'."
             )
+        if self.execution_mode == PlanExecutionMode.PARALLEL:
+            system_message_content += (
+                "\nSteps can run in parallel. Use `step_dependencies` to list, for each step, "
+                "the indices of earlier steps whose results it needs; leave the list empty for "
+                "steps that can start immediately."
+            )
 
         # Create a system message for plan creation
         system_message = Message.system_message(system_message_content)
@@ -210,6 +392,44 @@ class PlanningFlow(BaseFlow):
             }
         )
 
+    async def _create_plan_from_cache(self, request: str) -> bool:
+        """Create the plan from a cached plan for a similar request, if any."""
+        try:
+            cached = self.plan_cache.lookup(request)
+            if not cached:
+                return False
+
+            key, plan = cached
+            await self.planning_tool.execute(
+                command="create",
+                plan_id=self.active_plan_id,
+                title=f"Plan for: {request[:50]}{'...' if len(request) > 50 else ''}",
+                steps=plan["steps"],
+                step_dependencies=plan["step_dependencies"],
+            )
+            self._cached_plan_key = key
+            logger.info(f"Reused cached plan {key} for plan {self.active_plan_id}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to create plan from cache: {e}")
+            return False
+
+    def _update_plan_cache(self) -> None:
+        """Store a successful plan, or invalidate a reused one that got blocked."""
+        plan_data = self.planning_tool.plans.get(self.active_plan_id)
+        if not self.plan_cache or not plan_data or not self._plan_request:
+            return
+
+        statuses = plan_data.get("step_statuses", [])
+        if PlanStepStatus.BLOCKED.value in statuses:
+            if self._cached_plan_key:
+                self.plan_cache.invalidate(self._cached_plan_key)
+        elif all(status == PlanStepStatus.COMPLETED.value for status in statuses):
+            if self._cached_plan_key:
+                self.plan_cache.record_success(self._cached_plan_key)
+            else:
+                self.plan_cache.store(self._plan_request, plan_data)
+
     async def _get_current_step_info(self) -> tuple[Optional[int], Optional[dict]]:
         """
         Parse the current plan to identify the first non-completed step's index and info.
@@ -236,15 +456,7 @@ class PlanningFlow(BaseFlow):
                     status = step_statuses[i]
 
                 if status in PlanStepStatus.get_active_statuses():
-                    # Extract step type/category if available
-                    step_info = {"text": step}
-
-                    # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
-                    import re
-
-                    type_match = re.search(r"\[([A-Z_]+)\]", step)
-                    if type_match:
-                        step_info["type"] = type_match.group(1).lower()
+                    step_info = self._build_step_info(i, step)
 
                     # Mark current step as in_progress
                     try:
@@ -274,11 +486,36 @@ class PlanningFlow(BaseFlow):
             logger.warning(f"Error finding current step index: {e}")
             return None, None
 
+    @staticmethod
+    def _build_step_info(index: int, step: str) -> dict:
+        """Build the step info dict, extracting the step type if available."""
+        step_info = {"index": index, "text": step}
+
+        # Try to extract step type from the text (e.g., [SEARCH] or [CODE])
+        type_match = re.search(r"\[([A-Z_]+)\]", step)
+        if type_match:
+            step_info["type"] = type_match.group(1).lower()
+        return step_info
+
     async def _execute_step(self, executor: BaseAgent, step_info: dict) -> str:
-        """Execute the current step with the specified agent using agent.run()."""
+        """Execute the current step with the specified agent using agent.run().
+
+        With `isolate_step_memory`, the executor starts the step from an empty
+        memory. Earlier steps are represented only by the plan status, whose
+        notes carry a compact summary of each finished step, so later steps do
+        not pay for the full transcripts of earlier ones.
+        """
+        step_index = step_info.get("index", self.current_step_index)
+        step_text = step_info.get("text", f"Step {step_index}")
+
+        if self.isolate_step_memory:
+            executor.memory = Memory(max_messages=executor.memory.max_messages)
+            executor.current_step = 0
+
         # Prepare context for the agent with current plan status
         plan_status = await self._get_plan_text()
-        step_text = step_info.get("text", f"Step {self.current_step_index}")
+        record = StepRecord(index=step_index, text=step_text, executor=executor.name)
+        self.step_records[step_index] = record
 
         # Create a prompt for the agent to execute the current step
         step_prompt = f"""
@@ -286,7 +523,7 @@ class PlanningFlow(BaseFlow):
         {plan_status}
 
         YOUR CURRENT TASK:
-        You are now working on step {self.current_step_index}: "{step_text}"
+        You are now working on step {step_index}: "{step_text}"
 
         Please only execute this current step using the appropriate tools. When you're done, provide a summary of what you accomplished.
         """
@@ -294,18 +531,56 @@ class PlanningFlow(BaseFlow):
         # Use agent.run() to execute the step
         try:
             step_result = await executor.run(step_prompt)
+            record.result = step_result
+            record.summary = self._summarize_step(executor, step_result)
+            record.status = PlanStepStatus.COMPLETED.value
 
-            # Mark the step as completed after successful execution
-            await self._mark_step_completed()
+            # Mark the step as completed, keeping its summary in the plan notes
+            await self._mark_step_completed(step_index, record.summary)
 
             return step_result
         except Exception as e:
-            logger.error(f"Error executing step {self.current_step_index}: {e}")
-            return f"Error executing step {self.current_step_index}: {str(e)}"
+            logger.error(f"Error executing step {step_index}: {e}")
+            record.result = f"Error executing step {step_index}: {str(e)}"
+            record.summary = record.result
+            record.status = PlanStepStatus.BLOCKED.value
+            await self._mark_step_status(step_index, PlanStepStatus.BLOCKED.value)
+            return record.result
+        finally:
+            record.finished_at = time.time()
+
+    def _summarize_step(self, executor: BaseAgent, step_result: str) -> str:
+        """Build a compact summary of a step's outcome.
+
+        Prefers the executor's last assistant message, which the step prompt
+        asks to be a summary, and falls back to the tail of the run output.
+        """
+        summary = ""
+        for message in reversed(executor.memory.messages):
+            if message.role == "assistant" and message.content:
+                summary = message.content.strip()
+                break
+        if not summary:
+            summary = step_result.strip()[-self.step_result_note_length :]
+
+        if len(summary) > self.step_result_note_length:
+            summary = summary[: self.step_result_note_length].rstrip() + "..."
+        return summary
+
+    def _format_step_results(self) -> str:
+        """Join the full results of executed steps in plan order."""
+        return "".join(
+            self.step_records[index].result + "\n"
+            for index in sorted(self.step_records)
+        )
 
-    async def _mark_step_completed(self) -> None:
-        """Mark the current step as completed."""
-        if self.current_step_index is None:
+    async def _mark_step_completed(
+        self, step_index: Optional[int] = None, step_notes: Optional[str] = None
+    ) -> None:
+        """Mark a step (the current step by default) as completed."""
+        if step_index is None:
+            step_index = self.current_step_index
+        if step_index is None:
             return
 
         try:
@@ -313,11 +588,12 @@ class PlanningFlow(BaseFlow):
             await self.planning_tool.execute(
                 command="mark_step",
                 plan_id=self.active_plan_id,
-                step_index=self.current_step_index,
+                step_index=step_index,
                 step_status=PlanStepStatus.COMPLETED.value,
+                step_notes=step_notes,
             )
             logger.info(
-                f"Marked step {self.current_step_index} as completed in plan {self.active_plan_id}"
+                f"Marked step {step_index} as completed in plan {self.active_plan_id}"
             )
         except Exception as e:
             logger.warning(f"Failed to update plan status: {e}")
@@ -327,11 +603,11 @@ class PlanningFlow(BaseFlow):
                 step_statuses = plan_data.get("step_statuses", [])
 
                 # Ensure the step_statuses list is long enough
-                while len(step_statuses) <= self.current_step_index:
+                while len(step_statuses) <= step_index:
                     step_statuses.append(PlanStepStatus.NOT_STARTED.value)
 
                 # Update the status
-                step_statuses[self.current_step_index] = PlanStepStatus.COMPLETED.value
+                step_statuses[step_index] = PlanStepStatus.COMPLETED.value
                 plan_data["step_statuses"] = step_statuses
 
     async def _get_plan_text(self) -> str:
@@ -15,7 +15,7 @@ from mcp.server.fastmcp import FastMCP
 
 from app.logger import logger
 from app.tool.base import BaseTool
-from app.tool.bash import Bash
+from app.tool.bash import Bash, close_bash_sessions
 from app.tool.browser_use_tool import BrowserUseTool
 from app.tool.str_replace_editor import StrReplaceEditor
 from app.tool.terminate import Terminate
@@ -138,9 +138,10 @@ class MCPServer:
     async def cleanup(self) -> None:
         """Clean up server resources."""
         logger.info("Cleaning up resources")
-        # Follow original cleanup logic - only clean browser tool
+        # Close the browser and the shell sessions, which outlive tool calls
         if "browser" in self.tools and hasattr(self.tools["browser"], "cleanup"):
             await self.tools["browser"].cleanup()
+        await close_bash_sessions()
 
     def register_all_tools(self) -> None:
         """Register all tools with the server."""
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Protocol
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Protocol
 
 from app.config import SandboxSettings
+from app.logger import logger
 from app.sandbox.core.sandbox import DockerSandbox
 
 
@@ -46,6 +48,28 @@ class SandboxFileOperations(Protocol):
         """
         ...
 
+    async def read_files(
+        self, paths: List[str], missing_ok: bool = False
+    ) -> Dict[str, str]:
+        """Reads several files from container in one transfer.
+
+        Args:
+            paths: File paths in container.
+            missing_ok: Omit missing files instead of raising.
+
+        Returns:
+            Dict[str, str]: Mapping of path to content.
+        """
+        ...
+
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to container in one transfer.
+
+        Args:
+            files: Mapping of path in container to content.
+        """
+        ...
+
 
 class BaseSandboxClient(ABC):
     """Base sandbox client interface."""
@@ -78,6 +102,20 @@ class BaseSandboxClient(ABC):
     async def write_file(self, path: str, content: str) -> None:
         """Writes file."""
 
+    @abstractmethod
+    async def read_files(
+        self, paths: List[str], missing_ok: bool = False
+    ) -> Dict[str, str]:
+        """Reads several files in one transfer."""
+
+    @abstractmethod
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files in one transfer."""
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Resets sandbox state without recreating it."""
+
     @abstractmethod
     async def cleanup(self) -> None:
         """Cleans up resources."""
@@ -89,6 +127,65 @@ class LocalSandboxClient(BaseSandboxClient):
     def __init__(self):
         """Initializes local sandbox client."""
         self.sandbox: Optional[DockerSandbox] = None
+        self._lease_count = 0
+        self._reset_between_runs = True
+        self._restore_snapshot = False
+
+    @property
+    def is_leased(self) -> bool:
+        """Whether a flow or session currently holds the sandbox warm."""
+        return self._lease_count > 0
+
+    @asynccontextmanager
+    async def lease(
+        self, reset_between_runs: bool = True, restore_snapshot: bool = False
+    ):
+        """Keeps the sandbox alive across agent runs for the lease duration.
+
+        While at least one lease is held, `finish_run` resets the sandbox
+        instead of destroying it, so consecutive runs (e.g. the steps of a
+        planning flow) reuse the same warm container. The sandbox is cleaned
+        up when the last lease is released.
+
+        Args:
+            reset_between_runs: Whether finished runs reset the workspace.
+                When False, files persist between runs of the same lease.
+            restore_snapshot: Whether resets restore the workspace as it was
+                when the lease started (or when the sandbox was created
+                within it) instead of emptying it.
+
+        Yields:
+            The client itself.
+        """
+        outermost = self._lease_count == 0
+        if outermost:
+            self._reset_between_runs = reset_between_runs
+            self._restore_snapshot = restore_snapshot
+            if restore_snapshot and self.sandbox:
+                await self.snapshot()
+        self._lease_count += 1
+        try:
+            yield self
+        finally:
+            self._lease_count -= 1
+            if self._lease_count == 0:
+                await self.cleanup()
+
+    async def finish_run(self) -> None:
+        """Releases the sandbox at the end of an agent run.
+
+        Resets the sandbox when a lease keeps it warm, otherwise destroys it.
+        """
+        if not self.is_leased:
+            await self.cleanup()
+            return
+
+        if self.sandbox and self._reset_between_runs:
+            try:
+                await self.reset()
+            except Exception as e:
+                logger.warning(f"Sandbox reset failed, recreating on next use: {e}")
+                await self.cleanup()
 
     async def create(
         self,
@@ -106,6 +203,8 @@ class LocalSandboxClient(BaseSandboxClient):
         """
         self.sandbox = DockerSandbox(config, volume_bindings)
         await self.sandbox.create()
+        if self.is_leased and self._restore_snapshot:
+            await self.snapshot()
 
     async def run_command(self, command: str, timeout: Optional[int] = None) -> str:
         """Runs command in sandbox.
@@ -182,6 +281,53 @@ class LocalSandboxClient(BaseSandboxClient):
             raise RuntimeError("Sandbox not initialized")
         await self.sandbox.write_file(path, content)
 
+    async def read_files(
+        self, paths: List[str], missing_ok: bool = False
+    ) -> Dict[str, str]:
+        """Reads several files from container in a single tar stream.
+
+        Args:
+            paths: File paths in container.
+            missing_ok: Omit missing files instead of raising.
+
+        Returns:
+            Mapping of path to content.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        return await self.sandbox.read_files(paths, missing_ok=missing_ok)
+
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to container in a single tar upload.
+
+        Args:
+            files: Mapping of path in container to content.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        await self.sandbox.write_files(files)
+
+    async def snapshot(self) -> None:
+        """Records the current workspace so resets restore it.
+
+        Raises:
+            RuntimeError: If sandbox not initialized.
+        """
+        if not self.sandbox:
+            raise RuntimeError("Sandbox not initialized")
+        await self.sandbox.snapshot_workspace()
+
+    async def reset(self) -> None:
+        """Resets the workspace and terminal of the current sandbox."""
+        if self.sandbox:
+            await self.sandbox.reset()
+
     async def cleanup(self) -> None:
         """Cleans up resources."""
         if self.sandbox:
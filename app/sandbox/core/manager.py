@@ -24,6 +24,8 @@ class SandboxManager:
         cleanup_interval: Cleanup check interval in seconds.
         _sandboxes: Active sandbox instance mapping.
         _last_used: Last used time record for sandboxes.
+        _leased: Sandboxes currently held through `acquire_sandbox`.
+        _warm: Released sandboxes kept warm for reuse until reaped.
     """
 
     def __init__(
@@ -49,6 +51,8 @@ class SandboxManager:
         # Resource mappings
         self._sandboxes: Dict[str, DockerSandbox] = {}
         self._last_used: Dict[str, float] = {}
+        self._leased: Set[str] = set()
+        self._warm: Dict[str, SandboxSettings] = {}
 
         # Concurrency control
         self._locks: Dict[str, asyncio.Lock] = {}
@@ -156,6 +160,93 @@ class SandboxManager:
                     await self.delete_sandbox(sandbox_id)
                 raise RuntimeError(f"Failed to create sandbox: {e}")
 
+    async def acquire_sandbox(
+        self,
+        config: Optional[SandboxSettings] = None,
+        volume_bindings: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Leases a sandbox, reusing a warm one when the config matches.
+
+        Warm sandboxes are previously released sandboxes whose workspace has
+        already been reset, so acquiring one skips container creation and
+        terminal startup.
+
+        Args:
+            config: Sandbox configuration.
+            volume_bindings: Volume mapping configuration. Sandboxes with
+                custom bindings are never taken from the warm pool.
+
+        Returns:
+            str: Sandbox ID.
+
+        Raises:
+            RuntimeError: If max sandbox count reached or creation fails.
+        """
+        config = config or SandboxSettings()
+        if not volume_bindings:
+            async with self._global_lock:
+                for sandbox_id, warm_config in list(self._warm.items()):
+                    if warm_config != config or sandbox_id not in self._sandboxes:
+                        continue
+                    del self._warm[sandbox_id]
+                    self._leased.add(sandbox_id)
+                    self._last_used[sandbox_id] = asyncio.get_event_loop().time()
+                    logger.info(f"Reusing warm sandbox {sandbox_id}")
+                    return sandbox_id
+
+        sandbox_id = await self.create_sandbox(config, volume_bindings)
+        self._leased.add(sandbox_id)
+        return sandbox_id
+
+    async def release_sandbox(self, sandbox_id: str, keep_warm: bool = True) -> None:
+        """Returns a leased sandbox.
+
+        The sandbox is reset and kept warm for the next `acquire_sandbox`
+        call; idle warm sandboxes are reaped by the cleanup task after
+        `idle_timeout`. Sandboxes that fail to reset are deleted.
+
+        Args:
+            sandbox_id: Sandbox ID.
+            keep_warm: Whether to keep the sandbox for reuse instead of deleting it.
+        """
+        self._leased.discard(sandbox_id)
+        if sandbox_id not in self._sandboxes:
+            return
+
+        sandbox = self._sandboxes[sandbox_id]
+        if not keep_warm or self._is_shutting_down or sandbox.volume_bindings:
+            await self.delete_sandbox(sandbox_id)
+            return
+
+        try:
+            async with self.sandbox_operation(sandbox_id) as sandbox:
+                await sandbox.reset()
+            self._warm[sandbox_id] = sandbox.config
+        except Exception as e:
+            logger.warning(f"Failed to reset sandbox {sandbox_id}, deleting: {e}")
+            await self.delete_sandbox(sandbox_id)
+
+    @asynccontextmanager
+    async def lease(
+        self,
+        config: Optional[SandboxSettings] = None,
+        volume_bindings: Optional[Dict[str, str]] = None,
+    ):
+        """Context manager that acquires a sandbox and releases it on exit.
+
+        Args:
+            config: Sandbox configuration.
+            volume_bindings: Volume mapping configuration.
+
+        Yields:
+            DockerSandbox: The leased sandbox instance.
+        """
+        sandbox_id = await self.acquire_sandbox(config, volume_bindings)
+        try:
+            yield self._sandboxes[sandbox_id]
+        finally:
+            await self.release_sandbox(sandbox_id)
+
     async def get_sandbox(self, sandbox_id: str) -> DockerSandbox:
         """Gets a sandbox instance.
 
@@ -193,6 +284,7 @@ class SandboxManager:
             for sandbox_id, last_used in self._last_used.items():
                 if (
                     sandbox_id not in self._active_operations
+                    and sandbox_id not in self._leased
                     and current_time - last_used > self.idle_timeout
                 ):
                     to_cleanup.append(sandbox_id)
@@ -238,6 +330,8 @@ class SandboxManager:
         self._last_used.clear()
         self._locks.clear()
         self._active_operations.clear()
+        self._leased.clear()
+        self._warm.clear()
 
         logger.info("Manager cleanup completed")
 
@@ -271,6 +365,8 @@ class SandboxManager:
                     self._sandboxes.pop(sandbox_id, None)
                     self._last_used.pop(sandbox_id, None)
                     self._locks.pop(sandbox_id, None)
+                    self._leased.discard(sandbox_id)
+                    self._warm.pop(sandbox_id, None)
                     logger.info(f"Deleted sandbox {sandbox_id}")
         except Exception as e:
             logger.error(f"Error during cleanup of sandbox {sandbox_id}: {e}")
@@ -306,6 +402,8 @@ class SandboxManager:
         return {
             "total_sandboxes": len(self._sandboxes),
             "active_operations": len(self._active_operations),
+            "leased_sandboxes": len(self._leased),
+            "warm_sandboxes": len(self._warm),
             "max_sandboxes": self.max_sandboxes,
             "idle_timeout": self.idle_timeout,
             "cleanup_interval": self.cleanup_interval,
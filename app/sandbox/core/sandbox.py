@@ -1,10 +1,13 @@
 import asyncio
 import io
 import os
+import shlex
+import shutil
 import tarfile
 import tempfile
+import time
 import uuid
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import docker
 from docker.errors import NotFound
@@ -15,6 +18,41 @@ from app.sandbox.core.exceptions import SandboxTimeoutError
 from app.sandbox.core.terminal import AsyncDockerizedTerminal
 
 
+_STREAM_BUFFER_SIZE = 256 * 1024
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks.
+
+    Lets `tarfile` consume a Docker archive stream as it arrives instead of
+    spooling it to a temporary file first.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _open_tar_stream(chunks: Iterable[bytes]) -> tarfile.TarFile:
+    """Opens an archive stream for sequential reading."""
+    reader = io.BufferedReader(_ChunkReader(chunks), buffer_size=_STREAM_BUFFER_SIZE)
+    return tarfile.open(fileobj=reader, mode="r|")
+
+
 class DockerSandbox:
     """Docker sandbox environment.
 
@@ -45,6 +83,7 @@ class DockerSandbox:
         self.client = docker.from_env()
         self.container: Optional[Container] = None
         self.terminal: Optional[AsyncDockerizedTerminal] = None
+        self._workspace_snapshot: Optional[bytes] = None
 
     async def create(self) -> "DockerSandbox":
         """Creates and starts the sandbox container.
@@ -87,14 +126,7 @@ class DockerSandbox:
             # Start container
             await asyncio.to_thread(self.container.start)
 
-            # Initialize terminal
-            self.terminal = AsyncDockerizedTerminal(
-                container["Id"],
-                self.config.work_dir,
-                env_vars={"PYTHONUNBUFFERED": "1"}
-                # Ensure Python output is not buffered
-            )
-            await self.terminal.init()
+            await self._init_terminal()
 
             return self
 
@@ -102,6 +134,78 @@ class DockerSandbox:
             await self.cleanup()  # Ensure resources are cleaned up
             raise RuntimeError(f"Failed to create sandbox: {e}") from e
 
+    async def _init_terminal(self) -> None:
+        """Starts a fresh interactive terminal session in the container."""
+        self.terminal = AsyncDockerizedTerminal(
+            self.container.id,
+            self.config.work_dir,
+            env_vars={"PYTHONUNBUFFERED": "1"}
+            # Ensure Python output is not buffered
+        )
+        await self.terminal.init()
+
+    async def snapshot_workspace(self) -> None:
+        """Records the current working directory contents for later resets.
+
+        The snapshot is kept in memory as a tar archive and restored by
+        `reset`, so a warm container can be returned to a known state.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or snapshot fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        try:
+            stream, _ = await asyncio.to_thread(
+                self.container.get_archive, self.config.work_dir
+            )
+            self._workspace_snapshot = await asyncio.to_thread(b"".join, stream)
+        except Exception as e:
+            raise RuntimeError(f"Failed to snapshot workspace: {e}")
+
+    async def reset(self) -> None:
+        """Resets the sandbox to a clean state without recreating the container.
+
+        Clears the working directory (or restores the snapshot taken by
+        `snapshot_workspace`) and restarts the terminal session, which drops
+        shell state such as exported variables and the current directory.
+
+        Raises:
+            RuntimeError: If sandbox not initialized or reset fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+
+        try:
+            if self.terminal:
+                await self.terminal.close()
+                self.terminal = None
+
+            work_dir = self.config.work_dir
+            quoted = shlex.quote(work_dir)
+            exit_code, output = await asyncio.to_thread(
+                self.container.exec_run,
+                [
+                    "sh",
+                    "-c",
+                    f"mkdir -p {quoted} && find {quoted} -mindepth 1 -delete",
+                ],
+            )
+            if exit_code != 0:
+                raise RuntimeError(output.decode("utf-8", errors="replace"))
+
+            if self._workspace_snapshot is not None:
+                await asyncio.to_thread(
+                    self.container.put_archive,
+                    os.path.dirname(work_dir.rstrip("/")) or "/",
+                    self._workspace_snapshot,
+                )
+
+            await self._init_terminal()
+        except Exception as e:
+            raise RuntimeError(f"Failed to reset sandbox: {e}")
+
     def _prepare_volume_bindings(self) -> Dict[str, Dict[str, str]]:
         """Prepares volume binding configuration.
 
@@ -187,7 +291,7 @@ class DockerSandbox:
             )
 
             # Read file content from tar stream
-            content = await self._read_from_tar(tar_stream)
+            content = await asyncio.to_thread(self._read_from_tar, tar_stream)
             return content.decode("utf-8")
 
         except NotFound:
@@ -195,6 +299,53 @@ class DockerSandbox:
         except Exception as e:
             raise RuntimeError(f"Failed to read file: {e}")
 
+    async def read_files(
+        self, paths: List[str], missing_ok: bool = False
+    ) -> Dict[str, str]:
+        """Reads several files from the container in one round trip.
+
+        The files are packed by `tar` inside the container and the archive is
+        extracted as it streams back, instead of one `get_archive` call (and
+        archive) per file.
+
+        Args:
+            paths: File paths.
+            missing_ok: Leave missing files out of the result instead of raising.
+
+        Returns:
+            Mapping of each found path to its contents.
+
+        Raises:
+            FileNotFoundError: If a file does not exist and `missing_ok` is False.
+            RuntimeError: If read operation fails.
+        """
+        if not self.container:
+            raise RuntimeError("Sandbox not initialized")
+        if not paths:
+            return {}
+
+        try:
+            resolved = {path: self._safe_resolve_path(path) for path in paths}
+            base_dir = os.path.commonpath(
+                [os.path.dirname(p) for p in resolved.values()]
+            )
+            names = {path: os.path.relpath(p, base_dir) for path, p in resolved.items()}
+            archived = await asyncio.to_thread(
+                self._read_archive_from_exec, base_dir, sorted(set(names.values()))
+            )
+            contents = {
+                path: archived[name].decode("utf-8")
+                for path, name in names.items()
+                if name in archived
+            }
+        except Exception as e:
+            raise RuntimeError(f"Failed to read files: {e}")
+
+        missing = [path for path in paths if path not in contents]
+        if missing and not missing_ok:
+            raise FileNotFoundError(f"File not found: {', '.join(missing)}")
+        return contents
+
     async def write_file(self, path: str, content: str) -> None:
         """Writes content to a file in the container.
 
@@ -202,30 +353,55 @@ class DockerSandbox:
             path: Target path.
             content: File content.
 
+        Raises:
+            RuntimeError: If write operation fails.
+        """
+        await self.write_files({path: content})
+
+    async def write_files(self, files: Dict[str, str]) -> None:
+        """Writes several files to the container in one archive upload.
+
+        Missing parent directories are created with a single `mkdir`, then
+        all files are packed into one in-memory tar extracted by a single
+        `put_archive` call.
+
+        Args:
+            files: Mapping of target path to content.
+
         Raises:
             RuntimeError: If write operation fails.
         """
         if not self.container:
             raise RuntimeError("Sandbox not initialized")
+        if not files:
+            return
 
         try:
-            resolved_path = self._safe_resolve_path(path)
-            parent_dir = os.path.dirname(resolved_path)
-
-            # Create parent directory
-            if parent_dir:
-                await self.run_command(f"mkdir -p {parent_dir}")
-
-            # Prepare file data
-            tar_stream = await self._create_tar_stream(
-                os.path.basename(path), content.encode("utf-8")
+            resolved = {
+                self._safe_resolve_path(path): content.encode("utf-8")
+                for path, content in files.items()
+            }
+            parent_dirs = sorted({os.path.dirname(path) for path in resolved})
+
+            # Create parent directories
+            exit_code, output = await asyncio.to_thread(
+                self.container.exec_run, ["mkdir", "-p", *parent_dirs]
             )
-
-            # Write file
-            await asyncio.to_thread(
-                self.container.put_archive, parent_dir or "/", tar_stream
+            if exit_code != 0:
+                raise RuntimeError(output.decode("utf-8", errors="replace"))
+
+            # Prepare file data relative to the deepest common directory
+            base_dir = os.path.commonpath(parent_dirs)
+            tar_stream = self._create_tar_stream(
+                {
+                    os.path.relpath(path, base_dir): data
+                    for path, data in resolved.items()
+                }
             )
 
+            # Write files
+            await asyncio.to_thread(self.container.put_archive, base_dir, tar_stream)
+
         except Exception as e:
             raise RuntimeError(f"Failed to write file: {e}")
 
@@ -250,7 +426,7 @@ class DockerSandbox:
             if not os.path.isabs(path)
             else path
         )
-        return resolved
+        return os.path.normpath(resolved)
 
     async def copy_from(self, src_path: str, dst_path: str) -> None:
         """Copies a file from the container.
@@ -275,37 +451,8 @@ class DockerSandbox:
                 self.container.get_archive, resolved_src
             )
 
-            # Create temporary directory to extract file
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                # Write stream to temporary file
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with open(tar_path, "wb") as f:
-                    for chunk in stream:
-                        f.write(chunk)
-
-                # Extract file
-                with tarfile.open(tar_path) as tar:
-                    members = tar.getmembers()
-                    if not members:
-                        raise FileNotFoundError(f"Source file is empty: {src_path}")
-
-                    # If destination is a directory, we should preserve relative path structure
-                    if os.path.isdir(dst_path):
-                        tar.extractall(dst_path)
-                    else:
-                        # If destination is a file, we only extract the source file's content
-                        if len(members) > 1:
-                            raise RuntimeError(
-                                f"Source path is a directory but destination is a file: {src_path}"
-                            )
-
-                        with open(dst_path, "wb") as dst:
-                            src_file = tar.extractfile(members[0])
-                            if src_file is None:
-                                raise RuntimeError(
-                                    f"Failed to extract file: {src_path}"
-                                )
-                            dst.write(src_file.read())
+            # Extract while the archive streams in
+            await asyncio.to_thread(self._extract_archive, stream, src_path, dst_path)
 
         except docker.errors.NotFound:
             raise FileNotFoundError(f"Source file not found: {src_path}")
@@ -333,68 +480,191 @@ class DockerSandbox:
             if container_dir:
                 await self.run_command(f"mkdir -p {container_dir}")
 
-            # Create tar file to upload
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tar_path = os.path.join(tmp_dir, "temp.tar")
-                with tarfile.open(tar_path, "w") as tar:
-                    # Handle directory source path
-                    if os.path.isdir(src_path):
-                        os.path.basename(src_path.rstrip("/"))
-                        for root, _, files in os.walk(src_path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.join(
-                                    os.path.basename(dst_path),
-                                    os.path.relpath(file_path, src_path),
-                                )
-                                tar.add(file_path, arcname=arcname)
-                    else:
-                        # Add single file to tar
-                        tar.add(src_path, arcname=os.path.basename(dst_path))
-
-                # Read tar file content
-                with open(tar_path, "rb") as f:
-                    data = f.read()
-
-                # Upload to container
-                await asyncio.to_thread(
-                    self.container.put_archive,
-                    os.path.dirname(resolved_dst) or "/",
-                    data,
-                )
+            # Pack the source in memory
+            data = await asyncio.to_thread(
+                self._pack_local_path, src_path, os.path.basename(dst_path)
+            )
 
-                # Verify file was created successfully
-                try:
-                    await self.run_command(f"test -e {resolved_dst}")
-                except Exception:
-                    raise RuntimeError(f"Failed to verify file creation: {dst_path}")
+            # Upload to container
+            await asyncio.to_thread(
+                self.container.put_archive,
+                os.path.dirname(resolved_dst) or "/",
+                data,
+            )
+
+            # Verify file was created successfully
+            try:
+                await self.run_command(f"test -e {resolved_dst}")
+            except Exception:
+                raise RuntimeError(f"Failed to verify file creation: {dst_path}")
 
         except FileNotFoundError:
             raise
         except Exception as e:
             raise RuntimeError(f"Failed to copy file: {e}")
 
+    def _read_archive_from_exec(
+        self, base_dir: str, names: List[str]
+    ) -> Dict[str, bytes]:
+        """Runs `tar` in the container and reads the regular files it streams.
+
+        Args:
+            base_dir: Directory the names are relative to.
+            names: Paths to archive, relative to `base_dir`.
+
+        Returns:
+            Mapping of archived name to content; unreadable paths are absent.
+
+        Raises:
+            RuntimeError: If `tar` failed for another reason than missing paths.
+        """
+        api = self.client.api
+        exec_id = api.exec_create(
+            self.container.id,
+            ["tar", "-C", base_dir, "-chf", "-", "--", *names],
+            stdout=True,
+            stderr=True,
+        )["Id"]
+        stderr_chunks: List[bytes] = []
+
+        def stdout_chunks() -> Iterator[bytes]:
+            for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+                if stderr:
+                    stderr_chunks.append(stderr)
+                if stdout:
+                    yield stdout
+
+        chunks = stdout_chunks()
+        contents = {}
+        with _open_tar_stream(chunks) as tar:
+            for member in tar:
+                if member.isfile():
+                    contents[os.path.normpath(member.name)] = tar.extractfile(
+                        member
+                    ).read()
+        # tar stops at the end-of-archive marker; drain the rest of the stream
+        # (padding and stderr) so the process has finished before inspecting it
+        for _ in chunks:
+            pass
+
+        exit_code = self._wait_exec_exit(exec_id)
+        stderr = b"".join(stderr_chunks).decode("utf-8", errors="replace")
+        # tar exits 1 when a file changed while being read, and 2 on fatal
+        # errors, which missing paths also cause
+        if exit_code == 2 and self._only_missing_paths(stderr):
+            return contents
+        if exit_code not in (0, 1):
+            raise RuntimeError(f"tar exited with code {exit_code}: {stderr.strip()}")
+        return contents
+
+    def _wait_exec_exit(self, exec_id: str, timeout: float = 10.0) -> int:
+        """Polls an exec instance until it stops running and returns its exit code.
+
+        Raises:
+            RuntimeError: If it is still running after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            info = self.client.api.exec_inspect(exec_id)
+            if not info["Running"] and info["ExitCode"] is not None:
+                return info["ExitCode"]
+            if time.monotonic() > deadline:
+                raise RuntimeError("tar did not exit after its output ended")
+            time.sleep(0.05)
+
     @staticmethod
-    async def _create_tar_stream(name: str, content: bytes) -> io.BytesIO:
+    def _only_missing_paths(stderr: str) -> bool:
+        """Whether every error `tar` reported is a missing path."""
+        errors = [
+            line
+            for line in stderr.splitlines()
+            if line.strip() and "Exiting with failure status" not in line
+        ]
+        return bool(errors) and all(
+            "No such file or directory" in line for line in errors
+        )
+
+    @staticmethod
+    def _extract_archive(stream: Iterable[bytes], src_path: str, dst_path: str) -> None:
+        """Extracts a `get_archive` stream to a host path as it arrives.
+
+        Args:
+            stream: Archive chunks.
+            src_path: Source path (container), for error messages.
+            dst_path: Destination path (host).
+
+        Raises:
+            FileNotFoundError: If the archive is empty.
+            RuntimeError: If a directory would be extracted onto a file.
+        """
+        with _open_tar_stream(stream) as tar:
+            # If destination is a directory, we should preserve relative path structure
+            if os.path.isdir(dst_path):
+                tar.extractall(dst_path)
+                return
+
+            member = tar.next()
+            if member is None:
+                raise FileNotFoundError(f"Source file is empty: {src_path}")
+            if not member.isfile():
+                raise RuntimeError(
+                    f"Source path is a directory but destination is a file: {src_path}"
+                )
+
+            src_file = tar.extractfile(member)
+            with open(dst_path, "wb") as dst:
+                shutil.copyfileobj(src_file, dst)
+
+    @staticmethod
+    def _pack_local_path(src_path: str, arcname: str) -> bytes:
+        """Packs a host file or directory into an in-memory tar archive.
+
+        Args:
+            src_path: Source path (host).
+            arcname: Name of the source in the archive.
+
+        Returns:
+            Tar archive bytes.
+        """
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            # Handle directory source path
+            if os.path.isdir(src_path):
+                for root, _, files in os.walk(src_path):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        tar.add(
+                            file_path,
+                            arcname=os.path.join(
+                                arcname, os.path.relpath(file_path, src_path)
+                            ),
+                        )
+            else:
+                # Add single file to tar
+                tar.add(src_path, arcname=arcname)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _create_tar_stream(files: Dict[str, bytes]) -> io.BytesIO:
         """Creates a tar file stream.
 
         Args:
-            name: Filename.
-            content: File content.
+            files: Mapping of member name to content.
 
         Returns:
             Tar file stream.
         """
         tar_stream = io.BytesIO()
         with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            tarinfo = tarfile.TarInfo(name=name)
-            tarinfo.size = len(content)
-            tar.addfile(tarinfo, io.BytesIO(content))
+            for name, content in files.items():
+                tarinfo = tarfile.TarInfo(name=name)
+                tarinfo.size = len(content)
+                tar.addfile(tarinfo, io.BytesIO(content))
         tar_stream.seek(0)
         return tar_stream
 
     @staticmethod
-    async def _read_from_tar(tar_stream) -> bytes:
+    def _read_from_tar(tar_stream: Iterable[bytes]) -> bytes:
         """Reads file content from a tar stream.
 
         Args:
@@ -406,21 +676,16 @@ class DockerSandbox:
         Raises:
             RuntimeError: If read operation fails.
         """
-        with tempfile.NamedTemporaryFile() as tmp:
-            for chunk in tar_stream:
-                tmp.write(chunk)
-            tmp.seek(0)
-
-            with tarfile.open(fileobj=tmp) as tar:
-                member = tar.next()
-                if not member:
-                    raise RuntimeError("Empty tar archive")
+        with _open_tar_stream(tar_stream) as tar:
+            member = tar.next()
+            if not member:
+                raise RuntimeError("Empty tar archive")
 
-                file_content = tar.extractfile(member)
-                if not file_content:
-                    raise RuntimeError("Failed to extract file content")
+            file_content = tar.extractfile(member)
+            if not file_content:
+                raise RuntimeError("Failed to extract file content")
 
-                return file_content.read()
+            return file_content.read()
 
     async def cleanup(self) -> None:
         """Cleans up sandbox resources."""
@@ -446,6 +711,7 @@ class DockerSandbox:
                     errors.append(f"Container remove error: {e}")
                 finally:
                     self.container = None
+                    self._workspace_snapshot = None
 
         except Exception as e:
             errors.append(f"General cleanup error: {e}")
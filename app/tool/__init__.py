@@ -1,6 +1,7 @@
 from app.tool.base import BaseTool
 from app.tool.bash import Bash
 from app.tool.browser_use_tool import BrowserUseTool
+from app.tool.code_search import CodeSearch
 from app.tool.crawl4ai import Crawl4aiTool
 from app.tool.create_chat_completion import CreateChatCompletion
 from app.tool.planning import PlanningTool
@@ -14,6 +15,7 @@ __all__ = [
     "BaseTool",
     "Bash",
     "BrowserUseTool",
+    "CodeSearch",
     "Terminate",
     "StrReplaceEditor",
     "WebSearch",
@@ -1,18 +1,89 @@
 import asyncio
 import os
-from typing import Optional
+import re
+import shutil
+import signal
+import tempfile
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, CLIResult
 
 
 _BASH_DESCRIPTION = """Execute a bash command in the terminal.
-* Long running commands: For commands that may run indefinitely, it should be run in the background and the output should be redirected to a file, e.g. command = `python3 app.py > server.log 2>&1 &`.
-* Interactive: If a bash command returns exit code `-1`, this means the process is not yet finished. The assistant must then send a second call to terminal with an empty `command` (which will retrieve any additional logs), or it can send additional text (set `command` to the text) to STDIN of the running process, or it can send command=`ctrl+c` to interrupt the process.
-* Timeout: If a command execution result says "Command timed out. Sending SIGINT to the process", the assistant should retry running the command in the background.
+* Sessions: Commands run in the named `session` (default `default`). Each session is a separate shell with its own working directory and environment, and different sessions run concurrently.
+* Long running commands: For servers, watchers and long builds, use action `background`. It returns a `job_id`; use action `logs` with the job_id (and the `offset` returned by the previous call) to read new output, `wait` to wait for the job with a timeout, `kill` to stop it, and `jobs` to list jobs.
+* Non-interactive: Commands cannot read from STDIN interactively; pass input through pipes, here-documents or non-interactive flags (e.g. `-y`).
+* Timeout: If a command times out, its session must be restarted (set `restart` to true) before it can be used again; run commands that may take long with action `background` instead.
 """
 
 
+class _OutputBuffer:
+    """Accumulates command output with bounded memory.
+
+    Output up to `max_bytes` is kept in memory. Beyond that, the full output
+    is spilled to a file in `spill_dir` and only its head and tail are
+    retained, with a marker pointing at the file.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: str):
+        self._max_bytes = max_bytes
+        self._spill_dir = spill_dir
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._head = b""
+        self._tail: Deque[bytes] = deque()
+        self._tail_size = 0
+        self._spill = None
+
+    def append(self, data: bytes) -> None:
+        if not data:
+            return
+        self._size += len(data)
+        if self._spill is None:
+            self._chunks.append(data)
+            if self._size > self._max_bytes:
+                self._start_spill()
+            return
+
+        self._spill.write(data)
+        self._tail.append(data)
+        self._tail_size += len(data)
+        while self._tail and self._tail_size - len(self._tail[0]) >= (
+            self._max_bytes // 2
+        ):
+            self._tail_size -= len(self._tail.popleft())
+
+    def _start_spill(self) -> None:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self._spill = tempfile.NamedTemporaryFile(
+            dir=self._spill_dir, prefix="bash-output-", suffix=".log", delete=False
+        )
+        self._spill.write(data)
+        self._head = data[: self._max_bytes // 2]
+        self._tail = deque([data[-(self._max_bytes // 2) :]])
+        self._tail_size = len(self._tail[0])
+
+    def getvalue(self) -> str:
+        if self._spill is None:
+            return b"".join(self._chunks).decode(errors="replace")
+
+        self._spill.close()
+        tail = b"".join(self._tail)[-(self._max_bytes // 2) :]
+        omitted = self._size - len(self._head) - len(tail)
+        marker = (
+            f"\n... [{omitted} bytes omitted; full output ({self._size} bytes) "
+            f"saved to {self._spill.name}] ...\n"
+        )
+        return (
+            self._head.decode(errors="replace") + marker + tail.decode(errors="replace")
+        )
+
+
 class _BashSession:
     """A session of a bash shell."""
 
@@ -20,37 +91,65 @@ class _BashSession:
     _process: asyncio.subprocess.Process
 
     command: str = "/bin/bash"
-    _output_delay: float = 0.2  # seconds
     _timeout: float = 120.0  # seconds
-    _sentinel: str = "<<exit>>"
+    _read_size: int = 64 * 1024  # bytes per stream read
+    _max_output_bytes: int = 256 * 1024  # retained per stream before spilling
 
     def __init__(self):
         self._started = False
         self._timed_out = False
+        self.last_exit_code: Optional[int] = None
+        # Spilled command output lives as long as the session
+        self._spill_dir: Optional[str] = None
+
+        # A per-session token keeps command output from faking the sentinel
+        self._sentinel = f"<<exit-{uuid.uuid4().hex}>>"
+        self._sentinel_pattern = re.compile(
+            re.escape(self._sentinel.encode()) + rb"(-?\d*)\n"
+        )
+        # Bytes held back from the output in case they start a sentinel
+        self._holdback = len(self._sentinel) + 16
 
     async def start(self):
         if self._started:
             return
 
-        self._process = await asyncio.create_subprocess_shell(
+        # exec bash directly so that its pid (and cwd) is the shell's own
+        self._process = await asyncio.create_subprocess_exec(
             self.command,
             preexec_fn=os.setsid,
-            shell=True,
             bufsize=0,
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
+        self._spill_dir = tempfile.mkdtemp(prefix="bash-output-")
 
         self._started = True
 
-    def stop(self):
-        """Terminate the bash shell."""
+    @property
+    def cwd(self) -> Optional[str]:
+        """Current working directory of the shell, if it can be determined."""
+        try:
+            return os.readlink(f"/proc/{self._process.pid}/cwd")
+        except (OSError, AttributeError):
+            return None
+
+    async def stop(self, grace: float = 2.0):
+        """Terminate the bash shell, wait for it to exit and remove its output files."""
         if not self._started:
             raise ToolError("Session has not started.")
-        if self._process.returncode is not None:
-            return
-        self._process.terminate()
+        try:
+            if self._process.returncode is not None:
+                return
+            self._process.terminate()
+            try:
+                await asyncio.wait_for(self._process.wait(), grace)
+            except asyncio.TimeoutError:
+                self._process.kill()
+                await self._process.wait()
+        finally:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
 
     async def run(self, command: str):
         """Execute a command in the bash shell."""
@@ -71,50 +170,277 @@ class _BashSession:
         assert self._process.stdout
         assert self._process.stderr
 
-        # send command to the process
+        # send command to the process, followed by a sentinel carrying its
+        # exit code on stdout and a bare sentinel on stderr
         self._process.stdin.write(
-            command.encode() + f"; echo '{self._sentinel}'\n".encode()
+            command.encode() + f"\nprintf '\\n{self._sentinel}%d\\n' $?"
+            f"; printf '\\n{self._sentinel}\\n' >&2\n".encode()
         )
         await self._process.stdin.drain()
 
-        # read output from the process, until the sentinel is found
+        # read both streams until their sentinels arrive
         try:
             async with asyncio.timeout(self._timeout):
-                while True:
-                    await asyncio.sleep(self._output_delay)
-                    # if we read directly from stdout/stderr, it will wait forever for
-                    # EOF. use the StreamReader buffer directly instead.
-                    output = (
-                        self._process.stdout._buffer.decode()
-                    )  # pyright: ignore[reportAttributeAccessIssue]
-                    if self._sentinel in output:
-                        # strip the sentinel and break
-                        output = output[: output.index(self._sentinel)]
-                        break
+                (output, exit_code), (error, _) = await asyncio.gather(
+                    self._read_until_sentinel(self._process.stdout),
+                    self._read_until_sentinel(self._process.stderr),
+                )
         except asyncio.TimeoutError:
             self._timed_out = True
             raise ToolError(
                 f"timed out: bash has not returned in {self._timeout} seconds and must be restarted",
             ) from None
+        except EOFError:
+            return CLIResult(
+                system="tool must be restarted",
+                error=f"bash has exited with returncode {self._process.returncode}",
+            )
 
         if output.endswith("\n"):
             output = output[:-1]
-
-        error = (
-            self._process.stderr._buffer.decode()
-        )  # pyright: ignore[reportAttributeAccessIssue]
         if error.endswith("\n"):
             error = error[:-1]
 
-        # clear the buffers so that the next output can be read correctly
-        self._process.stdout._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
-        self._process.stderr._buffer.clear()  # pyright: ignore[reportAttributeAccessIssue]
+        self.last_exit_code = exit_code
+        return CLIResult(
+            output=output,
+            error=error,
+            system=f"exit code: {exit_code}" if exit_code else None,
+        )
+
+    async def _read_until_sentinel(
+        self, stream: asyncio.StreamReader
+    ) -> Tuple[str, Optional[int]]:
+        """Reads a stream chunk by chunk until the sentinel line.
+
+        The sentinel is searched only in the newly read chunk plus a short
+        held-back suffix of earlier data, so detection works across chunk
+        boundaries while each byte is scanned a bounded number of times.
+
+        Returns:
+            Tuple of (output before the sentinel, exit code if reported).
+
+        Raises:
+            EOFError: If the stream closes before the sentinel arrives.
+        """
+        buffer = _OutputBuffer(self._max_output_bytes, self._spill_dir)
+        pending = b""
+        while True:
+            chunk = await stream.read(self._read_size)
+            if not chunk:
+                raise EOFError("bash exited before the command finished")
+
+            window = pending + chunk
+            match = self._sentinel_pattern.search(window)
+            if match:
+                # the sentinel is preceded by a newline added by printf
+                end = match.start()
+                if window[end - 1 : end] == b"\n":
+                    end -= 1
+                buffer.append(window[:end])
+                code = match.group(1)
+                return buffer.getvalue(), int(code) if code else None
+
+            buffer.append(window[: -self._holdback])
+            pending = window[-self._holdback :]
+
+
+class _BashJob:
+    """A background command whose output is written to a log file."""
+
+    def __init__(self, job_id: str, command: str, session: str, log_path: str):
+        self.job_id = job_id
+        self.command = command
+        self.session = session
+        self.log_path = log_path
+        self.started_at = time.time()
+        self.process: Optional[asyncio.subprocess.Process] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def describe(self) -> str:
+        status = (
+            "running" if self.running else f"exited with code {self.process.returncode}"
+        )
+        return (
+            f"[{self.job_id}] pid {self.pid} ({self.session}) {status}: {self.command}"
+        )
+
+
+class _BashSessionManager:
+    """Named bash sessions and background jobs under a shared process cap.
+
+    Commands in different sessions run concurrently; commands in the same
+    session are serialized. Background jobs are started in their own process
+    group, in the working directory of the session that launched them, and
+    write combined stdout/stderr to a log file that can be tailed by offset.
+    Managers stay alive until closed, normally by `close_bash_sessions` when
+    the process shuts down.
+
+    Attributes:
+        max_processes: Maximum number of live sessions plus running jobs.
+    """
+
+    def __init__(self, max_processes: int = 8):
+        self.max_processes = max_processes
+        self._sessions: Dict[str, _BashSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._jobs: Dict[str, _BashJob] = {}
+        self._log_dir = tempfile.mkdtemp(prefix="bash-jobs-")
+        _LIVE_MANAGERS.add(self)
+
+    def _process_count(self) -> int:
+        live_sessions = sum(
+            1
+            for session in self._sessions.values()
+            if session._process.returncode is None
+        )
+        return live_sessions + sum(1 for job in self._jobs.values() if job.running)
+
+    def _check_capacity(self) -> None:
+        if self._process_count() >= self.max_processes:
+            raise ToolError(
+                f"Process limit reached ({self.max_processes} sessions and running "
+                "jobs). Kill a background job or restart a session first."
+            )
+
+    async def _get_session(self, name: str) -> _BashSession:
+        session = self._sessions.get(name)
+        if session is None:
+            self._check_capacity()
+            session = _BashSession()
+            await session.start()
+            self._sessions[name] = session
+            self._locks[name] = asyncio.Lock()
+        return session
+
+    async def run(self, name: str, command: str) -> CLIResult:
+        """Runs a command in a named session, starting it if needed."""
+        session = await self._get_session(name)
+        async with self._locks[name]:
+            return await session.run(command)
+
+    async def restart(self, name: str) -> None:
+        """Replaces a session with a fresh shell."""
+        session = self._sessions.pop(name, None)
+        if session:
+            await session.stop()
+        await self._get_session(name)
+
+    async def start_job(self, name: str, command: str) -> _BashJob:
+        """Starts a background job from a session's working directory."""
+        self._check_capacity()
+        session = self._sessions.get(name)
+        cwd = session.cwd if session else None
+
+        job_id = uuid.uuid4().hex[:8]
+        job = _BashJob(
+            job_id, command, name, os.path.join(self._log_dir, f"{job_id}.log")
+        )
+        with open(job.log_path, "wb") as log_file:
+            job.process = await asyncio.create_subprocess_shell(
+                command,
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=True,
+            )
+        self._jobs[job_id] = job
+        return job
+
+    def get_job(self, job_id: Optional[str]) -> _BashJob:
+        job = self._jobs.get(job_id or "")
+        if job is None:
+            raise ToolError(f"Unknown job_id: {job_id}")
+        return job
+
+    def read_log(
+        self, job_id: str, offset: int = 0, max_bytes: int = 64 * 1024
+    ) -> Tuple[str, int]:
+        """Reads a job's log starting at a byte offset.
+
+        Returns:
+            Tuple of (new output, offset to pass on the next call).
+        """
+        job = self.get_job(job_id)
+        with open(job.log_path, "rb") as f:
+            f.seek(max(offset, 0))
+            data = f.read(max_bytes)
+        return data.decode(errors="replace"), max(offset, 0) + len(data)
+
+    async def wait_job(self, job_id: str, timeout: float) -> Optional[int]:
+        """Waits for a job to exit.
+
+        Returns:
+            The job's exit code, or None if it is still running after the timeout.
+        """
+        job = self.get_job(job_id)
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.process.wait()), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def kill_job(self, job_id: str, grace: float = 3.0) -> Optional[int]:
+        """Stops a job's process group, escalating from SIGTERM to SIGKILL."""
+        job = self.get_job(job_id)
+        if not job.running:
+            return job.process.returncode
+        for sig, wait in ((signal.SIGTERM, grace), (signal.SIGKILL, grace)):
+            try:
+                os.killpg(job.pid, sig)
+            except ProcessLookupError:
+                break
+            try:
+                return await asyncio.wait_for(job.process.wait(), wait)
+            except asyncio.TimeoutError:
+                continue
+        return job.process.returncode
+
+    def list_jobs(self) -> List[_BashJob]:
+        return list(self._jobs.values())
+
+    async def close(self) -> None:
+        """Stops all sessions, kills all running jobs and removes their logs."""
+        for job in self._jobs.values():
+            if job.running:
+                await self.kill_job(job.job_id, grace=1.0)
+        for session in self._sessions.values():
+            await session.stop()
+        self._sessions.clear()
+        self._locks.clear()
+        self._jobs.clear()
+        shutil.rmtree(self._log_dir, ignore_errors=True)
+        _LIVE_MANAGERS.discard(self)
+
+
+# Managers that have not been closed yet
+_LIVE_MANAGERS: Set[_BashSessionManager] = set()
+
 
-        return CLIResult(output=output, error=error)
+async def close_bash_sessions() -> None:
+    """Stops the shell sessions and background jobs of every bash tool.
+
+    Sessions and jobs outlive a single agent run (agents clean up their tools
+    after every run), so entry points call this when the process shuts down.
+    """
+    for manager in list(_LIVE_MANAGERS):
+        await manager.close()
 
 
 class Bash(BaseTool):
-    """A tool for executing bash commands"""
+    """A tool for executing bash commands.
+
+    Sessions and background jobs are kept across agent runs, so a job
+    started in one step can be checked in a later one; they are stopped by
+    `close_bash_sessions`.
+    """
 
     name: str = "bash"
     description: str = _BASH_DESCRIPTION
@@ -123,31 +449,94 @@ class Bash(BaseTool):
         "properties": {
             "command": {
                 "type": "string",
-                "description": "The bash command to execute. Can be empty to view additional logs when previous exit code is `-1`. Can be `ctrl+c` to interrupt the currently running process.",
+                "description": "The bash command to execute, or for action `background` the command to start as a job.",
+            },
+            "action": {
+                "type": "string",
+                "enum": ["run", "background", "logs", "wait", "kill", "jobs"],
+                "description": "`run` (default) runs the command in the session; `background` starts it as a job; `logs`, `wait` and `kill` act on `job_id`; `jobs` lists jobs.",
+            },
+            "session": {
+                "type": "string",
+                "description": "Name of the shell session. Defaults to `default`.",
+            },
+            "restart": {
+                "type": "boolean",
+                "description": "Replace the session's shell with a fresh one, e.g. after a timeout.",
+            },
+            "job_id": {
+                "type": "string",
+                "description": "Background job id for the `logs`, `wait` and `kill` actions.",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Byte offset to read job logs from, as returned by the previous `logs` call.",
+            },
+            "timeout": {
+                "type": "number",
+                "description": "Seconds to wait for the job in the `wait` action.",
             },
         },
-        "required": ["command"],
+        "required": [],
     }
 
-    _session: Optional[_BashSession] = None
+    _manager: Optional[_BashSessionManager] = None
 
     async def execute(
-        self, command: str | None = None, restart: bool = False, **kwargs
+        self,
+        command: str | None = None,
+        restart: bool = False,
+        action: str = "run",
+        session: str = "default",
+        job_id: str | None = None,
+        offset: int = 0,
+        timeout: float = 30,
+        **kwargs,
     ) -> CLIResult:
-        if restart:
-            if self._session:
-                self._session.stop()
-            self._session = _BashSession()
-            await self._session.start()
+        if self._manager not in _LIVE_MANAGERS:
+            self._manager = _BashSessionManager()
+        manager = self._manager
 
+        if restart:
+            await manager.restart(session)
             return CLIResult(system="tool has been restarted.")
 
-        if self._session is None:
-            self._session = _BashSession()
-            await self._session.start()
+        if action == "background":
+            if not command:
+                raise ToolError("no command provided.")
+            job = await manager.start_job(session, command)
+            return CLIResult(
+                output=f"Started background job {job.job_id} (pid {job.pid})."
+            )
+
+        if action == "logs":
+            output, next_offset = manager.read_log(job_id, offset)
+            job = manager.get_job(job_id)
+            return CLIResult(
+                output=f"{output}\n[{job.describe()}; next offset: {next_offset}]"
+            )
+
+        if action == "wait":
+            exit_code = await manager.wait_job(job_id, timeout)
+            if exit_code is None:
+                return CLIResult(
+                    output=f"Job {job_id} is still running after {timeout} seconds."
+                )
+            return CLIResult(output=f"Job {job_id} exited with code {exit_code}.")
+
+        if action == "kill":
+            exit_code = await manager.kill_job(job_id)
+            return CLIResult(output=f"Job {job_id} stopped (exit code {exit_code}).")
+
+        if action == "jobs":
+            jobs = manager.list_jobs()
+            return CLIResult(
+                output="\n".join(job.describe() for job in jobs)
+                or "No background jobs."
+            )
 
         if command is not None:
-            return await self._session.run(command)
+            return await manager.run(session, command)
 
         raise ToolError("no command provided.")
 
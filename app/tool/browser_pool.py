@@ -0,0 +1,372 @@
+"""Process-wide pool of browsers that lease isolated contexts to agents."""
+
+import asyncio
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Set
+
+from browser_use import Browser as BrowserUseBrowser
+from browser_use import BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+from app.config import config
+from app.logger import logger
+
+
+def _browser_config() -> BrowserConfig:
+    browser_config_kwargs = {"headless": False, "disable_security": True}
+
+    if config.browser_config:
+        from browser_use.browser.browser import ProxySettings
+
+        # handle proxy settings.
+        if config.browser_config.proxy and config.browser_config.proxy.server:
+            browser_config_kwargs["proxy"] = ProxySettings(
+                server=config.browser_config.proxy.server,
+                username=config.browser_config.proxy.username,
+                password=config.browser_config.proxy.password,
+            )
+
+        browser_attrs = [
+            "headless",
+            "disable_security",
+            "extra_chromium_args",
+            "chrome_instance_path",
+            "wss_url",
+            "cdp_url",
+        ]
+
+        for attr in browser_attrs:
+            value = getattr(config.browser_config, attr, None)
+            if value is not None:
+                if not isinstance(value, list) or value:
+                    browser_config_kwargs[attr] = value
+
+    return BrowserConfig(**browser_config_kwargs)
+
+
+def _context_config() -> BrowserContextConfig:
+    # if there is context config in the config, use it.
+    if (
+        config.browser_config
+        and hasattr(config.browser_config, "new_context_config")
+        and config.browser_config.new_context_config
+    ):
+        return config.browser_config.new_context_config
+    return BrowserContextConfig()
+
+
+class _PooledBrowser:
+    __slots__ = ("browser", "launch_lock", "leased", "warming", "warm", "last_used")
+
+    def __init__(self, browser: BrowserUseBrowser):
+        self.browser = browser
+        self.launch_lock = asyncio.Lock()
+        self.leased = 0
+        self.warming = 0
+        self.warm: List[BrowserContext] = []
+        self.last_used = time.monotonic()
+
+    @property
+    def load(self) -> int:
+        return self.leased + self.warming + len(self.warm)
+
+    @property
+    def is_alive(self) -> bool:
+        playwright_browser = self.browser.playwright_browser
+        # Not launched yet counts as alive
+        return playwright_browser is None or playwright_browser.is_connected()
+
+
+class BrowserPool:
+    """Shares a few browser processes between agents as isolated contexts.
+
+    Each `acquire` leases a fresh browser context (separate cookies, storage
+    and tabs) on the least loaded browser, launching another browser while
+    fewer than `max_browsers` run and all are full, and waiting for a
+    release otherwise. Up to `warm_contexts` contexts are created ahead of
+    time so a lease does not pay for the browser launch; `prewarm` starts
+    this in the background before the first browser step.
+
+    Browsers that crashed or disconnected are dropped and replaced on the
+    next lease, and browsers without leases are closed after `idle_timeout`
+    seconds. The pool is bound to the event loop it was first used on and
+    starts over when used from another one, closing the previous loop's
+    browsers on that loop if it still runs, or killing their Playwright
+    driver (and with it the browser) otherwise.
+
+    Attributes:
+        max_browsers: Maximum browser processes.
+        max_contexts_per_browser: Maximum contexts (leased or warm) per browser.
+        warm_contexts: Contexts kept ready for the next leases.
+        idle_timeout: Seconds after which a browser without leases is closed.
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = 2,
+        max_contexts_per_browser: int = 8,
+        warm_contexts: int = 1,
+        idle_timeout: float = 300.0,
+    ):
+        self.max_browsers = max_browsers
+        self.max_contexts_per_browser = max_contexts_per_browser
+        self.warm_contexts = warm_contexts
+        self.idle_timeout = idle_timeout
+
+        self._browser_config: Optional[BrowserConfig] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._leases: Dict[int, _PooledBrowser] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._refill_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Browsers driven from a previous loop cannot be used from this one
+            self._discard_browsers(self._loop, self._browsers)
+            self._browsers, self._leases = [], {}
+            self._loop, self._condition = loop, asyncio.Condition()
+            self._refill_task = self._reaper_task = None
+            self._closing = set()
+
+    def _discard_browsers(
+        self, loop: Optional[asyncio.AbstractEventLoop], browsers: List[_PooledBrowser]
+    ) -> None:
+        """Closes browsers that belong to another event loop."""
+        if not browsers:
+            return
+        if loop is not None and loop.is_running():
+            for entry in browsers:
+                asyncio.run_coroutine_threadsafe(self._close_browser(entry), loop)
+            return
+        for entry in browsers:
+            _kill_driver(entry)
+
+    def _close_in_background(self, entry: _PooledBrowser) -> None:
+        task = asyncio.create_task(self._close_browser(entry))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _max_browsers(self) -> int:
+        settings = config.browser_config
+        # An attached or user-provided browser is a single process
+        if settings and (
+            settings.cdp_url or settings.wss_url or settings.chrome_instance_path
+        ):
+            return 1
+        return max(1, self.max_browsers)
+
+    def _drop_dead(self) -> None:
+        for entry in [entry for entry in self._browsers if not entry.is_alive]:
+            logger.warning("Pooled browser disconnected; replacing it")
+            self._browsers.remove(entry)
+            self._close_in_background(entry)
+
+    def _pick(self) -> Optional[_PooledBrowser]:
+        """Least loaded browser with room for a context, adding one if allowed."""
+        candidates = [
+            entry
+            for entry in self._browsers
+            if entry.load < self.max_contexts_per_browser
+        ]
+        if candidates:
+            return min(candidates, key=lambda entry: entry.load)
+        if len(self._browsers) < self._max_browsers():
+            if self._browser_config is None:
+                self._browser_config = _browser_config()
+            entry = _PooledBrowser(BrowserUseBrowser(self._browser_config))
+            self._browsers.append(entry)
+            self._start_reaper()
+            return entry
+        return None
+
+    async def _new_context(self, entry: _PooledBrowser) -> BrowserContext:
+        async with entry.launch_lock:
+            await entry.browser.get_playwright_browser()
+        context = await entry.browser.new_context(_context_config())
+        await context.get_session()
+        return context
+
+    async def acquire(self) -> BrowserContext:
+        """Leases an isolated browser context; release it with `release`."""
+        self._bind_loop()
+        async with self._condition:
+            while True:
+                self._drop_dead()
+                warm = [entry for entry in self._browsers if entry.warm]
+                if warm:
+                    entry = max(warm, key=lambda entry: len(entry.warm))
+                    context = entry.warm.pop()
+                    break
+                entry = self._pick()
+                if entry is not None:
+                    context = None
+                    break
+                await self._condition.wait()
+            entry.leased += 1
+            entry.last_used = time.monotonic()
+
+        try:
+            if context is None:
+                context = await self._new_context(entry)
+        except BaseException:
+            async with self._condition:
+                entry.leased -= 1
+                self._condition.notify()
+            raise
+
+        self._leases[id(context)] = entry
+        self._start_refill()
+        return context
+
+    async def release(self, context: BrowserContext) -> None:
+        """Closes a leased context and returns its slot to the pool."""
+        entry = self._leases.pop(id(context), None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Failed to close browser context: {e}")
+        if entry is None or asyncio.get_running_loop() is not self._loop:
+            return
+        async with self._condition:
+            entry.leased -= 1
+            entry.last_used = time.monotonic()
+            self._condition.notify()
+
+    def is_alive(self, context: BrowserContext) -> bool:
+        """Whether a leased context's browser is still connected."""
+        entry = self._leases.get(id(context))
+        return entry is not None and entry in self._browsers and entry.is_alive
+
+    def prewarm(self) -> None:
+        """Starts launching a browser and warm contexts in the background."""
+        if self.warm_contexts <= 0:
+            return
+        self._bind_loop()
+        self._start_refill()
+
+    def _start_refill(self) -> None:
+        if self.warm_contexts > 0 and (
+            self._refill_task is None or self._refill_task.done()
+        ):
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        while True:
+            async with self._condition:
+                self._drop_dead()
+                ready = sum(len(entry.warm) + entry.warming for entry in self._browsers)
+                if ready >= self.warm_contexts:
+                    return
+                entry = self._pick()
+                if entry is None:
+                    return
+                entry.warming += 1
+
+            try:
+                context = await self._new_context(entry)
+            except Exception as e:
+                logger.warning(f"Failed to pre-create browser context: {e}")
+                async with self._condition:
+                    entry.warming -= 1
+                    self._condition.notify()
+                return
+
+            async with self._condition:
+                entry.warming -= 1
+                entry.warm.append(context)
+                self._condition.notify()
+
+    def _start_reaper(self) -> None:
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        while self._browsers:
+            await asyncio.sleep(min(self.idle_timeout, 30))
+            now = time.monotonic()
+            async with self._condition:
+                idle = [
+                    entry
+                    for entry in self._browsers
+                    if not entry.leased
+                    and not entry.warming
+                    and now - entry.last_used >= self.idle_timeout
+                ]
+                for entry in idle:
+                    self._browsers.remove(entry)
+            for entry in idle:
+                logger.info("Closing idle pooled browser")
+                await self._close_browser(entry)
+
+    @staticmethod
+    async def _close_browser(entry: _PooledBrowser) -> None:
+        warm, entry.warm = entry.warm, []
+        for context in warm:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser context: {e}")
+        try:
+            await entry.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+    async def close(self) -> None:
+        """Closes every browser; leased contexts become unusable."""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        for task in (self._refill_task, self._reaper_task):
+            if task:
+                task.cancel()
+        async with self._condition:
+            browsers, self._browsers = self._browsers, []
+            self._leases.clear()
+            self._condition.notify_all()
+        for entry in browsers:
+            await self._close_browser(entry)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+def _kill_driver(entry: _PooledBrowser) -> None:
+    """Kills the Playwright driver of a browser whose event loop has stopped.
+
+    Its objects can no longer be awaited, but the launched browser exits once
+    the driver that holds its pipe is gone.
+    """
+    playwright = getattr(entry.browser, "playwright", None)
+    connection = getattr(getattr(playwright, "_impl_obj", None), "_connection", None)
+    process = getattr(getattr(connection, "_transport", None), "_proc", None)
+    if process is None or process.returncode is not None:
+        return
+    try:
+        os.kill(process.pid, signal.SIGTERM)
+    except OSError as e:
+        logger.debug(f"Failed to stop Playwright driver {process.pid}: {e}")
+
+
+_BROWSER_POOL: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Returns the process-wide browser pool."""
+    global _BROWSER_POOL
+    if _BROWSER_POOL is None:
+        settings = config.browser_config
+        _BROWSER_POOL = (
+            BrowserPool(
+                max_browsers=settings.pool_max_browsers,
+                max_contexts_per_browser=settings.pool_max_contexts_per_browser,
+                warm_contexts=settings.pool_warm_contexts,
+                idle_timeout=settings.pool_idle_timeout,
+            )
+            if settings
+            else BrowserPool()
+        )
+    return _BROWSER_POOL
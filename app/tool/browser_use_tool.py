@@ -1,18 +1,21 @@
 import asyncio
-import base64
 import json
 from typing import Generic, Optional, TypeVar
 
 from browser_use import Browser as BrowserUseBrowser
-from browser_use import BrowserConfig
-from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.context import BrowserContext
 from browser_use.dom.service import DomService
 from pydantic import Field, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
 from app.llm import LLM
+from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.browser_pool import get_browser_pool
+from app.tool.dom_diff import DomDiffTracker
+from app.tool.html_extract import extract_main_content_async
+from app.tool.screenshot import ScreenshotPolicy
 from app.tool.web_search import WebSearch
 
 
@@ -31,6 +34,7 @@ Key capabilities include:
 * Tab management: Switch between tabs, open new tabs, or close tabs
 
 Note: When using element indices, refer to the numbered elements shown in the current browser state.
+Between steps on the same page only changes to the elements are shown; use 'list_elements' to see the full list again.
 """
 
 Context = TypeVar("Context")
@@ -61,6 +65,7 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                     "switch_tab",
                     "open_tab",
                     "close_tab",
+                    "list_elements",
                 ],
                 "description": "The browser action to perform",
             },
@@ -118,6 +123,7 @@ class BrowserUseTool(BaseTool, Generic[Context]):
             "web_search": ["query"],
             "wait": ["seconds"],
             "extract_content": ["goal"],
+            "list_elements": [],
         },
     }
 
@@ -126,6 +132,10 @@ class BrowserUseTool(BaseTool, Generic[Context]):
     context: Optional[BrowserContext] = Field(default=None, exclude=True)
     dom_service: Optional[DomService] = Field(default=None, exclude=True)
     web_search_tool: WebSearch = Field(default_factory=WebSearch, exclude=True)
+    screenshot_policy: ScreenshotPolicy = Field(
+        default_factory=ScreenshotPolicy.from_config, exclude=True
+    )
+    dom_diff: DomDiffTracker = Field(default_factory=DomDiffTracker, exclude=True)
 
     # Context for generic functionality
     tool_context: Optional[Context] = Field(default=None, exclude=True)
@@ -139,50 +149,19 @@ class BrowserUseTool(BaseTool, Generic[Context]):
         return v
 
     async def _ensure_browser_initialized(self) -> BrowserContext:
-        """Ensure browser and context are initialized."""
-        if self.browser is None:
-            browser_config_kwargs = {"headless": False, "disable_security": True}
-
-            if config.browser_config:
-                from browser_use.browser.browser import ProxySettings
-
-                # handle proxy settings.
-                if config.browser_config.proxy and config.browser_config.proxy.server:
-                    browser_config_kwargs["proxy"] = ProxySettings(
-                        server=config.browser_config.proxy.server,
-                        username=config.browser_config.proxy.username,
-                        password=config.browser_config.proxy.password,
-                    )
-
-                browser_attrs = [
-                    "headless",
-                    "disable_security",
-                    "extra_chromium_args",
-                    "chrome_instance_path",
-                    "wss_url",
-                    "cdp_url",
-                ]
-
-                for attr in browser_attrs:
-                    value = getattr(config.browser_config, attr, None)
-                    if value is not None:
-                        if not isinstance(value, list) or value:
-                            browser_config_kwargs[attr] = value
-
-            self.browser = BrowserUseBrowser(BrowserConfig(**browser_config_kwargs))
+        """Ensure a browser context is leased from the shared pool."""
+        pool = get_browser_pool()
+        if self.context is not None and not pool.is_alive(self.context):
+            logger.warning("Browser disconnected; leasing a new browser context")
+            await pool.release(self.context)
+            self.context = None
+            self.dom_service = None
+            self.dom_diff.reset()
+            self.screenshot_policy.reset()
 
         if self.context is None:
-            context_config = BrowserContextConfig()
-
-            # if there is context config in the config, use it.
-            if (
-                config.browser_config
-                and hasattr(config.browser_config, "new_context_config")
-                and config.browser_config.new_context_config
-            ):
-                context_config = config.browser_config.new_context_config
-
-            self.context = await self.browser.new_context(context_config)
+            self.context = await pool.acquire()
+            self.browser = self.context.browser
             self.dom_service = DomService(await self.context.get_current_page())
 
         return self.context
@@ -379,9 +358,17 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                         )
 
                     page = await context.get_current_page()
-                    import markdownify
+                    if getattr(config.browser_config, "extract_main_content", False):
+                        content = (
+                            await extract_main_content_async(
+                                await page.content(), max_chars=max_content_length
+                            )
+                            or ""
+                        )
+                    else:
+                        import markdownify
 
-                    content = markdownify.markdownify(await page.content())
+                        content = markdownify.markdownify(await page.content())
 
                     prompt = f"""\
 Your task is to extract the content of the page. You will be given a page and a goal, and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format.
@@ -465,6 +452,11 @@ Page content:
                     return ToolResult(output="Closed current tab")
 
                 # Utility actions
+                elif action == "list_elements":
+                    return await self.get_current_state(
+                        context, include_screenshot=False, full_state=True
+                    )
+
                 elif action == "wait":
                     seconds_to_wait = seconds if seconds is not None else 3
                     await asyncio.sleep(seconds_to_wait)
@@ -477,11 +469,23 @@ Page content:
                 return ToolResult(error=f"Browser action '{action}' failed: {str(e)}")
 
     async def get_current_state(
-        self, context: Optional[BrowserContext] = None
+        self,
+        context: Optional[BrowserContext] = None,
+        include_screenshot: bool = True,
+        full_state: bool = False,
     ) -> ToolResult:
         """
         Get the current browser state as a ToolResult.
         If context is not provided, uses self.context.
+
+        The screenshot follows `screenshot_policy`: it is left out when
+        `include_screenshot` is false (e.g. for models without image input)
+        or when it matches the previous capture of the same page state, in
+        which case the state reports `screenshot_unchanged`.
+
+        Interactive elements are reported through `dom_diff`: the full list
+        after navigation or when `full_state` is set, otherwise only the
+        changes since the previous state (`elements_mode` tells which).
         """
         try:
             # Use provided context or fall back to self.context
@@ -498,17 +502,35 @@ Page content:
             elif hasattr(ctx, "config") and hasattr(ctx.config, "browser_window_size"):
                 viewport_height = ctx.config.browser_window_size.get("height", 0)
 
-            # Take a screenshot for the state
-            page = await ctx.get_current_page()
-
-            await page.bring_to_front()
-            await page.wait_for_load_state()
-
-            screenshot = await page.screenshot(
-                full_page=True, animations="disabled", type="jpeg", quality=100
+            interactive_elements = (
+                state.element_tree.clickable_elements_to_string()
+                if state.element_tree
+                else ""
+            )
+            elements_mode, elements = self.dom_diff.observe(
+                state.url, interactive_elements, state.selector_map, full=full_state
             )
 
-            screenshot = base64.b64encode(screenshot).decode("utf-8")
+            # Take a screenshot for the state
+            screenshot = None
+            screenshot_unchanged = False
+            if include_screenshot:
+                page = await ctx.get_current_page()
+
+                await page.bring_to_front()
+                await page.wait_for_load_state()
+
+                policy = self.screenshot_policy
+                viewport = None if policy.full_page else page.viewport_size
+                captured = await page.screenshot(
+                    **policy.capture_options(
+                        (viewport["width"], viewport["height"]) if viewport else None
+                    )
+                )
+                screenshot = await asyncio.to_thread(
+                    policy.process, captured, f"{state.url}\n{interactive_elements}"
+                )
+                screenshot_unchanged = screenshot is None
 
             # Build the state info with all required fields
             state_info = {
@@ -516,11 +538,8 @@ Page content:
                 "title": state.title,
                 "tabs": [tab.model_dump() for tab in state.tabs],
                 "help": "[0], [1], [2], etc., represent clickable indices corresponding to the elements listed. Clicking on these indices will navigate to or interact with the respective content behind them.",
-                "interactive_elements": (
-                    state.element_tree.clickable_elements_to_string()
-                    if state.element_tree
-                    else ""
-                ),
+                "interactive_elements": elements,
+                "elements_mode": elements_mode,
                 "scroll_info": {
                     "pixels_above": getattr(state, "pixels_above", 0),
                     "pixels_below": getattr(state, "pixels_below", 0),
@@ -529,6 +548,7 @@ Page content:
                     + viewport_height,
                 },
                 "viewport_height": viewport_height,
+                "screenshot_unchanged": screenshot_unchanged,
             }
 
             return ToolResult(
@@ -539,15 +559,14 @@ Page content:
             return ToolResult(error=f"Failed to get browser state: {str(e)}")
 
     async def cleanup(self):
-        """Clean up browser resources."""
+        """Return the browser context to the pool; the browser stays pooled."""
         async with self.lock:
             if self.context is not None:
-                await self.context.close()
+                await get_browser_pool().release(self.context)
                 self.context = None
                 self.dom_service = None
-            if self.browser is not None:
-                await self.browser.close()
-                self.browser = None
+            self.dom_diff.reset()
+            self.browser = None
 
     def __del__(self):
         """Ensure cleanup when object is destroyed."""
@@ -24,13 +24,31 @@ class NormalPythonExecute(PythonExecute):
 2. Use print() for all outputs so the analysis (including sections like 'Dataset Overview' or 'Preprocessing Results') is clearly visible and save it also
 3. Save any report / processed files / each analysis result in worksapce directory: {directory}
 4. Data reports need to be content-rich, including your overall analysis process and corresponding data visualization.
-5. You can invode this tool step-by-step to do data analysis from summary to in-depth with data report saved also""".format(
+5. You can invode this tool step-by-step to do data analysis from summary to in-depth with data report saved also
+6. Variables, imports and loaded dataframes persist between calls in the same session, so load data once and reuse it""".format(
                     directory=config.workspace_root
                 ),
             },
+            "session": {
+                "type": "string",
+                "description": "Name of the persistent interpreter session to run in.",
+                "default": "default",
+            },
+            "reset": {
+                "type": "boolean",
+                "description": "Clear all variables of the session before running the code.",
+                "default": False,
+            },
         },
         "required": ["code"],
     }
 
-    async def execute(self, code: str, code_type: str | None = None, timeout=5):
-        return await super().execute(code, timeout)
+    async def execute(
+        self,
+        code: str,
+        code_type: str | None = None,
+        timeout=5,
+        session: str = "default",
+        reset: bool = False,
+    ):
+        return await super().execute(code, timeout, session=session, reset=reset)
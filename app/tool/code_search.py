@@ -0,0 +1,498 @@
+"""Workspace code search backed by an incremental trigram index."""
+
+import ast
+import asyncio
+import fnmatch
+import os
+import re
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+
+try:  # Python 3.11+
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
+
+from app.config import config
+from app.exceptions import ToolError
+from app.logger import logger
+from app.tool.base import BaseTool, ToolResult
+from app.tool.dir_walker import DEFAULT_IGNORED_DIRS, GitIgnore
+
+
+_CODE_SEARCH_DESCRIPTION = """Search the workspace for code or text, much faster than running `grep -rn`.
+* `literal` mode (default) finds an exact string; `regex` mode takes a Python regular expression; `symbol` mode finds where a Python function, class or variable is defined.
+* Use `glob` to restrict the files searched, e.g. `*.py` or `app/**/*.ts`.
+* Results show `path:line: text` with a few context lines and are capped at `max_results` matches.
+"""
+
+# Files larger than this, or that look binary, are not indexed
+MAX_INDEXED_FILE_SIZE = 1024 * 1024
+# Limits of one index; files past them are left out of searches
+MAX_INDEXED_FILES = 100_000
+MAX_INDEXED_BYTES = 512 * 1024 * 1024
+
+
+def _trigrams(text: str) -> Set[int]:
+    """Lowercase trigrams of a text, each packed into one int (21 bits per char)."""
+    codes = list(map(ord, text.lower()))
+    return {(a << 42) | (b << 21) | c for a, b, c in zip(codes, codes[1:], codes[2:])}
+
+
+def _required_literals(pattern: str, flags: int = 0) -> List[str]:
+    """Literal substrings every match of a regex must contain.
+
+    Only literal runs in the top-level concatenation are collected; a
+    top-level alternation (or anything unparseable) yields no literals,
+    which makes the search fall back to scanning every file.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error as e:
+        raise ToolError(f"Invalid regex `{pattern}`: {e}") from None
+
+    literals, current = [], []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(value))
+            continue
+        if current:
+            literals.append("".join(current))
+            current = []
+        if op is sre_parse.BRANCH:
+            return []
+    if current:
+        literals.append("".join(current))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+class TrigramIndex:
+    """Incremental trigram index over the text files under a root directory.
+
+    The index maps lowercase trigrams, packed into ints, to sorted arrays of
+    the ids of the files containing them, so a query only opens files that
+    contain every trigram of its literal parts. It is refreshed by an mtime
+    scan at most every `rescan_interval` seconds; only new or changed files
+    are re-read. A changed or deleted file's id is retired rather than
+    removed from every posting, and retired ids are filtered out of the
+    postings once they outnumber the live ones.
+
+    At most `max_files` files and `max_bytes` bytes are indexed; when the
+    tree is larger, `truncated` is set and the remaining files are skipped.
+
+    Attributes:
+        root: Directory that is indexed.
+        rescan_interval: Minimum seconds between two mtime scans.
+        max_files: Maximum number of indexed files.
+        max_bytes: Maximum total size of indexed files.
+        truncated: Whether the last scan skipped files over the limits.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        rescan_interval: float = 2.0,
+        max_files: int = MAX_INDEXED_FILES,
+        max_bytes: int = MAX_INDEXED_BYTES,
+    ):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.truncated = False
+
+        self._files: Dict[str, Tuple[int, int]] = {}  # path -> (mtime_ns, size)
+        self._ids: Dict[str, int] = {}  # path -> live file id
+        self._paths: Dict[int, str] = {}  # live file id -> path
+        self._retired: Set[int] = set()
+        self._next_id = 0
+        self._indexed_bytes = 0
+        self._postings: Dict[int, array] = {}
+        self._symbols: Dict[str, Tuple[int, Dict[str, List[int]]]] = {}
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-indexes files that changed since the last scan."""
+        with self._lock:
+            if not force and time.monotonic() - self._last_scan < self.rescan_interval:
+                return
+
+            seen, truncated = set(), False
+            for path, stat in self._walk():
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if path not in self._files and (
+                    len(self._files) >= self.max_files
+                    or self._indexed_bytes + stat.st_size > self.max_bytes
+                ):
+                    truncated = True
+                    continue
+                seen.add(path)
+                if self._files.get(path) != signature:
+                    self._index_file(path, signature)
+
+            for path in set(self._files) - seen:
+                self._remove_file(path)
+            if len(self._retired) > max(1024, len(self._paths)):
+                self._compact()
+            if truncated and not self.truncated:
+                logger.warning(
+                    f"Code search index of {self.root} is limited to "
+                    f"{self.max_files} files and {self.max_bytes} bytes"
+                )
+            self.truncated = truncated
+            self._last_scan = time.monotonic()
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        gitignore = None
+        try:
+            with open(os.path.join(self.root, ".gitignore"), encoding="utf-8") as f:
+                gitignore = GitIgnore.from_text(f.read())
+        except (OSError, UnicodeDecodeError):
+            pass
+
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if is_dir and entry.name in DEFAULT_IGNORED_DIRS:
+                    continue
+                if gitignore and gitignore.matches(
+                    os.path.relpath(entry.path, self.root), is_dir
+                ):
+                    continue
+                if is_dir:
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if stat.st_size <= MAX_INDEXED_FILE_SIZE:
+                        yield entry.path, stat
+
+    def _index_file(self, path: str, signature: Tuple[int, int]) -> None:
+        self._remove_file(path)
+        text = self.read_text(path)
+        file_id = self._next_id
+        self._next_id += 1
+        self._files[path] = signature
+        self._ids[path] = file_id
+        self._paths[file_id] = path
+        self._indexed_bytes += signature[1]
+        # Binary files are remembered (without trigrams) so they are not re-read;
+        # ids only grow, so appending keeps every posting sorted
+        for trigram in _trigrams(text) if text is not None else ():
+            postings = self._postings.get(trigram)
+            if postings is None:
+                self._postings[trigram] = array("I", (file_id,))
+            else:
+                postings.append(file_id)
+
+    def _remove_file(self, path: str) -> None:
+        signature = self._files.pop(path, None)
+        if signature:
+            self._indexed_bytes -= signature[1]
+        self._symbols.pop(path, None)
+        file_id = self._ids.pop(path, None)
+        if file_id is not None:
+            del self._paths[file_id]
+            self._retired.add(file_id)
+
+    def _compact(self) -> None:
+        """Filters retired file ids out of the postings."""
+        retired = self._retired
+        for trigram, postings in list(self._postings.items()):
+            live = array("I", (i for i in postings if i not in retired))
+            if live:
+                self._postings[trigram] = live
+            else:
+                del self._postings[trigram]
+        self._retired = set()
+
+    @staticmethod
+    def read_text(path: str) -> Optional[str]:
+        """Reads a file as text, or returns None for binary/unreadable files."""
+        try:
+            with open(path, "rb") as f:
+                data = f.read(MAX_INDEXED_FILE_SIZE + 1)
+        except OSError:
+            return None
+        if b"\0" in data[:8192]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """Files that may contain all the given literals."""
+        with self._lock:
+            trigrams = set()
+            for literal in literals:
+                trigrams |= _trigrams(literal)
+            if not trigrams:
+                return sorted(self._files)
+
+            postings = [self._postings.get(trigram, ()) for trigram in trigrams]
+            postings.sort(key=len)
+            result = set(postings[0])
+            for ids in postings[1:]:
+                if not result:
+                    break
+                result.intersection_update(ids)
+            return sorted(self._paths[i] for i in result if i in self._paths)
+
+    def python_symbols(self, path: str) -> Dict[str, List[int]]:
+        """Definition line numbers by name for a Python file (cached by mtime)."""
+        mtime_ns = self._files.get(path, (0, 0))[0]
+        cached = self._symbols.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        symbols: Dict[str, List[int]] = {}
+        text = self.read_text(path)
+        try:
+            tree = ast.parse(text or "")
+        except (SyntaxError, ValueError):
+            tree = None
+        for node in ast.walk(tree) if tree else ():
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                symbols.setdefault(node.name, []).append(node.lineno)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    node.targets if isinstance(node, ast.Assign) else [node.target]
+                )
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        symbols.setdefault(target.id, []).append(node.lineno)
+        self._symbols[path] = (mtime_ns, symbols)
+        return symbols
+
+
+_INDEXES: Dict[str, TrigramIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_trigram_index(root: str) -> TrigramIndex:
+    """Returns the process-wide index for a root directory."""
+    root = os.path.abspath(root)
+    with _INDEXES_LOCK:
+        if root not in _INDEXES:
+            _INDEXES[root] = TrigramIndex(root)
+        return _INDEXES[root]
+
+
+class CodeSearch(BaseTool):
+    """A tool for fast regex, literal and symbol search over the workspace."""
+
+    name: str = "code_search"
+    description: str = _CODE_SEARCH_DESCRIPTION
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "(required) The string, regular expression or symbol name to search for.",
+            },
+            "mode": {
+                "type": "string",
+                "enum": ["literal", "regex", "symbol"],
+                "description": "(optional) How to interpret `query`. Default is `literal`.",
+            },
+            "path": {
+                "type": "string",
+                "description": "(optional) Absolute directory inside the workspace to search. Defaults to the workspace root.",
+            },
+            "glob": {
+                "type": "string",
+                "description": "(optional) File glob filter relative to `path`, e.g. `*.py`.",
+            },
+            "case_sensitive": {
+                "type": "boolean",
+                "description": "(optional) Match case exactly. Default is true.",
+            },
+            "context_lines": {
+                "type": "integer",
+                "description": "(optional) Lines of context around each match. Default is 2.",
+            },
+            "max_results": {
+                "type": "integer",
+                "description": "(optional) Maximum number of matches to return. Default is 50.",
+            },
+        },
+        "required": ["query"],
+    }
+
+    async def execute(
+        self,
+        query: str,
+        mode: str = "literal",
+        path: Optional[str] = None,
+        glob: Optional[str] = None,
+        case_sensitive: bool = True,
+        context_lines: int = 2,
+        max_results: int = 50,
+        **kwargs,
+    ) -> ToolResult:
+        """Searches the workspace and returns matches with context."""
+        workspace = os.path.realpath(config.workspace_root)
+        root = os.path.realpath(path) if path else workspace
+        if os.path.commonpath([root, workspace]) != workspace:
+            raise ToolError(f"The path {path} is outside the workspace {workspace}.")
+        if not os.path.isdir(root):
+            raise ToolError(f"The path {root} is not a directory.")
+
+        # One index per workspace; `path` only narrows the files searched
+        index = get_trigram_index(workspace)
+        await asyncio.to_thread(index.refresh)
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if mode == "symbol":
+            return await asyncio.to_thread(
+                self._search_symbols, index, root, query, glob, max_results
+            )
+        if mode == "regex":
+            literals = _required_literals(query, flags)
+            pattern = re.compile(query, flags)
+        elif mode == "literal":
+            literals = [query] if len(query) >= 3 else []
+            pattern = re.compile(re.escape(query), flags)
+        else:
+            raise ToolError(f"Unknown mode `{mode}`; use literal, regex or symbol.")
+
+        return await asyncio.to_thread(
+            self._search_text,
+            index,
+            root,
+            literals,
+            pattern,
+            glob,
+            max(context_lines, 0),
+            max_results,
+        )
+
+    @staticmethod
+    def _matches(root: str, path: str, glob: Optional[str]) -> bool:
+        """Whether an indexed file is under `root` and matches the glob."""
+        rel_path = os.path.relpath(path, root)
+        if rel_path.startswith(os.pardir + os.sep):
+            return False
+        return (
+            not glob
+            or fnmatch.fnmatch(rel_path, glob)
+            or fnmatch.fnmatch(os.path.basename(path), glob)
+        )
+
+    @staticmethod
+    def _limits_note(index: TrigramIndex) -> str:
+        if not index.truncated:
+            return ""
+        return (
+            "\n\nNote: the workspace exceeds the search index limits and some "
+            "files were not searched; narrow `path` to search them."
+        )
+
+    def _search_text(
+        self,
+        index: TrigramIndex,
+        root: str,
+        literals: List[str],
+        pattern: re.Pattern,
+        glob: Optional[str],
+        context_lines: int,
+        max_results: int,
+    ) -> ToolResult:
+        blocks, n_matches, truncated = [], 0, False
+        for path in index.candidates(literals):
+            if not self._matches(root, path, glob):
+                continue
+            text = index.read_text(path)
+            if not text or not pattern.search(text):
+                continue
+
+            lines = text.split("\n")
+            match_lines = [i for i, line in enumerate(lines) if pattern.search(line)]
+            if not match_lines:
+                # Multi-line match: report the line where it starts
+                match = pattern.search(text)
+                match_lines = [text.count("\n", 0, match.start())]
+
+            if n_matches + len(match_lines) > max_results:
+                match_lines = match_lines[: max_results - n_matches]
+                truncated = True
+            n_matches += len(match_lines)
+            blocks.append(self._format_matches(path, lines, match_lines, context_lines))
+            if n_matches >= max_results:
+                truncated = True
+                break
+
+        if not blocks:
+            return ToolResult(output="No matches found." + self._limits_note(index))
+        summary = f"{n_matches} match(es)" + (
+            f" (showing the first {max_results}; refine the query or glob for more)"
+            if truncated
+            else ""
+        )
+        return ToolResult(
+            output=summary + "\n\n" + "\n--\n".join(blocks) + self._limits_note(index)
+        )
+
+    @staticmethod
+    def _format_matches(
+        path: str, lines: List[str], match_lines: List[int], context_lines: int
+    ) -> str:
+        shown: Dict[int, bool] = {}
+        for line_no in match_lines:
+            for i in range(
+                max(0, line_no - context_lines),
+                min(len(lines), line_no + context_lines + 1),
+            ):
+                shown[i] = shown.get(i, False) or i == line_no
+
+        output, previous = [], None
+        for i in sorted(shown):
+            if previous is not None and i != previous + 1:
+                output.append("--")
+            separator = ":" if shown[i] else "-"
+            output.append(f"{path}{separator}{i + 1}{separator} {lines[i]}")
+            previous = i
+        return "\n".join(output)
+
+    def _search_symbols(
+        self,
+        index: TrigramIndex,
+        root: str,
+        name: str,
+        glob: Optional[str],
+        max_results: int,
+    ) -> ToolResult:
+        results = []
+        literals = [name] if len(name) >= 3 else []
+        for path in index.candidates(literals):
+            if not path.endswith(".py") or not self._matches(root, path, glob):
+                continue
+            line_numbers = index.python_symbols(path).get(name)
+            if not line_numbers:
+                continue
+            lines = (index.read_text(path) or "").split("\n")
+            for line_no in line_numbers:
+                results.append(f"{path}:{line_no}: {lines[line_no - 1].strip()}")
+            if len(results) >= max_results:
+                break
+
+        if not results:
+            return ToolResult(
+                output=f"No definition of `{name}` found." + self._limits_note(index)
+            )
+        return ToolResult(
+            output="\n".join(results[:max_results]) + self._limits_note(index)
+        )
@@ -6,11 +6,118 @@ providing fast, precise, and AI-ready data extraction with clean Markdown genera
 """
 
 import asyncio
-from typing import List, Union
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Union
 from urllib.parse import urlparse
 
+from pydantic import Field
+
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.html_extract import extract_main_content_async
+
+
+# Characters of main content shown per crawled page
+MAX_CONTENT_CHARS = 10000
+
+
+class _SharedCrawler:
+    """A long-lived `AsyncWebCrawler` shared by all crawl calls.
+
+    The browser is launched on first use and closed after it has been idle
+    for the given timeout, so consecutive crawls skip the browser launch.
+    It is bound to the event loop it was started on and relaunched when
+    used from another one.
+    """
+
+    def __init__(self):
+        self._crawler = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._active = 0
+        self._idle_task: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def use(self, idle_timeout: float):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Objects bound to a previous (closed) loop cannot be reused
+            self._crawler, self._loop, self._lock = None, loop, asyncio.Lock()
+            self._active, self._idle_task = 0, None
+
+        async with self._lock:
+            if self._idle_task:
+                self._idle_task.cancel()
+                self._idle_task = None
+            if self._crawler is None:
+                from crawl4ai import AsyncWebCrawler, BrowserConfig
+
+                # Configure browser settings
+                browser_config = BrowserConfig(
+                    headless=True,
+                    verbose=False,
+                    browser_type="chromium",
+                    ignore_https_errors=True,
+                    java_script_enabled=True,
+                )
+                crawler = AsyncWebCrawler(config=browser_config)
+                await crawler.start()
+                self._crawler = crawler
+            self._active += 1
+
+        try:
+            yield self._crawler
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._idle_task = asyncio.create_task(
+                    self._close_when_idle(idle_timeout)
+                )
+
+    async def _close_when_idle(self, idle_timeout: float) -> None:
+        await asyncio.sleep(idle_timeout)
+        async with self._lock:
+            if self._active or self._crawler is None:
+                return
+            crawler, self._crawler = self._crawler, None
+            self._idle_task = None
+        logger.info("Closing idle Crawl4AI browser")
+        await self._close_crawler(crawler)
+
+    async def close(self, only_if_idle: bool = False) -> None:
+        """Closes the browser now instead of waiting for the idle timer.
+
+        Args:
+            only_if_idle: Keep the browser open while crawls are using it.
+        """
+        if self._loop is not asyncio.get_running_loop():
+            # A browser started on another loop died with it
+            self._crawler = None
+            return
+        async with self._lock:
+            if self._crawler is None or (only_if_idle and self._active):
+                return
+            if self._idle_task:
+                self._idle_task.cancel()
+                self._idle_task = None
+            crawler, self._crawler = self._crawler, None
+        await self._close_crawler(crawler)
+
+    @staticmethod
+    async def _close_crawler(crawler) -> None:
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning(f"Error closing Crawl4AI browser: {e}")
+
+
+_SHARED_CRAWLER = _SharedCrawler()
+
+
+async def close() -> None:
+    """Closes the shared Crawl4AI browser; entry points call this on shutdown."""
+    await _SHARED_CRAWLER.close()
 
 
 class Crawl4aiTool(BaseTool):
@@ -62,6 +169,22 @@ class Crawl4aiTool(BaseTool):
         "required": ["urls"],
     }
 
+    max_concurrency: int = Field(
+        default=5, description="Maximum pages crawled at the same time"
+    )
+    per_domain_limit: int = Field(
+        default=2, description="Maximum pages crawled at the same time per domain"
+    )
+    idle_timeout: float = Field(
+        default=300.0,
+        description="Seconds the shared browser stays open after the last crawl",
+    )
+    output_callback: Optional[Callable[[str], None]] = Field(
+        default=None,
+        exclude=True,
+        description="Called with each URL's result as soon as it is crawled",
+    )
+
     async def execute(
         self,
         urls: Union[str, List[str]],
@@ -100,21 +223,7 @@ class Crawl4aiTool(BaseTool):
 
         try:
             # Import crawl4ai components
-            from crawl4ai import (
-                AsyncWebCrawler,
-                BrowserConfig,
-                CacheMode,
-                CrawlerRunConfig,
-            )
-
-            # Configure browser settings
-            browser_config = BrowserConfig(
-                headless=True,
-                verbose=False,
-                browser_type="chromium",
-                ignore_https_errors=True,
-                java_script_enabled=True,
-            )
+            from crawl4ai import CacheMode, CrawlerRunConfig
 
             # Configure crawler settings
             run_config = CrawlerRunConfig(
@@ -128,84 +237,26 @@ class Crawl4aiTool(BaseTool):
                 wait_until="domcontentloaded",
             )
 
-            results = []
-            successful_count = 0
-            failed_count = 0
-
-            # Process each URL
-            async with AsyncWebCrawler(config=browser_config) as crawler:
-                for url in valid_urls:
-                    try:
-                        logger.info(f"🕷️ Crawling URL: {url}")
-                        start_time = asyncio.get_event_loop().time()
-
-                        result = await crawler.arun(url=url, config=run_config)
-
-                        end_time = asyncio.get_event_loop().time()
-                        execution_time = end_time - start_time
-
-                        if result.success:
-                            # Count words in markdown
-                            word_count = 0
-                            if hasattr(result, "markdown") and result.markdown:
-                                word_count = len(result.markdown.split())
-
-                            # Count links
-                            links_count = 0
-                            if hasattr(result, "links") and result.links:
-                                internal_links = result.links.get("internal", [])
-                                external_links = result.links.get("external", [])
-                                links_count = len(internal_links) + len(external_links)
-
-                            # Count images
-                            images_count = 0
-                            if hasattr(result, "media") and result.media:
-                                images = result.media.get("images", [])
-                                images_count = len(images)
-
-                            results.append(
-                                {
-                                    "url": url,
-                                    "success": True,
-                                    "status_code": getattr(result, "status_code", 200),
-                                    "title": result.metadata.get("title")
-                                    if result.metadata
-                                    else None,
-                                    "markdown": result.markdown
-                                    if hasattr(result, "markdown")
-                                    else None,
-                                    "word_count": word_count,
-                                    "links_count": links_count,
-                                    "images_count": images_count,
-                                    "execution_time": execution_time,
-                                }
-                            )
-                            successful_count += 1
-                            logger.info(
-                                f"✅ Successfully crawled {url} in {execution_time:.2f}s"
-                            )
-
-                        else:
-                            results.append(
-                                {
-                                    "url": url,
-                                    "success": False,
-                                    "error_message": getattr(
-                                        result, "error_message", "Unknown error"
-                                    ),
-                                    "execution_time": execution_time,
-                                }
-                            )
-                            failed_count += 1
-                            logger.warning(f"❌ Failed to crawl {url}")
-
-                    except Exception as e:
-                        error_msg = f"Error crawling {url}: {str(e)}"
-                        logger.error(error_msg)
-                        results.append(
-                            {"url": url, "success": False, "error_message": error_msg}
-                        )
-                        failed_count += 1
+            # Crawl concurrently on the shared browser, reporting each page
+            # as soon as it finishes
+            crawl_slots = asyncio.Semaphore(max(1, self.max_concurrency))
+            domain_slots: Dict[str, asyncio.Semaphore] = defaultdict(
+                lambda: asyncio.Semaphore(max(1, self.per_domain_limit))
+            )
+
+            async with _SHARED_CRAWLER.use(self.idle_timeout) as crawler:
+
+                async def crawl(url: str) -> dict:
+                    async with crawl_slots, domain_slots[urlparse(url).netloc]:
+                        result = await self._crawl_url(crawler, url, run_config)
+                    if self.output_callback:
+                        self.output_callback("\n".join(self._format_result(result)))
+                    return result
+
+                results = await asyncio.gather(*(crawl(url) for url in valid_urls))
+
+            successful_count = sum(1 for result in results if result["success"])
+            failed_count = len(results) - successful_count
 
             # Format output
             output_lines = [f"🕷️ Crawl4AI Results Summary:"]
@@ -215,35 +266,7 @@ class Crawl4aiTool(BaseTool):
             output_lines.append("")
 
             for i, result in enumerate(results, 1):
-                output_lines.append(f"{i}. {result['url']}")
-
-                if result["success"]:
-                    output_lines.append(
-                        f"   ✅ Status: Success (HTTP {result.get('status_code', 'N/A')})"
-                    )
-                    if result.get("title"):
-                        output_lines.append(f"   📄 Title: {result['title']}")
-
-                    if result.get("markdown"):
-                        # Show first 300 characters of markdown content
-                        content_preview = result["markdown"]
-                        if len(result["markdown"]) > 300:
-                            content_preview += "..."
-                        output_lines.append(f"   📝 Content: {content_preview}")
-
-                    output_lines.append(
-                        f"   📊 Stats: {result.get('word_count', 0)} words, {result.get('links_count', 0)} links, {result.get('images_count', 0)} images"
-                    )
-
-                    if result.get("execution_time"):
-                        output_lines.append(
-                            f"   ⏱️ Time: {result['execution_time']:.2f}s"
-                        )
-                else:
-                    output_lines.append(f"   ❌ Status: Failed")
-                    if result.get("error_message"):
-                        output_lines.append(f"   🚫 Error: {result['error_message']}")
-
+                output_lines.extend(self._format_result(result, i))
                 output_lines.append("")
 
             return ToolResult(output="\n".join(output_lines))
@@ -257,6 +280,101 @@ class Crawl4aiTool(BaseTool):
             logger.error(error_msg)
             return ToolResult(error=error_msg)
 
+    @staticmethod
+    async def _crawl_url(crawler, url: str, run_config) -> dict:
+        """Crawls one URL and summarizes the result."""
+        try:
+            logger.info(f"🕷️ Crawling URL: {url}")
+            start_time = asyncio.get_event_loop().time()
+
+            result = await crawler.arun(url=url, config=run_config)
+
+            end_time = asyncio.get_event_loop().time()
+            execution_time = end_time - start_time
+
+            if not result.success:
+                logger.warning(f"❌ Failed to crawl {url}")
+                return {
+                    "url": url,
+                    "success": False,
+                    "error_message": getattr(result, "error_message", "Unknown error"),
+                    "execution_time": execution_time,
+                }
+
+            # Count words in markdown
+            word_count = 0
+            if hasattr(result, "markdown") and result.markdown:
+                word_count = len(result.markdown.split())
+
+            # Count links
+            links_count = 0
+            if hasattr(result, "links") and result.links:
+                internal_links = result.links.get("internal", [])
+                external_links = result.links.get("external", [])
+                links_count = len(internal_links) + len(external_links)
+
+            # Count images
+            images_count = 0
+            if hasattr(result, "media") and result.media:
+                images = result.media.get("images", [])
+                images_count = len(images)
+
+            # Keep the page's main content within a bounded budget
+            content = None
+            if getattr(result, "html", None):
+                content = await extract_main_content_async(
+                    result.html, max_chars=MAX_CONTENT_CHARS
+                )
+            if not content and getattr(result, "markdown", None):
+                content = str(result.markdown)[:MAX_CONTENT_CHARS]
+
+            logger.info(f"✅ Successfully crawled {url} in {execution_time:.2f}s")
+            return {
+                "url": url,
+                "success": True,
+                "status_code": getattr(result, "status_code", 200),
+                "title": result.metadata.get("title") if result.metadata else None,
+                "content": content,
+                "word_count": word_count,
+                "links_count": links_count,
+                "images_count": images_count,
+                "execution_time": execution_time,
+            }
+
+        except Exception as e:
+            error_msg = f"Error crawling {url}: {str(e)}"
+            logger.error(error_msg)
+            return {"url": url, "success": False, "error_message": error_msg}
+
+    @staticmethod
+    def _format_result(result: dict, index: Optional[int] = None) -> List[str]:
+        """Formats one URL's crawl result as output lines."""
+        prefix = f"{index}. " if index is not None else ""
+        output_lines = [f"{prefix}{result['url']}"]
+
+        if result["success"]:
+            output_lines.append(
+                f"   ✅ Status: Success (HTTP {result.get('status_code', 'N/A')})"
+            )
+            if result.get("title"):
+                output_lines.append(f"   📄 Title: {result['title']}")
+
+            if result.get("content"):
+                output_lines.append(f"   📝 Content: {result['content']}")
+
+            output_lines.append(
+                f"   📊 Stats: {result.get('word_count', 0)} words, {result.get('links_count', 0)} links, {result.get('images_count', 0)} images"
+            )
+
+            if result.get("execution_time"):
+                output_lines.append(f"   ⏱️ Time: {result['execution_time']:.2f}s")
+        else:
+            output_lines.append(f"   ❌ Status: Failed")
+            if result.get("error_message"):
+                output_lines.append(f"   🚫 Error: {result['error_message']}")
+
+        return output_lines
+
     def _is_valid_url(self, url: str) -> bool:
         """Validate if a URL is properly formatted."""
         try:
@@ -267,3 +385,7 @@ class Crawl4aiTool(BaseTool):
             ]
         except Exception:
             return False
+
+    async def cleanup(self) -> None:
+        """Closes the shared browser unless another crawl is still using it."""
+        await _SHARED_CRAWLER.close(only_if_idle=True)
@@ -0,0 +1,215 @@
+"""Directory listings for the editor's directory view, without shelling out."""
+
+import fnmatch
+import os
+import shlex
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.tool.file_operators import FileOperator, LocalFileOperator, PathLike
+
+
+# Directories that are never worth listing to an agent
+DEFAULT_IGNORED_DIRS = frozenset(
+    {
+        "node_modules",
+        "__pycache__",
+        "venv",
+        "site-packages",
+        "dist-packages",
+        "bower_components",
+    }
+)
+
+Entry = Tuple[str, bool]  # (name, is_dir)
+
+
+class GitIgnore:
+    """Minimal `.gitignore` matcher.
+
+    Supports name and path globs, directory-only patterns (trailing `/`) and
+    root-anchored patterns (leading `/`). Negations are ignored, so the
+    matcher errs on the side of showing entries.
+    """
+
+    def __init__(self, lines: List[str]):
+        self._patterns: List[Tuple[str, bool, bool]] = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith(("#", "!")):
+                continue
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = line.startswith("/") or "/" in line
+            self._patterns.append((line.lstrip("/"), dir_only, anchored))
+
+    @classmethod
+    def from_text(cls, text: str) -> "GitIgnore":
+        return cls(text.splitlines())
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        for pattern, dir_only, anchored in self._patterns:
+            if dir_only and not is_dir:
+                continue
+            target = rel_path if anchored else name
+            if fnmatch.fnmatch(target, pattern):
+                return True
+        return False
+
+
+class _ListingCache:
+    """LRU cache of directory listings keyed by path, validated by mtime."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._listings: "OrderedDict[str, Tuple[int, List[Entry]]]" = OrderedDict()
+
+    def list_dir(self, path: str) -> Optional[List[Entry]]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = self._listings.get(path)
+        if cached and cached[0] == mtime_ns:
+            self._listings.move_to_end(path)
+            return cached[1]
+
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(
+                    (entry.name, entry.is_dir(follow_symlinks=False)) for entry in it
+                )
+        except OSError:
+            return None
+
+        self._listings[path] = (mtime_ns, entries)
+        self._listings.move_to_end(path)
+        while len(self._listings) > self.max_entries:
+            self._listings.popitem(last=False)
+        return entries
+
+
+_LISTING_CACHE = _ListingCache()
+
+
+class DirectoryWalker:
+    """Renders a depth-limited listing of a directory tree.
+
+    Hidden entries, well-known dependency directories and entries matched by
+    the root's `.gitignore` are skipped. Directories with more than
+    `max_entries_per_dir` entries are summarized, and the whole listing stops
+    after `max_entries` lines.
+
+    Attributes:
+        max_depth: Maximum depth below the root to list.
+        max_entries: Maximum number of listed entries overall.
+        max_entries_per_dir: Entries listed per directory before summarizing.
+        ignored_dirs: Directory names that are never descended into.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 2,
+        max_entries: int = 1000,
+        max_entries_per_dir: int = 100,
+        ignored_dirs: frozenset = DEFAULT_IGNORED_DIRS,
+    ):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.max_entries_per_dir = max_entries_per_dir
+        self.ignored_dirs = ignored_dirs
+
+    async def render(self, path: PathLike, operator: FileOperator) -> str:
+        """Lists a directory through the given operator.
+
+        Local directories are read in-process with cached `os.scandir`
+        listings; other operators get a single `find` round trip whose
+        output is parsed into the same structure.
+        """
+        root = str(path).rstrip("/") or "/"
+        if isinstance(operator, LocalFileOperator):
+            gitignore = self._read_local_gitignore(root)
+            return self._render(root, _LISTING_CACHE.list_dir, gitignore)
+        return await self._render_remote(root, operator)
+
+    @staticmethod
+    def _read_local_gitignore(root: str) -> Optional[GitIgnore]:
+        try:
+            with open(os.path.join(root, ".gitignore"), encoding="utf-8") as f:
+                return GitIgnore.from_text(f.read())
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    async def _render_remote(self, root: str, operator: FileOperator) -> str:
+        separator = "---entries---"
+        prune = " -o ".join(
+            ["-name '.*'"]
+            + [f"-name {shlex.quote(name)}" for name in self.ignored_dirs]
+        )
+        quoted_root = shlex.quote(root)
+        cmd = (
+            f"cat {quoted_root}/.gitignore 2>/dev/null; echo {separator}; "
+            f"find {quoted_root} -mindepth 1 -maxdepth {self.max_depth} "
+            f"\\( {prune} \\) -prune -o -printf '%y\\t%p\\n'"
+        )
+        _, stdout, _ = await operator.run_command(cmd)
+        gitignore_text, _, listing = stdout.partition(f"{separator}\n")
+
+        tree: Dict[str, List[Entry]] = {root: []}
+        for line in listing.splitlines():
+            kind, _, full_path = line.partition("\t")
+            if not full_path:
+                continue
+            parent, _, name = full_path.rpartition("/")
+            tree.setdefault(parent or "/", []).append((name, kind == "d"))
+            if kind == "d":
+                tree.setdefault(full_path, [])
+        for entries in tree.values():
+            entries.sort()
+
+        gitignore = GitIgnore.from_text(gitignore_text) if gitignore_text else None
+        return self._render(root, tree.get, gitignore)
+
+    def _render(
+        self,
+        root: str,
+        list_dir: Callable[[str], Optional[List[Entry]]],
+        gitignore: Optional[GitIgnore],
+    ) -> str:
+        lines = [root]
+        budget = [self.max_entries]
+
+        def visit(directory: str, depth: int) -> None:
+            visible = []
+            for name, is_dir in list_dir(directory) or []:
+                if name.startswith(".") or (is_dir and name in self.ignored_dirs):
+                    continue
+                full_path = f"{directory.rstrip('/')}/{name}"
+                if gitignore and gitignore.matches(
+                    os.path.relpath(full_path, root), is_dir
+                ):
+                    continue
+                visible.append((full_path, is_dir))
+
+            shown = 0
+            for full_path, is_dir in visible[: self.max_entries_per_dir]:
+                if budget[0] <= 0:
+                    break
+                lines.append(full_path)
+                budget[0] -= 1
+                shown += 1
+                if is_dir and depth + 1 < self.max_depth:
+                    visit(full_path, depth + 1)
+
+            hidden = visible[shown:]
+            if hidden:
+                n_dirs = sum(1 for _, is_dir in hidden if is_dir)
+                lines.append(
+                    f"{directory.rstrip('/')}/... ({len(hidden)} more entries: "
+                    f"{len(hidden) - n_dirs} files, {n_dirs} directories)"
+                )
+
+        visit(root, 0)
+        return "\n".join(lines)
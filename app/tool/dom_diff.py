@@ -0,0 +1,182 @@
+"""Incremental interactive-element observations for browser state."""
+
+import hashlib
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urldefrag
+
+
+# `[12]<button>...` or `*[12]*<button>...` for elements new since the last state
+_ELEMENT_LINE = re.compile(r"^\s*\*?\[(\d+)\]\*?(<.*)$")
+
+
+@dataclass
+class ElementSnapshot:
+    """Interactive elements of one page version, keyed by XPath."""
+
+    version: str
+    text: str
+    elements: Dict[str, Tuple[int, str]]  # xpath -> (index, rendered element)
+    text_lines: List[str]  # page text between the elements, in order
+
+
+class DomDiffTracker:
+    """Turns successive element listings of a page into compact diffs.
+
+    Elements are identified by their XPath, so an element keeps its identity
+    when other elements are inserted before it and its index shifts. A diff
+    lists added, removed and changed elements with their current indices,
+    any index renumbering and added or removed lines of page text, and is
+    only used while the URL (ignoring fragments) stays the same and the diff
+    is smaller than the listing.
+
+    Serialized listings are cached per page version (hash of the listing and
+    the elements' XPaths), so an unchanged page is recognized without
+    re-parsing it, and pages that render the same listing from different
+    elements do not share a snapshot.
+
+    Attributes:
+        max_cached_versions: Page versions whose parsed listing is kept.
+        max_diff_ratio: Diffs longer than this fraction of the full listing
+            are replaced by the full listing.
+    """
+
+    def __init__(self, max_cached_versions: int = 16, max_diff_ratio: float = 0.6):
+        self.max_cached_versions = max_cached_versions
+        self.max_diff_ratio = max_diff_ratio
+        self._versions: "OrderedDict[str, ElementSnapshot]" = OrderedDict()
+        self._last: Optional[Tuple[str, ElementSnapshot]] = None
+
+    def snapshot(self, listing: str, selector_map: dict) -> ElementSnapshot:
+        """Parses (or fetches from cache) the snapshot of a page version.
+
+        Args:
+            listing: Output of `clickable_elements_to_string()`.
+            selector_map: Mapping of element index to DOM node.
+        """
+        digest = hashlib.sha1(listing.encode("utf-8"))
+        for index in sorted(selector_map):
+            xpath = getattr(selector_map[index], "xpath", None) or ""
+            digest.update(f"\0{index}:{xpath}".encode("utf-8"))
+        version = digest.hexdigest()
+        cached = self._versions.get(version)
+        if cached is not None:
+            self._versions.move_to_end(version)
+            return cached
+
+        elements: Dict[str, Tuple[int, str]] = {}
+        text_lines: List[str] = []
+        for line in listing.splitlines():
+            match = _ELEMENT_LINE.match(line)
+            if not match:
+                if line.strip():
+                    text_lines.append(line.strip())
+                continue
+            index = int(match.group(1))
+            node = selector_map.get(index)
+            key = getattr(node, "xpath", None) or f"#{index}"
+            elements[key] = (index, match.group(2))
+
+        snapshot = ElementSnapshot(version, listing, elements, text_lines)
+        self._versions[version] = snapshot
+        while len(self._versions) > self.max_cached_versions:
+            self._versions.popitem(last=False)
+        return snapshot
+
+    def observe(
+        self, url: str, listing: str, selector_map: dict, full: bool = False
+    ) -> Tuple[str, str]:
+        """Records a new observation of the page.
+
+        Args:
+            url: Page URL.
+            listing: Output of `clickable_elements_to_string()`.
+            selector_map: Mapping of element index to DOM node.
+            full: Always return the full listing.
+
+        Returns:
+            Tuple of (mode, text): mode is "full", "diff" or "unchanged".
+        """
+        page = urldefrag(url)[0]
+        current = self.snapshot(listing, selector_map)
+        last, self._last = self._last, (page, current)
+
+        if full or last is None or last[0] != page:
+            return "full", current.text
+        diff = self._diff(last[1], current)
+        if not diff:
+            return "unchanged", "No changes to interactive elements or page text."
+        if len(diff) > self.max_diff_ratio * len(current.text):
+            return "full", current.text
+        return "diff", diff
+
+    def reset(self) -> None:
+        """Forgets the last observation, so the next one is a full listing."""
+        self._last = None
+
+    @staticmethod
+    def _diff(previous: ElementSnapshot, current: ElementSnapshot) -> str:
+        added: List[Tuple[int, str]] = []
+        changed: List[Tuple[int, str]] = []
+        renumbered: List[Tuple[int, int]] = []
+        for key, (index, element) in current.elements.items():
+            old = previous.elements.get(key)
+            if old is None:
+                added.append((index, element))
+                continue
+            if old[1] != element:
+                changed.append((index, element))
+            elif old[0] != index:
+                renumbered.append((old[0], index))
+        removed = [
+            (index, element)
+            for key, (index, element) in previous.elements.items()
+            if key not in current.elements
+        ]
+
+        if current.version == previous.version:
+            return ""
+        lines = [f"+ [{index}]{element}" for index, element in sorted(added)]
+        lines += [f"~ [{index}]{element}" for index, element in sorted(changed)]
+        lines += [f"- (was [{index}]){element}" for index, element in sorted(removed)]
+        if renumbered:
+            lines.append("Renumbered: " + ", ".join(_renumbered_runs(renumbered)))
+        text_added = _missing_lines(current.text_lines, previous.text_lines)
+        text_removed = _missing_lines(previous.text_lines, current.text_lines)
+        lines += [f"+ text: {line}" for line in text_added]
+        lines += [f"- text: {line}" for line in text_removed]
+        if not lines:
+            return ""
+        return "\n".join(["Changes to the page since the last state:", *lines])
+
+
+def _missing_lines(lines: List[str], other: List[str]) -> List[str]:
+    """Lines of `lines` (in order, with repeats) that `other` does not have."""
+    available = Counter(other)
+    missing = []
+    for line in lines:
+        if available[line]:
+            available[line] -= 1
+        else:
+            missing.append(line)
+    return missing
+
+
+def _renumbered_runs(renumbered: List[Tuple[int, int]]) -> List[str]:
+    """Collapses index moves with the same shift into ranges like `[3-9]→[4-10]`."""
+    runs: List[List[int]] = []  # [first old, last old, shift]
+    for old, new in sorted(renumbered):
+        if runs and runs[-1][1] + 1 == old and runs[-1][2] == new - old:
+            runs[-1][1] = old
+        else:
+            runs.append([old, old, new - old])
+    return [
+        (
+            f"[{first}]→[{first + shift}]"
+            if first == last
+            else f"[{first}-{last}]→[{first + shift}-{last + shift}]"
+        )
+        for first, last, shift in runs
+    ]
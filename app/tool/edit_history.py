@@ -0,0 +1,264 @@
+"""Bounded undo history for file edits, stored as reverse patches."""
+
+import itertools
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.exceptions import ToolError
+from app.tool.file_operators import PathLike
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the common prefix of two strings (binary search over slices)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix of two strings, at most `limit`."""
+    lo, hi = 0, min(len(a), len(b), limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid : len(a) - lo] == b[len(b) - mid : len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _checksum(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8", "surrogatepass")) ^ len(text)
+
+
+@dataclass
+class ReversePatch:
+    """Turns the text after an edit back into the text before it.
+
+    The edit is reduced to the single span that differs: `new_text[start:end]`
+    is replaced by `old_segment`. Patches of a multi-file transaction share
+    its id and the paths of all its files (`members`).
+    """
+
+    start: int
+    end: int
+    old_segment: str
+    new_checksum: int
+    transaction: Optional[int] = None
+    members: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_edit(
+        cls,
+        old_text: str,
+        new_text: str,
+        transaction: Optional[int] = None,
+        members: Tuple[str, ...] = (),
+    ) -> "ReversePatch":
+        prefix = _common_prefix_len(old_text, new_text)
+        suffix = _common_suffix_len(
+            old_text, new_text, min(len(old_text), len(new_text)) - prefix
+        )
+        return cls(
+            start=prefix,
+            end=len(new_text) - suffix,
+            old_segment=old_text[prefix : len(old_text) - suffix],
+            new_checksum=_checksum(new_text),
+            transaction=transaction,
+            members=members,
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self.old_segment) + 64
+
+    def apply(self, text: str) -> str:
+        """Applies the patch to the post-edit text, returning the pre-edit text.
+
+        Raises:
+            ToolError: If the text is not the content the patch was made from.
+        """
+        if _checksum(text) != self.new_checksum:
+            raise ToolError(
+                "The file was modified outside the editor since the last edit; "
+                "it cannot be undone."
+            )
+        return text[: self.start] + self.old_segment + text[self.end :]
+
+
+class EditHistory:
+    """Per-file undo stacks with memory bounds.
+
+    Each edit is stored as a reverse patch covering only the changed span, so
+    a small edit to a large file costs memory proportional to the edit. When
+    a file's patches exceed `max_bytes_per_file` or `max_entries_per_file`,
+    its oldest patches are dropped; when all patches exceed
+    `max_total_bytes`, whole histories of the least recently edited files
+    are dropped.
+
+    Attributes:
+        max_entries_per_file: Maximum undo steps kept per file.
+        max_bytes_per_file: Approximate memory cap for one file's patches.
+        max_total_bytes: Approximate memory cap across all files.
+    """
+
+    def __init__(
+        self,
+        max_entries_per_file: int = 20,
+        max_bytes_per_file: int = 8 * 1024 * 1024,
+        max_total_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.max_entries_per_file = max_entries_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.max_total_bytes = max_total_bytes
+
+        self._stacks: "OrderedDict[str, List[ReversePatch]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._transactions = itertools.count(1)
+
+    def record_transaction(self, edits: Dict[PathLike, Tuple[str, str]]) -> None:
+        """Records edits of several files as one undo step.
+
+        Args:
+            edits: Mapping of path to (old text, new text).
+        """
+        transaction = next(self._transactions)
+        members = tuple(str(path) for path in edits)
+        for path, (old_text, new_text) in edits.items():
+            self.record(path, old_text, new_text, transaction, members)
+
+    def last_transaction(self, path: PathLike) -> Optional[int]:
+        """Transaction id of a file's last edit, if it was part of one."""
+        stack = self._stacks.get(str(path))
+        return stack[-1].transaction if stack else None
+
+    def transaction_paths(self, transaction: int) -> List[str]:
+        """Files of a transaction, all of which can be undone together.
+
+        Raises:
+            ToolError: If any file's last patch is not from this transaction,
+                because the file was edited again or its history was dropped.
+        """
+        members = next(
+            (
+                stack[-1].members
+                for stack in self._stacks.values()
+                if stack and stack[-1].transaction == transaction
+            ),
+            (),
+        )
+        if not members:
+            raise ToolError("No edit history found for this multi_edit.")
+
+        missing = [
+            key
+            for key in members
+            if not self._stacks.get(key)
+            or self._stacks[key][-1].transaction != transaction
+        ]
+        if missing:
+            raise ToolError(
+                "The last multi_edit cannot be undone as a whole: "
+                f"{', '.join(missing)} was edited again or its history was dropped."
+            )
+        return list(members)
+
+    def record(
+        self,
+        path: PathLike,
+        old_text: str,
+        new_text: str,
+        transaction: Optional[int] = None,
+        members: Tuple[str, ...] = (),
+    ) -> None:
+        """Records an edit of a file from `old_text` to `new_text`."""
+        key = str(path)
+        patch = ReversePatch.from_edit(old_text, new_text, transaction, members)
+        if patch.size > self.max_bytes_per_file:
+            # Too large to keep; an older patch would no longer apply either
+            self.clear(key)
+            return
+
+        stack = self._stacks.setdefault(key, [])
+        stack.append(patch)
+        self._sizes[key] = self._sizes.get(key, 0) + patch.size
+        self._total_bytes += patch.size
+        self._stacks.move_to_end(key)
+
+        while stack and (
+            len(stack) > self.max_entries_per_file
+            or self._sizes[key] > self.max_bytes_per_file
+        ):
+            dropped = stack.pop(0)
+            self._sizes[key] -= dropped.size
+            self._total_bytes -= dropped.size
+
+        while self._total_bytes > self.max_total_bytes and len(self._stacks) > 1:
+            oldest = next(iter(self._stacks))
+            if oldest == key:
+                break
+            self.clear(oldest)
+
+    def undo(self, path: PathLike, current_text: str) -> str:
+        """Reverts the last recorded edit of a file.
+
+        Args:
+            path: File path.
+            current_text: The file's current content.
+
+        Returns:
+            The file content before the last edit.
+
+        Raises:
+            ToolError: If there is no history or the file changed since the edit.
+        """
+        key = str(path)
+        stack = self._stacks.get(key)
+        if not stack:
+            raise ToolError(f"No edit history found for {path}.")
+
+        patch = stack[-1]
+        old_text = patch.apply(current_text)
+        stack.pop()
+        self._sizes[key] -= patch.size
+        self._total_bytes -= patch.size
+        if not stack:
+            self.clear(key)
+        return old_text
+
+    def check_undo(self, path: PathLike, current_text: str) -> None:
+        """Raises ToolError if `undo` would fail for a file, without undoing."""
+        stack = self._stacks.get(str(path))
+        if not stack:
+            raise ToolError(f"No edit history found for {path}.")
+        if _checksum(current_text) != stack[-1].new_checksum:
+            raise ToolError(
+                f"{path} was modified outside the editor since the last edit; "
+                "it cannot be undone."
+            )
+
+    def has_history(self, path: PathLike) -> bool:
+        return bool(self._stacks.get(str(path)))
+
+    def clear(self, path: Optional[PathLike] = None) -> None:
+        """Drops the history of one file, or of all files."""
+        if path is None:
+            self._stacks.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+            return
+        key = str(path)
+        self._stacks.pop(key, None)
+        self._total_bytes -= self._sizes.pop(key, 0)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
@@ -1,8 +1,25 @@
 """File operation interfaces and implementations for local and sandbox environments."""
 
 import asyncio
+import os
+import shlex
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Protocol, Tuple, Union, runtime_checkable
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
 
 from app.config import SandboxSettings
 from app.exceptions import ToolError
@@ -24,6 +41,14 @@ class FileOperator(Protocol):
         """Write content to a file."""
         ...
 
+    async def read_many(self, paths: List[PathLike]) -> Dict[PathLike, str]:
+        """Read several files."""
+        ...
+
+    async def write_many(self, contents: Dict[PathLike, str]) -> None:
+        """Write several files, all or nothing as far as the backend allows."""
+        ...
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
         ...
@@ -39,32 +64,161 @@ class FileOperator(Protocol):
         ...
 
 
+class IOMetrics:
+    """Latency counters for file operations, keyed by operation name."""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, nbytes: int = 0) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                operation, {"count": 0, "total_s": 0.0, "max_s": 0.0, "bytes": 0}
+            )
+            stats["count"] += 1
+            stats["total_s"] += seconds
+            stats["max_s"] = max(stats["max_s"], seconds)
+            stats["bytes"] += nbytes
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns a copy of the counters with the mean latency added."""
+        with self._lock:
+            return {
+                operation: {**stats, "mean_s": stats["total_s"] / stats["count"]}
+                for operation, stats in self._stats.items()
+            }
+
+
+# Blocking file I/O runs here so that a large read or write does not stall
+# the event loop shared by every agent in the process
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="file-io")
+IO_METRICS = IOMetrics()
+
+# Read once: os.umask can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def resolve_write_target(path: PathLike) -> Tuple[Path, int]:
+    """Resolves the file an atomic write must replace, and the mode to give it.
+
+    Symlinks are followed so that renaming over the result updates the linked
+    file instead of replacing the link. The mode is the existing file's, or
+    the default for a new file under the process umask.
+
+    Args:
+        path: Path being written.
+
+    Returns:
+        Tuple of (resolved path, permission bits).
+    """
+    target = Path(os.path.realpath(path))
+    try:
+        return target, target.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        return target, 0o666 & ~_UMASK
+
+
 class LocalFileOperator(FileOperator):
-    """File operations implementation for local filesystem."""
+    """File operations implementation for local filesystem.
+
+    Reads and writes run on a bounded thread pool. Writes are atomic (a
+    temporary file in the same directory is renamed over the target), and
+    latencies are recorded in `IO_METRICS`.
+    """
 
     encoding: str = "utf-8"
+    chunk_size: int = 1024 * 1024
+
+    async def _run_io(self, operation: str, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        result = await loop.run_in_executor(_IO_EXECUTOR, func, *args)
+        nbytes = len(result) if isinstance(result, (str, bytes)) else 0
+        IO_METRICS.record(operation, time.perf_counter() - start, nbytes)
+        return result
+
+    def _read_sync(self, path: PathLike) -> str:
+        chunks = []
+        with open(path, "r", encoding=self.encoding) as f:
+            while chunk := f.read(self.chunk_size):
+                chunks.append(chunk)
+        return "".join(chunks)
+
+    def _stage_sync(self, path: PathLike, content: str) -> Tuple[Path, str]:
+        """Writes content to a temporary file next to `path` and returns both."""
+        target, mode = resolve_write_target(path)
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding=self.encoding) as f:
+                # mkstemp creates the file with mode 0600
+                os.fchmod(f.fileno(), mode)
+                for start in range(0, len(content), self.chunk_size):
+                    f.write(content[start : start + self.chunk_size])
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return target, tmp_path
+
+    def _write_many_sync(self, contents: Dict[PathLike, str]) -> None:
+        staged: List[Tuple[Path, str]] = []
+        try:
+            for path, content in contents.items():
+                staged.append(self._stage_sync(path, content))
+        except BaseException:
+            for _, tmp_path in staged:
+                os.unlink(tmp_path)
+            raise
+        for target, tmp_path in staged:
+            os.replace(tmp_path, target)
 
     async def read_file(self, path: PathLike) -> str:
         """Read content from a local file."""
         try:
-            return Path(path).read_text(encoding=self.encoding)
+            return await self._run_io("read", self._read_sync, path)
         except Exception as e:
             raise ToolError(f"Failed to read {path}: {str(e)}") from None
 
     async def write_file(self, path: PathLike, content: str) -> None:
-        """Write content to a local file."""
+        """Atomically write content to a local file."""
         try:
-            Path(path).write_text(content, encoding=self.encoding)
+            await self._run_io("write", self._write_many_sync, {path: content})
         except Exception as e:
             raise ToolError(f"Failed to write to {path}: {str(e)}") from None
 
+    async def read_many(self, paths: List[PathLike]) -> Dict[PathLike, str]:
+        """Read several files concurrently on the I/O thread pool."""
+        contents = await asyncio.gather(*(self.read_file(path) for path in paths))
+        return dict(zip(paths, contents))
+
+    async def write_many(self, contents: Dict[PathLike, str]) -> None:
+        """Write several local files so that either all or none are replaced.
+
+        Every file is first written to a temporary file in its directory; the
+        originals are only replaced (by rename) once all writes succeeded.
+        """
+        try:
+            await self._run_io("write_many", self._write_many_sync, contents)
+        except Exception as e:
+            raise ToolError(f"Failed to write files: {str(e)}") from None
+
+    async def iter_chunks(self, path: PathLike) -> AsyncIterator[bytes]:
+        """Stream a file's raw bytes in `chunk_size` pieces."""
+        f = await self._run_io("open", open, path, "rb")
+        try:
+            while chunk := await self._run_io("read_chunk", f.read, self.chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory."""
-        return Path(path).is_dir()
+        return await self._run_io("stat", os.path.isdir, path)
 
     async def exists(self, path: PathLike) -> bool:
         """Check if path exists."""
-        return Path(path).exists()
+        return await self._run_io("stat", os.path.exists, path)
 
     async def run_command(
         self, cmd: str, timeout: Optional[float] = 120.0
@@ -120,6 +274,49 @@ class SandboxFileOperator(FileOperator):
         except Exception as e:
             raise ToolError(f"Failed to write to {path} in sandbox: {str(e)}") from None
 
+    async def read_many(self, paths: List[PathLike]) -> Dict[PathLike, str]:
+        """Read several files from the sandbox in one tar transfer."""
+        await self._ensure_sandbox_initialized()
+        try:
+            contents = await self.sandbox_client.read_files([str(p) for p in paths])
+        except Exception as e:
+            raise ToolError(f"Failed to read files in sandbox: {str(e)}") from None
+        return {path: contents[str(path)] for path in paths}
+
+    async def write_many(self, contents: Dict[PathLike, str]) -> None:
+        """Write several files in one tar transfer, restoring them on failure.
+
+        The current contents of the files are fetched in one transfer first,
+        so a failed upload can put back whatever it partially overwrote and
+        remove the files it created.
+        """
+        await self._ensure_sandbox_initialized()
+        files = {str(path): content for path, content in contents.items()}
+        try:
+            originals = await self.sandbox_client.read_files(
+                list(files), missing_ok=True
+            )
+        except Exception as e:
+            raise ToolError(f"Failed to read files in sandbox: {str(e)}") from None
+
+        try:
+            await self.sandbox_client.write_files(files)
+        except Exception as e:
+            created = [path for path in files if path not in originals]
+            try:
+                if originals:
+                    await self.sandbox_client.write_files(originals)
+                if created:
+                    await self.sandbox_client.run_command(
+                        f"rm -f -- {' '.join(shlex.quote(p) for p in created)}"
+                    )
+            except Exception as restore_error:
+                raise ToolError(
+                    f"Failed to write files in sandbox: {str(e)}; restoring the "
+                    f"previous contents also failed: {str(restore_error)}"
+                ) from None
+            raise ToolError(f"Failed to write files in sandbox: {str(e)}") from None
+
     async def is_directory(self, path: PathLike) -> bool:
         """Check if path points to a directory in sandbox."""
         await self._ensure_sandbox_initialized()
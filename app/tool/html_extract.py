@@ -0,0 +1,273 @@
+"""Main-content extraction from HTML pages for the web tools.
+
+Pages are parsed incrementally with lxml, scored readability-style to find
+the element holding the main content, and rendered as lightweight markdown
+(headings, lists, tables and paragraphs). Parsing stops once enough text has
+been seen to fill the character budget, and large documents are parsed in
+a process pool so the event loop is never blocked on them. Pages where the
+selected content is only a small part of the text are converted whole with
+markdownify instead.
+"""
+
+import asyncio
+import atexit
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lxml import etree
+
+
+# Elements whose content is never part of the main text
+_SKIPPED_TAGS = frozenset(
+    {
+        "script",
+        "style",
+        "noscript",
+        "template",
+        "svg",
+        "iframe",
+        "form",
+        "button",
+        "select",
+        "header",
+        "footer",
+        "nav",
+        "aside",
+    }
+)
+_HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+# Lists and tables are single blocks, so their short items and cells are
+# kept or dropped together
+_LIST_TAGS = frozenset({"ul", "ol"})
+_BLOCK_TAGS = frozenset(
+    {"p", "pre", "blockquote", "dd", "dt", "div", "section", "table"}
+    | _LIST_TAGS
+    | _HEADING_TAGS
+)
+# Container names that suggest boilerplate or main content, as in readability
+_NEGATIVE_HINTS = re.compile(
+    r"comment|meta|footer|footnote|sidebar|sponsor|share|social|related|promo|banner|cookie|popup|menu",
+    re.IGNORECASE,
+)
+_POSITIVE_HINTS = re.compile(
+    r"article|body|content|entry|main|page|post|text|blog|story", re.IGNORECASE
+)
+_WHITESPACE = re.compile(r"\s+")
+
+_FEED_SIZE = 64 * 1024
+_MIN_BLOCK_CHARS = 25
+# Below this share of the page's text, the selection is replaced by the
+# whole page converted to markdown
+_MIN_COVERAGE = 0.25
+
+# Documents larger than this are parsed in the process pool
+PROCESS_POOL_THRESHOLD = 256 * 1024
+
+
+class _Block:
+    __slots__ = ("tag", "text", "score", "ancestors")
+
+    def __init__(self, tag: str, text: str, score: float, ancestors: list):
+        self.tag = tag
+        self.text = text
+        self.score = score
+        self.ancestors = ancestors
+
+
+def _class_weight(element) -> float:
+    hints = f"{element.get('class', '')} {element.get('id', '')}"
+    if not hints.strip():
+        return 0.0
+    weight = 0.0
+    if _NEGATIVE_HINTS.search(hints):
+        weight -= 25
+    if _POSITIVE_HINTS.search(hints):
+        weight += 25
+    return weight
+
+
+def _end_events(html: str) -> Iterator[etree._Element]:
+    """Yields elements as their end tags are parsed, feeding the parser lazily."""
+    parser = etree.HTMLPullParser(events=("end",), remove_comments=True)
+    for start in range(0, len(html), _FEED_SIZE):
+        parser.feed(html[start : start + _FEED_SIZE])
+        for _, element in parser.read_events():
+            yield element
+    parser.close()
+    for _, element in parser.read_events():
+        yield element
+
+
+def _normalized_text(element) -> str:
+    return _WHITESPACE.sub(" ", "".join(element.itertext())).strip()
+
+
+def _block_text(element, tag: str) -> Tuple[str, int]:
+    """Markdown text of a block and the number of content characters in it."""
+    if tag in _LIST_TAGS:
+        items = [_normalized_text(item) for item in element.iterchildren("li")]
+        items = [item for item in items if item]
+        return "\n".join(f"- {item}" for item in items), sum(map(len, items))
+    if tag == "table":
+        rows, chars = [], 0
+        for row in element.iter("tr"):
+            cells = [
+                _normalized_text(cell)
+                for cell in row.iterchildren()
+                if cell.tag in ("td", "th")
+            ]
+            if any(cells):
+                rows.append(f"| {' | '.join(cells)} |")
+                chars += sum(map(len, cells))
+        return "\n".join(rows), chars
+    text = _normalized_text(element)
+    return text, len(text)
+
+
+def _collect_blocks(html: str, max_chars: int) -> Tuple[List[_Block], int, bool]:
+    """Parses text blocks in document order until the budget is covered.
+
+    Each block's text is read at its end tag and the block is then cleared,
+    so enclosing blocks only contribute their own direct text and memory
+    stays proportional to the unfinished part of the tree.
+
+    Returns:
+        Tuple of (kept blocks, characters of text in all parsed blocks
+        including the dropped ones, whether the whole document was parsed).
+    """
+    blocks: List[_Block] = []
+    seen_chars = page_chars = 0
+    # Enough text to score candidates without parsing the whole document
+    enough_chars = max_chars * 4
+
+    for element in _end_events(html):
+        tag = element.tag if isinstance(element.tag, str) else ""
+        if tag in _SKIPPED_TAGS:
+            element.clear(keep_tail=True)
+            continue
+        if tag not in _BLOCK_TAGS:
+            continue
+
+        ancestors = list(element.iterancestors())
+        if any(ancestor.tag in _SKIPPED_TAGS for ancestor in ancestors):
+            # Inside a skipped element whose end tag has not been seen yet
+            element.clear(keep_tail=True)
+            continue
+
+        text, content_chars = _block_text(element, tag)
+        page_chars += content_chars
+        if text and (content_chars >= _MIN_BLOCK_CHARS or tag in _HEADING_TAGS):
+            link_chars = sum(
+                len("".join(link.itertext())) for link in element.iter("a")
+            )
+            link_density = min(link_chars / len(text), 1.0)
+            score = (1 + text.count(",") + min(len(text) / 100, 3)) * (1 - link_density)
+            blocks.append(_Block(tag, text, score, ancestors))
+            seen_chars += len(text)
+        element.clear(keep_tail=True)
+
+        if seen_chars >= enough_chars:
+            return blocks, page_chars, False
+
+    return blocks, page_chars, True
+
+
+def _best_container(blocks: List[_Block]):
+    """Element whose descendant blocks score highest, readability-style."""
+    scores: Dict[etree._Element, float] = {}
+    for block in blocks:
+        for depth, ancestor in enumerate(block.ancestors[:3]):
+            if ancestor not in scores:
+                scores[ancestor] = _class_weight(ancestor)
+            scores[ancestor] += block.score / (1, 2, 3)[depth]
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
+
+
+def _render(block: _Block) -> str:
+    if block.tag in _HEADING_TAGS:
+        return f"{'#' * int(block.tag[1])} {block.text}"
+    return block.text
+
+
+def _convert_whole_page(html: str, max_chars: int) -> Optional[str]:
+    import markdownify
+
+    text = markdownify.markdownify(html).strip()
+    return text[:max_chars] or None
+
+
+def extract_main_content(html: str, max_chars: int = 10000) -> Optional[str]:
+    """Extracts the main content of an HTML page as lightweight markdown.
+
+    Args:
+        html: Page HTML.
+        max_chars: Maximum length of the returned text.
+
+    Returns:
+        The main content, or None if the page has no text.
+    """
+    if not html or not html.strip():
+        return None
+    blocks, page_chars, complete = _collect_blocks(html, max_chars)
+    if not blocks:
+        return _convert_whole_page(html, max_chars) if page_chars else None
+
+    container = _best_container(blocks)
+    selected = [
+        block
+        for block in blocks
+        if container is not None
+        and any(ancestor is container for ancestor in block.ancestors)
+    ]
+    # Fall back to every text block when no container clearly holds the text
+    total_chars = sum(len(block.text) for block in blocks)
+    selected_chars = sum(len(block.text) for block in selected)
+    if selected_chars < total_chars / 3:
+        selected = [block for block in blocks if block.score > 0]
+
+    parts: List[str] = []
+    length = 0
+    for block in selected:
+        rendered = _render(block)
+        parts.append(rendered)
+        length += len(rendered) + 2
+        if length >= max_chars:
+            break
+    text = "\n\n".join(parts)[:max_chars]
+    if complete and len(text) < max_chars and len(text) < page_chars * _MIN_COVERAGE:
+        # Most of the page's text is in blocks that were dropped
+        return _convert_whole_page(html, max_chars)
+    return text or None
+
+
+_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=2)
+            atexit.register(_EXECUTOR.shutdown, wait=False, cancel_futures=True)
+        return _EXECUTOR
+
+
+async def extract_main_content_async(
+    html: str, max_chars: int = 10000
+) -> Optional[str]:
+    """Runs `extract_main_content` off the event loop.
+
+    Documents over `PROCESS_POOL_THRESHOLD` characters are parsed in a
+    shared process pool; smaller ones on a worker thread.
+    """
+    if len(html) > PROCESS_POOL_THRESHOLD:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_executor(), extract_main_content, html, max_chars
+        )
+    return await asyncio.to_thread(extract_main_content, html, max_chars)
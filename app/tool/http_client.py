@@ -0,0 +1,315 @@
+"""Shared async HTTP client with per-host limits and an on-disk HTTP cache."""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import CACHE_ROOT
+from app.logger import logger
+
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+_CHARSET_PATTERN = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Response headers kept with cached bodies
+_CACHED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+
+
+@dataclass
+class HttpResponse:
+    """A fetched (or cached) response body and its metadata."""
+
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    from_cache: bool = False
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the charset from `Content-Type`, or UTF-8."""
+        match = _CHARSET_PATTERN.search(self.headers.get("content-type", ""))
+        encoding = match.group(1) if match else "utf-8"
+        try:
+            return self.content.decode(encoding, errors="replace")
+        except LookupError:
+            return self.content.decode("utf-8", errors="replace")
+
+
+@dataclass
+class _CacheEntry:
+    url: str
+    headers: Dict[str, str]
+    fresh_until: float
+    stored_at: float = field(default_factory=time.time)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+
+def _cache_control(headers: Dict[str, str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _freshness_deadline(headers: Dict[str, str], now: float) -> Optional[float]:
+    """When a response stops being fresh, or None if it must not be stored.
+
+    Follows `Cache-Control` (`no-store`, `no-cache`, `max-age`) and `Age`,
+    then `Expires`. Responses without explicit freshness are stored only if
+    they carry a validator, and are revalidated on every use.
+    """
+    directives = _cache_control(headers)
+    if "no-store" in directives or headers.get("vary", "").strip() == "*":
+        return None
+    if "no-cache" in directives:
+        return now
+
+    max_age = directives.get("max-age")
+    if max_age and max_age.isdigit():
+        age = headers.get("age", "0")
+        return now + int(max_age) - (int(age) if age.isdigit() else 0)
+
+    if "expires" in headers:
+        try:
+            return parsedate_to_datetime(headers["expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+
+    if "etag" in headers or "last-modified" in headers:
+        return now
+    return None
+
+
+class HttpCache:
+    """On-disk cache of GET responses honoring HTTP caching headers.
+
+    Each entry is a body file plus a small JSON metadata file, named by the
+    URL's hash. Fresh entries are served without a request; stale ones are
+    revalidated with `If-None-Match`/`If-Modified-Since` and reused on a 304.
+
+    Attributes:
+        path: Cache directory.
+        max_entries: Maximum cached responses; the least recently stored are
+            evicted.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 1000):
+        self.path = Path(path) if path else CACHE_ROOT / "http"
+        self.max_entries = max_entries
+
+    def _files(self, url: str) -> Tuple[Path, Path]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.path / f"{key}.json", self.path / f"{key}.body"
+
+    def load(self, url: str) -> Optional[Tuple[_CacheEntry, bytes]]:
+        """Returns the cached (entry, body) for a URL, if any."""
+        meta_path, body_path = self._files(url)
+        try:
+            entry = _CacheEntry(**json.loads(meta_path.read_text(encoding="utf-8")))
+            if entry.url != url:
+                return None
+            return entry, body_path.read_bytes()
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def store(self, url: str, headers: Dict[str, str], body: Optional[bytes]) -> None:
+        """Stores a response, or refreshes an entry's metadata if body is None."""
+        fresh_until = _freshness_deadline(headers, time.time())
+        meta_path, body_path = self._files(url)
+        if fresh_until is None:
+            for path in (meta_path, body_path):
+                path.unlink(missing_ok=True)
+            return
+
+        kept = {name: headers[name] for name in _CACHED_HEADERS if name in headers}
+        entry = _CacheEntry(url=url, headers=kept, fresh_until=fresh_until)
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(entry.__dict__).encode("utf-8"))
+            if body is not None:
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to cache response for {url}: {e}")
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _evict(self) -> None:
+        metas = list(self.path.glob("*.json"))
+        if len(metas) <= self.max_entries:
+            return
+        metas.sort(key=lambda p: p.stat().st_mtime)
+        for meta_path in metas[: len(metas) - self.max_entries]:
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".body").unlink(missing_ok=True)
+
+
+class AsyncHttpClient:
+    """Shared HTTP client for fetching web pages.
+
+    Connections are kept alive in one pool across fetches, concurrent
+    requests per host are capped so a batch of fetches does not hammer a
+    single site, bodies are streamed and cut off at `max_body_bytes`, and
+    responses are cached on disk according to their caching headers.
+
+    The underlying `httpx.AsyncClient` is bound to the event loop it was
+    created on and is recreated if used from another one.
+
+    Attributes:
+        per_host_limit: Maximum concurrent requests to one host.
+        max_body_bytes: Bodies larger than this are truncated.
+        cache: On-disk response cache, or None to disable caching.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        per_host_limit: int = 6,
+        max_body_bytes: int = 5 * 1024 * 1024,
+        cache: Optional[HttpCache] = None,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        self.per_host_limit = per_host_limit
+        self.max_body_bytes = max_body_bytes
+        self.cache = cache
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._headers = {"User-Agent": user_agent}
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=self._limits, headers=self._headers, follow_redirects=True
+            )
+            self._loop = loop
+            self._host_slots = defaultdict(
+                lambda: asyncio.Semaphore(self.per_host_limit)
+            )
+        return self._client
+
+    async def get(self, url: str, timeout: float = 10) -> HttpResponse:
+        """Fetches a URL, using and updating the cache.
+
+        Args:
+            url: URL to fetch.
+            timeout: Timeout in seconds for connecting and each read.
+
+        Returns:
+            The response; `from_cache` is set when the body came from the cache.
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+        """
+        client = self._ensure_client()
+        cached = await asyncio.to_thread(self.cache.load, url) if self.cache else None
+        if cached and cached[0].is_fresh:
+            entry, body = cached
+            return HttpResponse(url, 200, entry.headers, body, from_cache=True)
+
+        headers = {}
+        if cached:
+            entry, _ = cached
+            if "etag" in entry.headers:
+                headers["If-None-Match"] = entry.headers["etag"]
+            if "last-modified" in entry.headers:
+                headers["If-Modified-Since"] = entry.headers["last-modified"]
+
+        async with self._host_slots[urlsplit(url).netloc]:
+            async with client.stream(
+                "GET", url, headers=headers, timeout=timeout
+            ) as response:
+                response_headers = {k.lower(): v for k, v in response.headers.items()}
+                if response.status_code == 304 and cached:
+                    entry, body = cached
+                    if self.cache:
+                        merged = {**entry.headers, **response_headers}
+                        await asyncio.to_thread(self.cache.store, url, merged, None)
+                    return HttpResponse(url, 200, entry.headers, body, from_cache=True)
+
+                body, truncated = await self._read_body(response)
+
+        result = HttpResponse(
+            str(response.url),
+            response.status_code,
+            response_headers,
+            body,
+            truncated=truncated,
+        )
+        if self.cache and response.status_code == 200 and not truncated:
+            await asyncio.to_thread(self.cache.store, url, response_headers, body)
+        return result
+
+    async def _read_body(self, response: httpx.Response) -> Tuple[bytes, bool]:
+        """Reads a streamed body up to `max_body_bytes`; returns (body, truncated)."""
+        declared = response.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > self.max_body_bytes:
+            logger.warning(
+                f"Response from {response.url} is {declared} bytes; "
+                f"reading the first {self.max_body_bytes}"
+            )
+
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                return b"".join(chunks)[: self.max_body_bytes], True
+        return b"".join(chunks), False
+
+    async def aclose(self) -> None:
+        """Closes pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_HTTP_CLIENT: Optional[AsyncHttpClient] = None
+
+
+def get_http_client() -> AsyncHttpClient:
+    """Returns the process-wide HTTP client, created on first use."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        _HTTP_CLIENT = AsyncHttpClient(cache=HttpCache())
+    return _HTTP_CLIENT
@@ -0,0 +1,194 @@
+"""Line-offset indexes and streaming edits for large local files."""
+
+import mmap
+import os
+import tempfile
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, islice
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.exceptions import ToolError
+from app.tool.file_operators import PathLike, resolve_write_target
+
+
+_CHUNK_SIZE = 4 * 1024 * 1024
+# Lines between stored line-start offsets
+_CHECKPOINT_LINES = 64
+
+
+class LineIndex:
+    """Sparse byte offsets of the line starts of a file.
+
+    Built with a single buffered pass over the file and validated against the
+    file's mtime and size. Only the start of every `_CHECKPOINT_LINES`-th
+    line is kept, so the index costs a few bytes per hundred lines; a range
+    view seeks from the nearest checkpoint through a memory map and reads
+    only the requested bytes instead of the whole file.
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        stat = self.path.stat()
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        # checkpoints[i] is the start of 0-based line i * _CHECKPOINT_LINES
+        self.checkpoints = array("Q", [0])
+        self.line_count = 1
+
+        with open(self.path, "rb") as f:
+            position = 0
+            while chunk := f.read(_CHUNK_SIZE):
+                # line lengths (+1 for the newline) accumulated from the chunk
+                # start give the next line starts, without a per-byte loop
+                lines = chunk.split(b"\n")
+                starts = accumulate(
+                    map((1).__add__, map(len, lines[:-1])), initial=position
+                )
+                next(starts)
+                # the first yielded start is 0-based line `line_count`
+                skip = -self.line_count % _CHECKPOINT_LINES
+                self.checkpoints.extend(islice(starts, skip, None, _CHECKPOINT_LINES))
+                self.line_count += len(lines) - 1
+                position += len(chunk)
+
+    def is_current(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return False
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def _line_start(self, mapped: mmap.mmap, line: int) -> int:
+        """Byte offset where 0-based `line` starts."""
+        position = self.checkpoints[line // _CHECKPOINT_LINES]
+        for _ in range(line % _CHECKPOINT_LINES):
+            position = mapped.find(b"\n", position) + 1
+        return position
+
+    def _byte_range(
+        self, mapped: mmap.mmap, first_line: int, last_line: int
+    ) -> Tuple[int, int]:
+        """Byte span of lines `first_line..last_line` (1-based, inclusive)."""
+        start = self._line_start(mapped, first_line - 1)
+        if last_line >= self.line_count:
+            return start, self.size
+        # exclude the newline that ends `last_line`
+        return start, self._line_start(mapped, last_line) - 1
+
+    def read_lines(
+        self, first_line: int, last_line: int, encoding: str = "utf-8"
+    ) -> str:
+        """Reads lines `first_line..last_line` (1-based, inclusive)."""
+        if not self.size:
+            return ""
+        with open(self.path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            start, end = self._byte_range(mapped, first_line, last_line)
+            if end <= start:
+                return ""
+            return mapped[start:end].decode(encoding, errors="replace")
+
+
+class LineIndexCache:
+    """Small LRU cache of line indexes, rebuilt when a file changes."""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+
+    def get(self, path: PathLike) -> LineIndex:
+        key = str(path)
+        index = self._indexes.get(key)
+        if index is None or not index.is_current():
+            index = LineIndex(path)
+            self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_entries:
+            self._indexes.popitem(last=False)
+        return index
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        if path is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(str(path), None)
+
+
+def read_head(path: PathLike, max_chars: int, encoding: str = "utf-8") -> str:
+    """Reads roughly the first `max_chars` characters of a file."""
+    with open(path, "rb") as f:
+        data = f.read(max_chars * 4)
+    return data.decode(encoding, errors="ignore")[:max_chars]
+
+
+def stream_replace(path: PathLike, old: str, new: str, encoding: str = "utf-8") -> int:
+    """Replaces the single occurrence of `old` in a file without loading it.
+
+    The file is memory-mapped and searched in place to locate and count
+    occurrences, then copied in chunks into a temporary file next to it
+    which atomically replaces the original.
+
+    Args:
+        path: File to edit.
+        old: Text to replace; must occur exactly once.
+        new: Replacement text.
+        encoding: File encoding.
+
+    Returns:
+        1-based line number where the replacement starts.
+
+    Raises:
+        ToolError: If `old` does not occur exactly once.
+    """
+    old_bytes = old.encode(encoding)
+    new_bytes = new.encode(encoding)
+    path, mode = resolve_write_target(path)
+
+    match_at, occurrences = -1, 0
+    newlines_before = 0
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        position = mapped.find(old_bytes)
+        while position != -1:
+            occurrences += 1
+            if occurrences == 1:
+                match_at = position
+            else:
+                break
+            position = mapped.find(old_bytes, position + len(old_bytes))
+
+        if occurrences == 0:
+            raise ToolError(
+                f"No replacement was performed, old_str `{old}` did not appear verbatim in {path}."
+            )
+        if occurrences > 1:
+            raise ToolError(
+                f"No replacement was performed. Multiple occurrences of old_str `{old}` "
+                f"in {path}. Please ensure it is unique"
+            )
+
+        for start in range(0, match_at, _CHUNK_SIZE):
+            newlines_before += mapped[start : min(start + _CHUNK_SIZE, match_at)].count(
+                b"\n"
+            )
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                os.fchmod(out.fileno(), mode)
+                for start in range(0, match_at, _CHUNK_SIZE):
+                    out.write(mapped[start : min(start + _CHUNK_SIZE, match_at)])
+                out.write(new_bytes)
+                for start in range(match_at + len(old_bytes), len(mapped), _CHUNK_SIZE):
+                    out.write(mapped[start : start + _CHUNK_SIZE])
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    return newlines_before + 1
@@ -48,6 +48,11 @@ class PlanningTool(BaseTool):
                 "type": "array",
                 "items": {"type": "string"},
             },
+            "step_dependencies": {
+                "description": "For each step, the 0-based indices of earlier steps it depends on. Optional for create and update commands; when omitted, each step depends on the step before it. Steps with no unfinished dependencies may run in parallel.",
+                "type": "array",
+                "items": {"type": "array", "items": {"type": "integer"}},
+            },
             "step_index": {
                 "description": "Index of the step to update (0-based). Required for mark_step command.",
                 "type": "integer",
@@ -78,6 +83,7 @@ class PlanningTool(BaseTool):
         plan_id: Optional[str] = None,
         title: Optional[str] = None,
         steps: Optional[List[str]] = None,
+        step_dependencies: Optional[List[List[int]]] = None,
         step_index: Optional[int] = None,
         step_status: Optional[
             Literal["not_started", "in_progress", "completed", "blocked"]
@@ -93,15 +99,16 @@ class PlanningTool(BaseTool):
         - plan_id: Unique identifier for the plan
         - title: Title for the plan (used with create command)
         - steps: List of steps for the plan (used with create command)
+        - step_dependencies: Indices of earlier steps each step depends on (used with create and update commands)
         - step_index: Index of the step to update (used with mark_step command)
         - step_status: Status to set for a step (used with mark_step command)
         - step_notes: Additional notes for a step (used with mark_step command)
         """
 
         if command == "create":
-            return self._create_plan(plan_id, title, steps)
+            return self._create_plan(plan_id, title, steps, step_dependencies)
         elif command == "update":
-            return self._update_plan(plan_id, title, steps)
+            return self._update_plan(plan_id, title, steps, step_dependencies)
         elif command == "list":
             return self._list_plans()
         elif command == "get":
@@ -118,7 +125,11 @@ class PlanningTool(BaseTool):
             )
 
     def _create_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Create a new plan with the given ID, title, and steps."""
         if not plan_id:
@@ -148,6 +159,7 @@ class PlanningTool(BaseTool):
             "steps": steps,
             "step_statuses": ["not_started"] * len(steps),
             "step_notes": [""] * len(steps),
+            "step_dependencies": self._validate_dependencies(steps, step_dependencies),
         }
 
         self.plans[plan_id] = plan
@@ -158,7 +170,11 @@ class PlanningTool(BaseTool):
         )
 
     def _update_plan(
-        self, plan_id: Optional[str], title: Optional[str], steps: Optional[List[str]]
+        self,
+        plan_id: Optional[str],
+        title: Optional[str],
+        steps: Optional[List[str]],
+        step_dependencies: Optional[List[List[int]]] = None,
     ) -> ToolResult:
         """Update an existing plan with new title or steps."""
         if not plan_id:
@@ -201,11 +217,49 @@ class PlanningTool(BaseTool):
             plan["steps"] = steps
             plan["step_statuses"] = new_statuses
             plan["step_notes"] = new_notes
+            plan["step_dependencies"] = self._validate_dependencies(
+                steps, step_dependencies
+            )
+        elif step_dependencies is not None:
+            plan["step_dependencies"] = self._validate_dependencies(
+                plan["steps"], step_dependencies
+            )
 
         return ToolResult(
             output=f"Plan updated successfully: {plan_id}\n\n{self._format_plan(plan)}"
         )
 
+    @staticmethod
+    def _validate_dependencies(
+        steps: List[str], step_dependencies: Optional[List[List[int]]]
+    ) -> List[List[int]]:
+        """Validate step dependencies, defaulting to a sequential chain.
+
+        Each step may only depend on earlier steps, which keeps the plan a
+        DAG and the original step order a valid execution order.
+        """
+        if step_dependencies is None:
+            return [[i - 1] if i > 0 else [] for i in range(len(steps))]
+
+        if not isinstance(step_dependencies, list) or len(step_dependencies) != len(
+            steps
+        ):
+            raise ToolError(
+                "Parameter `step_dependencies` must contain one list of step indices per step"
+            )
+
+        dependencies = []
+        for i, deps in enumerate(step_dependencies):
+            deps = deps or []
+            if not isinstance(deps, list) or not all(
+                isinstance(dep, int) and 0 <= dep < i for dep in deps
+            ):
+                raise ToolError(
+                    f"Invalid dependencies for step {i}: {deps}. Steps may only depend on earlier steps."
+                )
+            dependencies.append(sorted(set(deps)))
+        return dependencies
+
     def _list_plans(self) -> ToolResult:
         """List all available plans."""
         if not self.plans:
@@ -345,9 +399,13 @@ class PlanningTool(BaseTool):
         output += f"Status: {completed} completed, {in_progress} in progress, {blocked} blocked, {not_started} not started\n\n"
         output += "Steps:\n"
 
+        dependencies = plan.get("step_dependencies") or self._validate_dependencies(
+            plan["steps"], None
+        )
+
         # Add each step with its status and notes
-        for i, (step, status, notes) in enumerate(
-            zip(plan["steps"], plan["step_statuses"], plan["step_notes"])
+        for i, (step, status, notes, deps) in enumerate(
+            zip(plan["steps"], plan["step_statuses"], plan["step_notes"], dependencies)
         ):
             status_symbol = {
                 "not_started": "[ ]",
@@ -357,6 +415,9 @@ class PlanningTool(BaseTool):
             }.get(status, "[ ]")
 
             output += f"{i}. {status_symbol} {step}\n"
+            if deps != ([i - 1] if i > 0 else []):
+                depends_on = ", ".join(str(dep) for dep in deps) or "none"
+                output += f"   Depends on: {depends_on}\n"
             if notes:
                 output += f"   Notes: {notes}\n"
 
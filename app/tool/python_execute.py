@@ -1,9 +1,9 @@
-import multiprocessing
-import sys
-from io import StringIO
-from typing import Dict
+from typing import Callable, Dict, Optional
+
+from pydantic import Field, PrivateAttr
 
 from app.tool.base import BaseTool
+from app.tool.python_worker_pool import PythonSessionManager, get_python_worker_pool
 
 
 class PythonExecute(BaseTool):
@@ -18,58 +18,68 @@ class PythonExecute(BaseTool):
                 "type": "string",
                 "description": "The Python code to execute.",
             },
+            "session": {
+                "type": "string",
+                "description": "Name of a persistent interpreter session to run in, so variables and imports are kept between calls. Omit to run with fresh globals.",
+            },
+            "reset": {
+                "type": "boolean",
+                "description": "Clear all variables of the session before running the code.",
+                "default": False,
+            },
         },
         "required": ["code"],
     }
 
-    def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
-        original_stdout = sys.stdout
-        try:
-            output_buffer = StringIO()
-            sys.stdout = output_buffer
-            exec(code, safe_globals, safe_globals)
-            result_dict["observation"] = output_buffer.getvalue()
-            result_dict["success"] = True
-        except Exception as e:
-            result_dict["observation"] = str(e)
-            result_dict["success"] = False
-        finally:
-            sys.stdout = original_stdout
+    output_callback: Optional[Callable[[str], None]] = Field(
+        default=None,
+        exclude=True,
+        description="Called with each chunk of output while the code is running",
+    )
+
+    _sessions: Optional[PythonSessionManager] = PrivateAttr(default=None)
 
     async def execute(
         self,
         code: str,
         timeout: int = 5,
+        session: Optional[str] = None,
+        reset: bool = False,
     ) -> Dict:
         """
         Executes the provided Python code with a timeout.
 
+        Without a session, the code runs with fresh globals on a warm worker
+        from the shared pool, so process startup and heavy imports are not
+        paid per call. With a session name, the code runs in a persistent
+        interpreter owned by this tool, so variables, imports and loaded data
+        survive across calls until the session is reset or the run ends.
+
         Args:
             code (str): The Python code to execute.
             timeout (int): Execution timeout in seconds.
+            session (Optional[str]): Name of the persistent session to run in.
+            reset (bool): Clear the session's state before running the code.
 
         Returns:
             Dict: Contains 'output' with execution output or error message and 'success' status.
         """
-
-        with multiprocessing.Manager() as manager:
-            result = manager.dict({"observation": "", "success": False})
-            if isinstance(__builtins__, dict):
-                safe_globals = {"__builtins__": __builtins__}
-            else:
-                safe_globals = {"__builtins__": __builtins__.__dict__.copy()}
-            proc = multiprocessing.Process(
-                target=self._run_code, args=(code, result, safe_globals)
+        if not session:
+            return await get_python_worker_pool().execute(
+                code, timeout, on_output=self.output_callback
             )
-            proc.start()
-            proc.join(timeout)
 
-            # timeout process
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(1)
-                return {
-                    "observation": f"Execution timeout after {timeout} seconds",
-                    "success": False,
-                }
-            return dict(result)
+        if self._sessions is None:
+            self._sessions = PythonSessionManager()
+        if reset:
+            await self._sessions.reset(session)
+        if not code.strip():
+            return {"observation": f"Session '{session}' is ready.", "success": True}
+        return await self._sessions.execute(
+            session, code, timeout, on_output=self.output_callback
+        )
+
+    async def cleanup(self) -> None:
+        """Closes the persistent sessions opened by this tool."""
+        if self._sessions is not None:
+            await self._sessions.close_all()
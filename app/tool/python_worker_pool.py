@@ -0,0 +1,721 @@
+"""Pool of persistent, pre-imported Python worker processes.
+
+Spawning a fresh process (plus a `multiprocessing.Manager` server) for every
+snippet dominates the cost of short `python_execute` calls, especially when
+the snippet imports heavy libraries. Workers in this pool are started ahead
+of time, import the configured modules once, and then execute snippets sent
+over a pipe. A worker is recycled after a number of runs or when its memory
+grows past a limit, and a timed-out worker is killed without affecting the
+others. Each run executes under address space, CPU time and open file limits,
+and its captured output is bounded.
+
+`PythonSessionManager` takes dedicated workers out of the pool to host named
+sessions whose globals persist across calls.
+"""
+
+import asyncio
+import atexit
+import builtins
+import importlib
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+from app.logger import logger
+
+
+DEFAULT_PRELOAD_MODULES = ("numpy", "pandas")
+
+OutputCallback = Callable[[str], None]
+
+
+def _current_rss_bytes() -> int:
+    """Best-effort resident memory of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except (ImportError, ValueError):
+        return 0
+
+
+class _ExecutionLimitExceeded(Exception):
+    """Raised inside a snippet when it exceeds its CPU time limit."""
+
+
+def _on_cpu_limit(signum, frame):
+    raise _ExecutionLimitExceeded("CPU time limit exceeded")
+
+
+def _apply_limits(limits: Dict) -> List:
+    """Applies per-execution resource limits to the worker process.
+
+    Soft limits are lowered relative to the process's current usage, so the
+    preloaded modules and session state do not count against the snippet's
+    budget. Hard limits are left untouched, which lets `_restore_limits`
+    raise the soft limits back afterwards.
+
+    Args:
+        limits: Dict with optional 'memory_mb', 'cpu_seconds' and 'open_files'.
+
+    Returns:
+        List of (resource, previous limits) pairs to restore.
+    """
+    try:
+        import resource
+    except ImportError:
+        return []
+
+    requested = []
+    if limits.get("memory_mb"):
+        try:
+            with open("/proc/self/statm") as f:
+                vm_bytes = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            vm_bytes = 0
+        requested.append(
+            (resource.RLIMIT_AS, vm_bytes + limits["memory_mb"] * 1024 * 1024)
+        )
+    if limits.get("cpu_seconds"):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime)
+        requested.append((resource.RLIMIT_CPU, used + int(limits["cpu_seconds"]) + 1))
+    if limits.get("open_files"):
+        requested.append((resource.RLIMIT_NOFILE, int(limits["open_files"])))
+
+    previous = []
+    for rlimit, soft in requested:
+        old_soft, hard = resource.getrlimit(rlimit)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(rlimit, (soft, hard))
+            previous.append((rlimit, (old_soft, hard)))
+        except (ValueError, OSError):
+            pass
+    return previous
+
+
+def _restore_limits(previous: List) -> None:
+    import resource
+
+    for rlimit, old_limits in previous:
+        try:
+            resource.setrlimit(rlimit, old_limits)
+        except (ValueError, OSError):
+            pass
+
+
+class _StreamingWriter:
+    """Stdout replacement with bounded memory that forwards output in chunks.
+
+    Keeps the first and last `max_chars / 2` characters of the output and
+    replaces the middle with a truncation marker, so a runaway print loop
+    cannot exhaust memory. Chunks are forwarded to the parent while the
+    snippet runs, until `max_chars` characters have been streamed.
+    """
+
+    def __init__(
+        self,
+        conn,
+        max_chars: int = 100_000,
+        flush_bytes: int = 4096,
+        flush_interval: float = 0.2,
+    ):
+        self._conn = conn
+        self._flush_bytes = flush_bytes
+        self._flush_interval = flush_interval
+        self._head_limit = max_chars // 2
+        self._tail_limit = max_chars - self._head_limit
+        self._stream_budget = max_chars
+
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail: Deque[str] = deque()
+        self._tail_size = 0
+        self._dropped = 0
+
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, data: str) -> int:
+        if not isinstance(data, str):
+            raise TypeError(f"write() argument must be str, not {type(data).__name__}")
+        self._store(data)
+        self._stream(data)
+        return len(data)
+
+    def _store(self, data: str) -> None:
+        if self._head_size < self._head_limit:
+            room = self._head_limit - self._head_size
+            self._head.append(data[:room])
+            self._head_size += min(len(data), room)
+            data = data[room:]
+            if not data:
+                return
+
+        if len(data) >= self._tail_limit:
+            self._dropped += self._tail_size + len(data) - self._tail_limit
+            self._tail.clear()
+            self._tail.append(data[-self._tail_limit :])
+            self._tail_size = self._tail_limit
+            return
+
+        self._tail.append(data)
+        self._tail_size += len(data)
+        while self._tail_size > self._tail_limit:
+            excess = self._tail_size - self._tail_limit
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_size -= len(first)
+                self._dropped += len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_size -= excess
+                self._dropped += excess
+
+    def _stream(self, data: str) -> None:
+        if self._stream_budget <= 0:
+            return
+        data = data[: self._stream_budget]
+        self._stream_budget -= len(data)
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if (
+            self._pending_size >= self._flush_bytes
+            or time.monotonic() - self._last_flush >= self._flush_interval
+            or self._stream_budget <= 0
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        chunk = "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+        self._last_flush = time.monotonic()
+        try:
+            self._conn.send({"type": "output", "data": chunk})
+        except (BrokenPipeError, OSError):
+            pass
+
+    def getvalue(self) -> str:
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self._dropped:
+            return head + tail
+        return f"{head}\n... [{self._dropped} characters truncated] ...\n{tail}"
+
+
+def _fresh_globals() -> Dict:
+    return {"__builtins__": builtins.__dict__.copy()}
+
+
+def _run_code(code: str, exec_globals: Dict, conn, limits: Dict) -> Dict:
+    """Executes a snippet in the given globals, streaming stdout to the parent."""
+    original_stdout = sys.stdout
+    output = _StreamingWriter(conn, max_chars=limits.get("max_output_chars", 100_000))
+    previous_limits = _apply_limits(limits)
+    try:
+        sys.stdout = output
+        exec(code, exec_globals, exec_globals)
+        return {"observation": output.getvalue(), "success": True}
+    except MemoryError:
+        return _limit_result(output, "Memory limit exceeded")
+    except _ExecutionLimitExceeded as e:
+        return _limit_result(output, str(e))
+    except Exception as e:
+        return {"observation": str(e), "success": False}
+    finally:
+        _restore_limits(previous_limits)
+        sys.stdout = original_stdout
+        output.flush()
+
+
+def _limit_result(output: _StreamingWriter, reason: str) -> Dict:
+    observation = output.getvalue()
+    return {
+        "observation": f"{observation}\n{reason}" if observation else reason,
+        "success": False,
+    }
+
+
+def _worker_main(conn, preload_modules: Sequence[str]) -> None:
+    """Worker process entry point: preload modules, then serve requests.
+
+    Requests are dicts with the code to run and the resource limits to apply
+    while it runs. With `persistent` set, the code
+    runs in globals kept for the worker's lifetime (a session); `reset`
+    discards them. Output chunks are sent as they are produced, followed by
+    a final result message.
+    """
+    for module_name in preload_modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass  # Optional dependency, imported lazily by snippets if present
+
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    session_globals: Optional[Dict] = None
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        if request.get("reset"):
+            session_globals = None
+            result = {"observation": "", "success": True}
+        else:
+            if request.get("persistent"):
+                if session_globals is None:
+                    session_globals = _fresh_globals()
+                exec_globals = session_globals
+            else:
+                exec_globals = _fresh_globals()
+            result = _run_code(
+                request["code"], exec_globals, conn, request.get("limits") or {}
+            )
+
+        result["type"] = "result"
+        result["rss_bytes"] = _current_rss_bytes()
+        try:
+            conn.send(result)
+        except (BrokenPipeError, OSError):
+            break
+
+
+class PythonWorker:
+    """A single persistent worker process connected through a pipe."""
+
+    def __init__(self, ctx, preload_modules: Sequence[str]):
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, tuple(preload_modules))
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.conn = parent_conn
+        self.runs = 0
+        self.rss_bytes = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    async def run(
+        self,
+        code: str,
+        timeout: float,
+        persistent: bool = False,
+        on_output: Optional[OutputCallback] = None,
+        limits: Optional[Dict] = None,
+    ) -> Dict:
+        """Sends a snippet to the worker and waits for its result.
+
+        Args:
+            code: Python code to execute.
+            timeout: Execution timeout in seconds.
+            persistent: Run in the worker's session globals instead of fresh ones.
+            on_output: Called with each output chunk as it is produced.
+            limits: Resource limits for the run (see `PythonWorkerPool.limits_for`).
+
+        Raises:
+            TimeoutError: If no result arrives within the timeout.
+            EOFError: If the worker exited while running the snippet.
+        """
+        return await self._request(
+            {"code": code, "persistent": persistent, "limits": limits},
+            timeout,
+            on_output,
+        )
+
+    async def reset(self, timeout: float = 5) -> None:
+        """Discards the worker's session globals."""
+        await self._request({"reset": True}, timeout)
+
+    async def _request(
+        self, request: Dict, timeout: float, on_output: Optional[OutputCallback] = None
+    ) -> Dict:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        self.conn.send(request)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or not await asyncio.to_thread(self.conn.poll, remaining):
+                raise TimeoutError(f"Execution timeout after {timeout} seconds")
+
+            message = self.conn.recv()
+            if message.get("type") == "output":
+                if on_output:
+                    try:
+                        on_output(message["data"])
+                    except Exception:
+                        logger.debug("Python output callback raised an exception.")
+                continue
+
+            self.runs += 1
+            self.rss_bytes = message.pop("rss_bytes", 0)
+            message.pop("type", None)
+            return message
+
+    def stop(self) -> None:
+        """Asks the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(0.5)
+        self.kill()
+
+    def kill(self) -> None:
+        """Terminates the worker process immediately."""
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+class PythonWorkerPool:
+    """Process-wide pool of warm Python workers.
+
+    Keeps `size` idle workers ready. When all are busy, an extra worker is
+    started for the call and discarded afterwards if the pool is full, so
+    concurrent agents never wait on each other.
+
+    Attributes:
+        size: Number of idle workers kept warm.
+        max_runs_per_worker: Runs after which a worker is recycled.
+        max_rss_mb: Resident memory (MB) above which a worker is recycled.
+        preload_modules: Modules imported by each worker at startup.
+        memory_limit_mb: Address space (MB) a single run may allocate.
+        cpu_time_limit: CPU seconds a single run may use; defaults to the
+            run's timeout.
+        max_open_files: Open file descriptor limit during a run.
+        max_output_chars: Output kept per run; the middle of longer output
+            is replaced by a truncation marker.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_runs_per_worker: int = 50,
+        max_rss_mb: int = 1024,
+        preload_modules: Sequence[str] = DEFAULT_PRELOAD_MODULES,
+        memory_limit_mb: Optional[int] = 2048,
+        cpu_time_limit: Optional[int] = None,
+        max_open_files: Optional[int] = 256,
+        max_output_chars: int = 100_000,
+    ):
+        self.size = size
+        self.max_runs_per_worker = max_runs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.preload_modules = tuple(preload_modules)
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_time_limit = cpu_time_limit
+        self.max_open_files = max_open_files
+        self.max_output_chars = max_output_chars
+
+        self._ctx = multiprocessing.get_context()
+        self._idle: List[PythonWorker] = []
+        self._lock = threading.Lock()
+        self._is_shutting_down = False
+        self._fill_future: Optional[asyncio.Future] = None
+
+    async def execute(
+        self, code: str, timeout: float, on_output: Optional[OutputCallback] = None
+    ) -> Dict:
+        """Executes a snippet on a warm worker.
+
+        Args:
+            code: Python code to execute.
+            timeout: Execution timeout in seconds.
+            on_output: Called with each output chunk as it is produced.
+
+        Returns:
+            Dict with 'observation' (output or error) and 'success'.
+        """
+        # Starting and stopping processes blocks, so it happens off the loop
+        worker = await asyncio.to_thread(self._acquire)
+        self._fill_in_background()
+        try:
+            result = await worker.run(
+                code, timeout, on_output=on_output, limits=self.limits_for(timeout)
+            )
+        except TimeoutError:
+            await asyncio.to_thread(self._discard, worker)
+            return {
+                "observation": f"Execution timeout after {timeout} seconds",
+                "success": False,
+            }
+        except (EOFError, BrokenPipeError, OSError):
+            await asyncio.to_thread(self._discard, worker)
+            return {
+                "observation": "Python worker exited unexpectedly",
+                "success": False,
+            }
+        except BaseException:
+            # Cancellation mid-run leaves the worker in an unknown state
+            worker.kill()
+            self._fill_in_background()
+            raise
+
+        await asyncio.to_thread(self._release, worker)
+        return result
+
+    def limits_for(self, timeout: float) -> Dict:
+        """Builds the resource limits sent to a worker for one run."""
+        return {
+            "memory_mb": self.memory_limit_mb,
+            "cpu_seconds": self.cpu_time_limit or math.ceil(timeout),
+            "open_files": self.max_open_files,
+            "max_output_chars": self.max_output_chars,
+        }
+
+    async def take_worker(self) -> PythonWorker:
+        """Removes a warm worker from the pool for dedicated use (e.g. a session).
+
+        The pool is refilled in its place; the caller owns the worker and
+        must `stop` or `kill` it when done.
+        """
+        worker = await asyncio.to_thread(self._acquire)
+        self._fill_in_background()
+        return worker
+
+    def _acquire(self) -> PythonWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+                worker.kill()
+        return self._spawn()
+
+    def _release(self, worker: PythonWorker) -> None:
+        if (
+            not worker.alive
+            or worker.runs >= self.max_runs_per_worker
+            or worker.rss_bytes > self.max_rss_mb * 1024 * 1024
+        ):
+            logger.debug(
+                f"Recycling python worker {worker.process.pid} after {worker.runs} runs"
+            )
+            self._discard(worker)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.size and not self._is_shutting_down:
+                self._idle.append(worker)
+                return
+        worker.stop()
+
+    def _discard(self, worker: PythonWorker) -> None:
+        worker.kill()
+        self._fill()
+
+    def _spawn(self) -> PythonWorker:
+        return PythonWorker(self._ctx, self.preload_modules)
+
+    def _fill(self) -> None:
+        """Starts workers until `size` idle workers are available."""
+        with self._lock:
+            missing = self.size - len(self._idle)
+        # Spawn outside the lock so concurrent acquires are not held up
+        for _ in range(max(missing, 0)):
+            worker = self._spawn()
+            with self._lock:
+                if len(self._idle) < self.size and not self._is_shutting_down:
+                    self._idle.append(worker)
+                    continue
+            worker.stop()
+            return
+
+    def _fill_in_background(self) -> None:
+        """Tops up idle workers on a worker thread, off the event loop."""
+        if self._fill_future is None or self._fill_future.done():
+            loop = asyncio.get_running_loop()
+            self._fill_future = loop.run_in_executor(None, self._fill)
+
+    def shutdown(self) -> None:
+        """Stops all idle workers."""
+        with self._lock:
+            self._is_shutting_down = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+
+
+class PythonSessionManager:
+    """Named, persistent interpreter sessions backed by dedicated workers.
+
+    Each session owns one worker whose globals survive across calls, so
+    imports, variables and loaded dataframes are reused. Sessions idle for
+    longer than `idle_timeout` are evicted, and a session whose worker grows
+    past `max_rss_mb` is closed after the run that crossed the cap. A
+    timed-out run kills the session's worker, losing its state.
+
+    Attributes:
+        pool: Pool that provides warm workers for new sessions.
+        idle_timeout: Seconds of inactivity before a session is evicted.
+        max_rss_mb: Resident memory (MB) cap per session.
+        max_sessions: Maximum concurrent sessions; the least recently used
+            one is evicted to make room.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[PythonWorkerPool] = None,
+        idle_timeout: float = 1800,
+        max_rss_mb: int = 2048,
+        max_sessions: int = 4,
+    ):
+        self.pool = pool or get_python_worker_pool()
+        self.idle_timeout = idle_timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_sessions = max_sessions
+
+        self._workers: Dict[str, PythonWorker] = {}
+        self._last_used: Dict[str, float] = {}
+
+    async def execute(
+        self,
+        name: str,
+        code: str,
+        timeout: float,
+        on_output: Optional[OutputCallback] = None,
+    ) -> Dict:
+        """Executes a snippet in a named session, creating it if needed.
+
+        Args:
+            name: Session name.
+            code: Python code to execute.
+            timeout: Execution timeout in seconds.
+            on_output: Called with each output chunk as it is produced.
+
+        Returns:
+            Dict with 'observation' (output or error) and 'success'.
+        """
+        self._evict_idle()
+        worker = await self._get_worker(name)
+        self._last_used[name] = time.monotonic()
+
+        try:
+            result = await worker.run(
+                code,
+                timeout,
+                persistent=True,
+                on_output=on_output,
+                limits=self.pool.limits_for(timeout),
+            )
+        except TimeoutError:
+            self.close(name)
+            return {
+                "observation": f"Execution timeout after {timeout} seconds. "
+                f"Session '{name}' was restarted and its state was lost.",
+                "success": False,
+            }
+        except (EOFError, BrokenPipeError, OSError):
+            self.close(name)
+            return {
+                "observation": f"Python session '{name}' exited unexpectedly "
+                "and its state was lost.",
+                "success": False,
+            }
+        except BaseException:
+            self.close(name)
+            raise
+
+        if worker.rss_bytes > self.max_rss_mb * 1024 * 1024:
+            self.close(name)
+            result["observation"] += (
+                f"\n[Session '{name}' exceeded {self.max_rss_mb} MB "
+                "and was reset; reload any data you need.]"
+            )
+        return result
+
+    async def reset(self, name: str) -> None:
+        """Clears a session's variables while keeping its warm worker."""
+        worker = self._workers.get(name)
+        if not worker:
+            return
+        try:
+            await worker.reset()
+            self._last_used[name] = time.monotonic()
+        except (TimeoutError, EOFError, BrokenPipeError, OSError):
+            self.close(name)
+
+    def close(self, name: str) -> None:
+        """Stops a session and discards its state."""
+        worker = self._workers.pop(name, None)
+        self._last_used.pop(name, None)
+        if worker:
+            worker.kill()
+
+    async def close_all(self) -> None:
+        """Stops all sessions, waiting for their workers off the event loop."""
+        workers = list(self._workers.values())
+        self._workers.clear()
+        self._last_used.clear()
+        await asyncio.gather(*(asyncio.to_thread(worker.kill) for worker in workers))
+
+    @property
+    def session_names(self) -> List[str]:
+        return list(self._workers)
+
+    async def _get_worker(self, name: str) -> PythonWorker:
+        worker = self._workers.get(name)
+        if worker and worker.alive:
+            return worker
+        if worker:
+            self.close(name)
+
+        if len(self._workers) >= self.max_sessions:
+            lru_name = min(self._last_used, key=self._last_used.get)
+            logger.info(f"Evicting least recently used python session '{lru_name}'")
+            self.close(lru_name)
+
+        worker = await self.pool.take_worker()
+        self._workers[name] = worker
+        return worker
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for name, last_used in list(self._last_used.items()):
+            if now - last_used > self.idle_timeout:
+                logger.info(f"Evicting idle python session '{name}'")
+                self.close(name)
+
+
+_POOL: Optional[PythonWorkerPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_python_worker_pool() -> PythonWorkerPool:
+    """Returns the process-wide worker pool, creating it on first use."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PythonWorkerPool()
+            atexit.register(_POOL.shutdown)
+        return _POOL
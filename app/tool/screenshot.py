@@ -0,0 +1,128 @@
+"""Screenshot post-processing for browser state: downscaling and deduplication."""
+
+import base64
+import io
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.config import config
+from app.llm import TokenCounter
+
+
+def target_size(width: int, height: int) -> Tuple[int, int]:
+    """Largest size worth sending for an image of the given size.
+
+    Mirrors the high-detail scaling in `TokenCounter`: images are fit into
+    `MAX_SIZE` and then scaled so the short side is
+    `HIGH_DETAIL_TARGET_SHORT_SIDE`. Pixels beyond that are discarded by the
+    model, so sending them only costs bandwidth and latency; tiles (and
+    thus tokens) are determined by the aspect ratio alone.
+    """
+    scale = min(1.0, TokenCounter.MAX_SIZE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, TokenCounter.HIGH_DETAIL_TARGET_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 16) -> int:
+    """Difference hash: sign of horizontal gradients of a tiny grayscale copy."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return bits
+
+
+class ScreenshotPolicy:
+    """Decides how browser screenshots are captured and whether to send them.
+
+    Screenshots are viewport-only by default, downscaled to the resolution
+    the model actually uses, and dropped when they are perceptually
+    identical to the previous capture of the same page state. Captures that
+    need no downscaling are taken as JPEG at `quality` and sent as is; the
+    others are taken as PNG so they are JPEG-encoded only once, after
+    resizing.
+
+    Attributes:
+        full_page: Capture the whole page instead of the viewport.
+        quality: JPEG quality (1-100).
+        dedup_distance: Maximum perceptual hash distance at which a capture
+            counts as unchanged; negative disables deduplication.
+    """
+
+    def __init__(
+        self, full_page: bool = False, quality: int = 75, dedup_distance: int = 2
+    ):
+        self.full_page = full_page
+        self.quality = quality
+        self.dedup_distance = dedup_distance
+        self._last: Optional[Tuple[str, int]] = None
+
+    @classmethod
+    def from_config(cls) -> "ScreenshotPolicy":
+        settings = config.browser_config
+        if not settings:
+            return cls()
+        return cls(
+            full_page=settings.screenshot_full_page,
+            quality=settings.screenshot_quality,
+            dedup_distance=settings.screenshot_dedup_distance,
+        )
+
+    def capture_options(self, page_size: Optional[Tuple[int, int]]) -> Dict:
+        """Arguments for Playwright's `page.screenshot`.
+
+        Args:
+            page_size: CSS size of the area to capture, or None if unknown
+                (e.g. a full-page capture).
+        """
+        options = {
+            "full_page": self.full_page,
+            "animations": "disabled",
+            "scale": "css",
+        }
+        if page_size is not None and target_size(*page_size) == tuple(page_size):
+            options.update(type="jpeg", quality=self.quality)
+        else:
+            options["type"] = "png"
+        return options
+
+    def process(self, data: bytes, state_key: str) -> Optional[str]:
+        """Prepares a captured screenshot for the model.
+
+        Args:
+            data: Captured image bytes.
+            state_key: Identifies the page state (URL, elements) the
+                screenshot was taken in; only captures of the same state
+                are compared.
+
+        Returns:
+            Base64-encoded JPEG, or None if it duplicates the previous capture.
+        """
+        with Image.open(io.BytesIO(data)) as image:
+            fingerprint = perceptual_hash(image)
+            previous, self._last = self._last, (state_key, fingerprint)
+            if (
+                self.dedup_distance >= 0
+                and previous is not None
+                and previous[0] == state_key
+                and bin(previous[1] ^ fingerprint).count("1") <= self.dedup_distance
+            ):
+                return None
+
+            size = target_size(*image.size)
+            if size != image.size or image.format != "JPEG":
+                output = io.BytesIO()
+                image.convert("RGB").resize(size, Image.LANCZOS).save(
+                    output, format="JPEG", quality=self.quality, optimize=True
+                )
+                data = output.getvalue()
+        return base64.b64encode(data).decode("utf-8")
+
+    def reset(self) -> None:
+        """Forgets the previous capture, so the next one is always sent."""
+        self._last = None
@@ -0,0 +1,100 @@
+"""On-disk cache of search results shared across runs and agents."""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from app.config import CACHE_ROOT, config
+from app.logger import logger
+
+
+class SearchResultCache:
+    """Caches search results on disk for `ttl` seconds.
+
+    Results are keyed by the normalized query, language, country and
+    number of results, one JSON file per key, so concurrent agents and
+    later runs reuse each other's searches.
+
+    Attributes:
+        path: Cache directory.
+        ttl: Seconds a cached result set stays valid; 0 disables the cache.
+        max_entries: Maximum cached result sets; the oldest are evicted.
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, ttl: float = 3600, max_entries: int = 2000
+    ):
+        self.path = Path(path) if path else CACHE_ROOT / "search"
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _file(self, query: str, lang: str, country: str, num_results: int) -> Path:
+        normalized = " ".join(query.lower().split())
+        key = json.dumps([normalized, lang, country, num_results])
+        return (
+            self.path / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.json"
+        )
+
+    def get(
+        self, query: str, lang: str, country: str, num_results: int
+    ) -> Optional[List[dict]]:
+        """Returns cached results, or None on a miss or expired entry."""
+        if self.ttl <= 0:
+            return None
+        file = self._file(query, lang, country, num_results)
+        try:
+            if time.time() - file.stat().st_mtime > self.ttl:
+                return None
+            return json.loads(file.read_text(encoding="utf-8"))["results"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(
+        self,
+        query: str,
+        lang: str,
+        country: str,
+        num_results: int,
+        results: List[dict],
+    ) -> None:
+        """Stores a result set."""
+        if self.ttl <= 0 or not results:
+            return
+        file = self._file(query, lang, country, num_results)
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"query": query, "results": results}, f)
+            os.replace(tmp_path, file)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to cache search results for '{query}': {e}")
+
+    def _evict(self) -> None:
+        files = list(self.path.glob("*.json"))
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda f: f.stat().st_mtime)
+        for file in files[: len(files) - self.max_entries]:
+            file.unlink(missing_ok=True)
+
+
+_CACHE: Optional[SearchResultCache] = None
+
+
+def get_search_result_cache() -> SearchResultCache:
+    """Returns the process-wide search result cache."""
+    global _CACHE
+    if _CACHE is None:
+        settings = config.search_config
+        _CACHE = (
+            SearchResultCache(ttl=settings.cache_ttl)
+            if settings
+            else SearchResultCache()
+        )
+    return _CACHE
@@ -0,0 +1,147 @@
+"""Per-engine health tracking and circuit breaking for web search."""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.config import config
+
+
+@dataclass
+class EngineHealth:
+    """Health statistics of one search engine.
+
+    Attributes:
+        latency: Exponentially weighted moving average of request latency.
+        error_rate: Exponentially weighted moving average of failures (0-1).
+        consecutive_failures: Failures since the last success.
+        open_until: Time until which the circuit is open (engine skipped).
+        samples: Number of recorded requests.
+    """
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+    samples: int = 0
+
+
+class EngineHealthTracker:
+    """Tracks engine latency and failures and trips circuit breakers.
+
+    After `failure_threshold` consecutive failures an engine's circuit opens
+    and the engine is skipped for `cooldown` seconds. Once the cool-down has
+    passed the engine is tried again (half-open): a success closes the
+    circuit, while another failure re-opens it for twice as long, up to
+    `max_cooldown`.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the circuit.
+        cooldown: Seconds an engine is skipped after its circuit opens.
+        max_cooldown: Upper bound for the growing cool-down.
+        alpha: Weight of the newest sample in the moving averages.
+        error_margin: Error rate above the best engine's at which an engine
+            is demoted.
+        slow_factor: Multiple of the fastest engine's latency at which an
+            engine is demoted.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 300.0,
+        max_cooldown: float = 3600.0,
+        alpha: float = 0.3,
+        error_margin: float = 0.5,
+        slow_factor: float = 3.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self.error_margin = error_margin
+        self.slow_factor = slow_factor
+        self._health: Dict[str, EngineHealth] = {}
+        self._lock = threading.Lock()
+
+    def record(self, engine: str, latency: float, success: bool) -> None:
+        """Records the outcome of one request to an engine."""
+        with self._lock:
+            health = self._health.setdefault(engine, EngineHealth())
+            weight = self.alpha if health.samples else 1.0
+            health.latency += weight * (latency - health.latency)
+            health.error_rate += weight * (
+                (0.0 if success else 1.0) - health.error_rate
+            )
+            health.samples += 1
+
+            if success:
+                health.consecutive_failures = 0
+                health.open_until = 0.0
+                return
+
+            health.consecutive_failures += 1
+            excess = health.consecutive_failures - self.failure_threshold
+            if excess >= 0:
+                cooldown = min(self.cooldown * 2**excess, self.max_cooldown)
+                health.open_until = time.monotonic() + cooldown
+
+    def is_available(self, engine: str) -> bool:
+        """Whether an engine's circuit is closed or half-open."""
+        with self._lock:
+            health = self._health.get(engine)
+        return not self._is_open(health, time.monotonic())
+
+    def rank(self, engines: List[str]) -> List[str]:
+        """Orders engines by health, keeping the given order otherwise.
+
+        Engines with an open circuit go last. Measured engines whose error
+        rate exceeds the best one by `error_margin`, or whose latency is
+        `slow_factor` times the fastest one's, come before those but after
+        all other engines. Unmeasured engines are never demoted.
+        """
+        now = time.monotonic()
+        with self._lock:
+            health = {name: self._health.get(name) for name in engines}
+        measured = [h for h in health.values() if h and h.samples]
+        best_error_rate = min((h.error_rate for h in measured), default=0.0)
+        best_latency = min((h.latency for h in measured), default=0.0)
+
+        def is_worse(h: Optional[EngineHealth]) -> bool:
+            if not h or not h.samples:
+                return False
+            return h.error_rate >= best_error_rate + self.error_margin or (
+                best_latency > 0 and h.latency >= best_latency * self.slow_factor
+            )
+
+        return sorted(
+            engines,
+            key=lambda name: (
+                self._is_open(health[name], now),
+                is_worse(health[name]),
+            ),
+        )
+
+    @staticmethod
+    def _is_open(health: Optional[EngineHealth], now: float) -> bool:
+        return health is not None and now < health.open_until
+
+
+_TRACKER: Optional[EngineHealthTracker] = None
+
+
+def get_engine_health_tracker() -> EngineHealthTracker:
+    """Returns the process-wide engine health tracker."""
+    global _TRACKER
+    if _TRACKER is None:
+        settings = config.search_config
+        _TRACKER = (
+            EngineHealthTracker(
+                failure_threshold=settings.breaker_failure_threshold,
+                cooldown=settings.breaker_cooldown,
+            )
+            if settings
+            else EngineHealthTracker()
+        )
+    return _TRACKER
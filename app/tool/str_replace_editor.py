@@ -1,19 +1,24 @@
 """File and directory manipulation tool with sandbox support."""
 
-from collections import defaultdict
+import asyncio
 from pathlib import Path
-from typing import Any, DefaultDict, List, Literal, Optional, get_args
+from typing import Any, Dict, List, Literal, Optional, Tuple, get_args
+
+from pydantic import PrivateAttr
 
 from app.config import config
 from app.exceptions import ToolError
 from app.tool import BaseTool
 from app.tool.base import CLIResult, ToolResult
+from app.tool.dir_walker import DirectoryWalker
+from app.tool.edit_history import EditHistory
 from app.tool.file_operators import (
     FileOperator,
     LocalFileOperator,
     PathLike,
     SandboxFileOperator,
 )
+from app.tool.line_index import LineIndexCache, read_head, stream_replace
 
 
 Command = Literal[
@@ -21,12 +26,16 @@ Command = Literal[
     "create",
     "str_replace",
     "insert",
+    "multi_edit",
     "undo_edit",
 ]
 
 # Constants
 SNIPPET_LINES: int = 4
 MAX_RESPONSE_LEN: int = 16000
+# Local files above this size are viewed through a line index and edited by
+# streaming instead of being read into memory
+LARGE_FILE_THRESHOLD: int = 8 * 1024 * 1024
 TRUNCATED_MESSAGE: str = (
     "<response clipped><NOTE>To save on context only part of this file has been shown to you. "
     "You should retry this tool after you have searched inside the file with `grep -n` "
@@ -36,10 +45,11 @@ TRUNCATED_MESSAGE: str = (
 # Tool description
 _STR_REPLACE_EDITOR_DESCRIPTION = """Custom editing tool for viewing, creating and editing files
 * State is persistent across command calls and discussions with the user
-* If `path` is a file, `view` displays the result of applying `cat -n`. If `path` is a directory, `view` lists non-hidden files and directories up to 2 levels deep
+* If `path` is a file, `view` displays the result of applying `cat -n`. If `path` is a directory, `view` lists non-hidden files and directories up to 2 levels deep, skipping dependency directories and `.gitignore`d entries
 * The `create` command cannot be used if the specified `path` already exists as a file
 * If a `command` generates a long output, it will be truncated and marked with `<response clipped>`
 * The `undo_edit` command will revert the last edit made to the file at `path`
+* The `multi_edit` command applies an ordered list of `str_replace` / `insert` edits, possibly across several files, in one call. All edits are validated before any file is written; if one fails, no file is changed. The whole batch is undone by a single `undo_edit`
 
 Notes for using the `str_replace` command:
 * The `old_str` parameter should match EXACTLY one or more consecutive lines from the original file. Be mindful of whitespaces!
@@ -66,8 +76,15 @@ class StrReplaceEditor(BaseTool):
         "type": "object",
         "properties": {
             "command": {
-                "description": "The commands to run. Allowed options are: `view`, `create`, `str_replace`, `insert`, `undo_edit`.",
-                "enum": ["view", "create", "str_replace", "insert", "undo_edit"],
+                "description": "The commands to run. Allowed options are: `view`, `create`, `str_replace`, `insert`, `multi_edit`, `undo_edit`.",
+                "enum": [
+                    "view",
+                    "create",
+                    "str_replace",
+                    "insert",
+                    "multi_edit",
+                    "undo_edit",
+                ],
                 "type": "string",
             },
             "path": {
@@ -95,12 +112,32 @@ class StrReplaceEditor(BaseTool):
                 "items": {"type": "integer"},
                 "type": "array",
             },
+            "edits": {
+                "description": "Required parameter of `multi_edit` command. Ordered list of edits; each has a `command` (`str_replace` or `insert`), an optional `path` (defaults to the top-level `path`) and the parameters of that command.",
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "command": {
+                            "type": "string",
+                            "enum": ["str_replace", "insert"],
+                        },
+                        "path": {"type": "string"},
+                        "old_str": {"type": "string"},
+                        "new_str": {"type": "string"},
+                        "insert_line": {"type": "integer"},
+                    },
+                    "required": ["command"],
+                },
+            },
         },
         "required": ["command", "path"],
     }
-    _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
+    _file_history: EditHistory = PrivateAttr(default_factory=EditHistory)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
+    _line_indexes: LineIndexCache = PrivateAttr(default_factory=LineIndexCache)
+    _directory_walker: DirectoryWalker = PrivateAttr(default_factory=DirectoryWalker)
 
     # def _get_operator(self, use_sandbox: bool) -> FileOperator:
     def _get_operator(self) -> FileOperator:
@@ -121,12 +158,18 @@ class StrReplaceEditor(BaseTool):
         old_str: str | None = None,
         new_str: str | None = None,
         insert_line: int | None = None,
+        edits: list[dict] | None = None,
         **kwargs: Any,
     ) -> str:
         """Execute a file operation command."""
         # Get the appropriate file operator
         operator = self._get_operator()
 
+        if command == "multi_edit":
+            if not edits:
+                raise ToolError("Parameter `edits` is required for command: multi_edit")
+            return str(await self.multi_edit(path, edits, operator))
+
         # Validate path and command combination
         await self.validate_path(command, Path(path), operator)
 
@@ -137,7 +180,6 @@ class StrReplaceEditor(BaseTool):
             if file_text is None:
                 raise ToolError("Parameter `file_text` is required for command: create")
             await operator.write_file(path, file_text)
-            self._file_history[path].append(file_text)
             result = ToolResult(output=f"File created successfully at: {path}")
         elif command == "str_replace":
             if old_str is None:
@@ -215,21 +257,30 @@ class StrReplaceEditor(BaseTool):
             # File handling
             return await self._view_file(path, operator, view_range)
 
-    @staticmethod
-    async def _view_directory(path: PathLike, operator: FileOperator) -> CLIResult:
+    async def _view_directory(
+        self, path: PathLike, operator: FileOperator
+    ) -> CLIResult:
         """Display directory contents."""
-        find_cmd = f"find {path} -maxdepth 2 -not -path '*/\\.*'"
+        try:
+            listing = await self._directory_walker.render(path, operator)
+        except Exception as e:
+            return CLIResult(output="", error=str(e))
 
-        # Execute command using the operator
-        returncode, stdout, stderr = await operator.run_command(find_cmd)
-
-        if not stderr:
-            stdout = (
-                f"Here's the files and directories up to 2 levels deep in {path}, "
-                f"excluding hidden items:\n{stdout}\n"
+        return CLIResult(
+            output=(
+                f"Here's the files and directories up to {self._directory_walker.max_depth} "
+                f"levels deep in {path}, excluding hidden and ignored items:\n{listing}\n"
             )
+        )
 
-        return CLIResult(output=stdout, error=stderr)
+    def _is_large_local_file(self, path: PathLike, operator: FileOperator) -> bool:
+        """Whether a file should be handled without reading it into memory."""
+        if not isinstance(operator, LocalFileOperator):
+            return False
+        try:
+            return Path(path).stat().st_size > LARGE_FILE_THRESHOLD
+        except OSError:
+            return False
 
     async def _view_file(
         self,
@@ -238,37 +289,18 @@ class StrReplaceEditor(BaseTool):
         view_range: Optional[List[int]] = None,
     ) -> CLIResult:
         """Display file content, optionally within a specified line range."""
+        if self._is_large_local_file(path, operator):
+            return await self._view_large_file(path, operator, view_range)
+
         # Read file content
         file_content = await operator.read_file(path)
         init_line = 1
 
         # Apply view range if specified
         if view_range:
-            if len(view_range) != 2 or not all(isinstance(i, int) for i in view_range):
-                raise ToolError(
-                    "Invalid `view_range`. It should be a list of two integers."
-                )
-
             file_lines = file_content.split("\n")
             n_lines_file = len(file_lines)
-            init_line, final_line = view_range
-
-            # Validate view range
-            if init_line < 1 or init_line > n_lines_file:
-                raise ToolError(
-                    f"Invalid `view_range`: {view_range}. Its first element `{init_line}` should be "
-                    f"within the range of lines of the file: {[1, n_lines_file]}"
-                )
-            if final_line > n_lines_file:
-                raise ToolError(
-                    f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
-                    f"smaller than the number of lines in the file: `{n_lines_file}`"
-                )
-            if final_line != -1 and final_line < init_line:
-                raise ToolError(
-                    f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
-                    f"larger or equal than its first `{init_line}`"
-                )
+            init_line, final_line = self._validate_view_range(view_range, n_lines_file)
 
             # Apply range
             if final_line == -1:
@@ -281,6 +313,59 @@ class StrReplaceEditor(BaseTool):
             output=self._make_output(file_content, str(path), init_line=init_line)
         )
 
+    async def _view_large_file(
+        self,
+        path: PathLike,
+        operator: LocalFileOperator,
+        view_range: Optional[List[int]] = None,
+    ) -> CLIResult:
+        """Display a range of a large local file using a cached line index."""
+        if not view_range:
+            # Only the head survives truncation, so only the head is read
+            file_content = await asyncio.to_thread(
+                read_head, path, MAX_RESPONSE_LEN + 1, operator.encoding
+            )
+            return CLIResult(output=self._make_output(file_content, str(path)))
+
+        index = await asyncio.to_thread(self._line_indexes.get, path)
+        init_line, final_line = self._validate_view_range(view_range, index.line_count)
+        if final_line == -1:
+            final_line = index.line_count
+        file_content = await asyncio.to_thread(
+            index.read_lines, init_line, final_line, operator.encoding
+        )
+        return CLIResult(
+            output=self._make_output(file_content, str(path), init_line=init_line)
+        )
+
+    @staticmethod
+    def _validate_view_range(view_range: List[int], n_lines_file: int) -> List[int]:
+        """Validate a `view_range` against the number of lines in a file."""
+        if len(view_range) != 2 or not all(isinstance(i, int) for i in view_range):
+            raise ToolError(
+                "Invalid `view_range`. It should be a list of two integers."
+            )
+
+        init_line, final_line = view_range
+
+        # Validate view range
+        if init_line < 1 or init_line > n_lines_file:
+            raise ToolError(
+                f"Invalid `view_range`: {view_range}. Its first element `{init_line}` should be "
+                f"within the range of lines of the file: {[1, n_lines_file]}"
+            )
+        if final_line > n_lines_file:
+            raise ToolError(
+                f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
+                f"smaller than the number of lines in the file: `{n_lines_file}`"
+            )
+        if final_line != -1 and final_line < init_line:
+            raise ToolError(
+                f"Invalid `view_range`: {view_range}. Its second element `{final_line}` should be "
+                f"larger or equal than its first `{init_line}`"
+            )
+        return [init_line, final_line]
+
     async def str_replace(
         self,
         path: PathLike,
@@ -289,8 +374,41 @@ class StrReplaceEditor(BaseTool):
         operator: FileOperator = None,
     ) -> CLIResult:
         """Replace a unique string in a file with a new string."""
-        # Read file content and expand tabs
+        if self._is_large_local_file(path, operator):
+            return await self._str_replace_large_file(path, old_str, new_str, operator)
+
+        # Read file content and replace
         file_content = (await operator.read_file(path)).expandtabs()
+        new_file_content, snippet, start_line = self._replace_in_text(
+            file_content, path, old_str, new_str
+        )
+
+        # Write the new content to the file
+        await operator.write_file(path, new_file_content)
+
+        # Save a reverse patch of the edit to history
+        self._file_history.record(path, file_content, new_file_content)
+
+        # Prepare the success message
+        success_msg = f"The file {path} has been edited. "
+        success_msg += self._make_output(snippet, f"a snippet of {path}", start_line)
+        success_msg += "Review the changes and make sure they are as expected. Edit the file again if necessary."
+
+        return CLIResult(output=success_msg)
+
+    @staticmethod
+    def _replace_in_text(
+        file_content: str,
+        path: PathLike,
+        old_str: str,
+        new_str: Optional[str] = None,
+    ) -> Tuple[str, str, int]:
+        """Replace a unique string in tab-expanded file content.
+
+        Returns:
+            Tuple of (new content, snippet of the edited section, 1-based
+            line number the snippet starts at).
+        """
         old_str = old_str.expandtabs()
         new_str = new_str.expandtabs() if new_str is not None else ""
 
@@ -316,25 +434,48 @@ class StrReplaceEditor(BaseTool):
         # Replace old_str with new_str
         new_file_content = file_content.replace(old_str, new_str)
 
-        # Write the new content to the file
-        await operator.write_file(path, new_file_content)
-
-        # Save the original content to history
-        self._file_history[path].append(file_content)
-
         # Create a snippet of the edited section
         replacement_line = file_content.split(old_str)[0].count("\n")
         start_line = max(0, replacement_line - SNIPPET_LINES)
         end_line = replacement_line + SNIPPET_LINES + new_str.count("\n")
         snippet = "\n".join(new_file_content.split("\n")[start_line : end_line + 1])
 
-        # Prepare the success message
-        success_msg = f"The file {path} has been edited. "
-        success_msg += self._make_output(
-            snippet, f"a snippet of {path}", start_line + 1
+        return new_file_content, snippet, start_line + 1
+
+    async def _str_replace_large_file(
+        self,
+        path: PathLike,
+        old_str: str,
+        new_str: Optional[str],
+        operator: LocalFileOperator,
+    ) -> CLIResult:
+        """Replace a unique string in a large local file by streaming it.
+
+        The file is not read into memory, so tabs are left as they are and
+        the edit is not recorded for `undo_edit`.
+        """
+        new_str = new_str or ""
+        replacement_line = await asyncio.to_thread(
+            stream_replace, path, old_str, new_str, operator.encoding
         )
-        success_msg += "Review the changes and make sure they are as expected. Edit the file again if necessary."
+        self._file_history.clear(path)
 
+        index = await asyncio.to_thread(self._line_indexes.get, path)
+        start_line = max(1, replacement_line - SNIPPET_LINES)
+        end_line = min(
+            index.line_count, replacement_line + SNIPPET_LINES + new_str.count("\n")
+        )
+        snippet = await asyncio.to_thread(
+            index.read_lines, start_line, end_line, operator.encoding
+        )
+
+        success_msg = f"The file {path} has been edited. "
+        success_msg += self._make_output(snippet, f"a snippet of {path}", start_line)
+        success_msg += (
+            "The file is too large to keep undo history, so this edit cannot be "
+            "undone with `undo_edit`. Review the changes and make sure they are as "
+            "expected. Edit the file again if necessary."
+        )
         return CLIResult(output=success_msg)
 
     async def insert(
@@ -345,8 +486,34 @@ class StrReplaceEditor(BaseTool):
         operator: FileOperator = None,
     ) -> CLIResult:
         """Insert text at a specific line in a file."""
-        # Read and prepare content
+        # Read content and insert
         file_text = (await operator.read_file(path)).expandtabs()
+        new_file_text, snippet, start_line = self._insert_in_text(
+            file_text, insert_line, new_str
+        )
+
+        await operator.write_file(path, new_file_text)
+        self._file_history.record(path, file_text, new_file_text)
+
+        # Prepare success message
+        success_msg = f"The file {path} has been edited. "
+        success_msg += self._make_output(
+            snippet, "a snippet of the edited file", start_line
+        )
+        success_msg += "Review the changes and make sure they are as expected (correct indentation, no duplicate lines, etc). Edit the file again if necessary."
+
+        return CLIResult(output=success_msg)
+
+    @staticmethod
+    def _insert_in_text(
+        file_text: str, insert_line: int, new_str: str
+    ) -> Tuple[str, str, int]:
+        """Insert text after a line of tab-expanded file content.
+
+        Returns:
+            Tuple of (new content, snippet around the insertion, 1-based line
+            number the snippet starts at).
+        """
         new_str = new_str.expandtabs()
         file_text_lines = file_text.split("\n")
         n_lines_file = len(file_text_lines)
@@ -373,38 +540,131 @@ class StrReplaceEditor(BaseTool):
             + file_text_lines[insert_line : insert_line + SNIPPET_LINES]
         )
 
-        # Join lines and write to file
+        # Join lines
         new_file_text = "\n".join(new_file_text_lines)
         snippet = "\n".join(snippet_lines)
 
-        await operator.write_file(path, new_file_text)
-        self._file_history[path].append(file_text)
+        return new_file_text, snippet, max(1, insert_line - SNIPPET_LINES + 1)
 
-        # Prepare success message
-        success_msg = f"The file {path} has been edited. "
-        success_msg += self._make_output(
-            snippet,
-            "a snippet of the edited file",
-            max(1, insert_line - SNIPPET_LINES + 1),
-        )
-        success_msg += "Review the changes and make sure they are as expected (correct indentation, no duplicate lines, etc). Edit the file again if necessary."
+    async def multi_edit(
+        self,
+        path: PathLike,
+        edits: List[dict],
+        operator: FileOperator = None,
+    ) -> CLIResult:
+        """Apply an ordered batch of edits across files as one transaction.
+
+        Every file is read once and all edits are applied in memory first, so
+        a failing edit leaves every file untouched. The results are then
+        written together (atomically for local files) and recorded as a
+        single undo step.
+        """
+        # Validate every target, then read all of them in one batch
+        edit_paths = [str(edit.get("path") or path) for edit in edits]
+        for number, (edit, edit_path) in enumerate(zip(edits, edit_paths), start=1):
+            try:
+                await self.validate_path(edit.get("command"), Path(edit_path), operator)
+            except ToolError as e:
+                raise ToolError(
+                    f"No files were changed. Edit {number} on {edit_path} failed: {e.message}"
+                ) from None
+        originals = {
+            p: content.expandtabs()
+            for p, content in (
+                await operator.read_many(list(dict.fromkeys(edit_paths)))
+            ).items()
+        }
+        contents = dict(originals)
+        snippets: List[str] = []
+
+        for number, (edit, edit_path) in enumerate(zip(edits, edit_paths), start=1):
+            edit_command = edit.get("command")
+            try:
+                if edit_command == "str_replace":
+                    if edit.get("old_str") is None:
+                        raise ToolError("Parameter `old_str` is required")
+                    contents[edit_path], snippet, start_line = self._replace_in_text(
+                        contents[edit_path],
+                        edit_path,
+                        edit["old_str"],
+                        edit.get("new_str"),
+                    )
+                elif edit_command == "insert":
+                    if edit.get("insert_line") is None or edit.get("new_str") is None:
+                        raise ToolError(
+                            "Parameters `insert_line` and `new_str` are required"
+                        )
+                    contents[edit_path], snippet, start_line = self._insert_in_text(
+                        contents[edit_path], edit["insert_line"], edit["new_str"]
+                    )
+                else:
+                    raise ToolError(
+                        f"Unsupported command `{edit_command}`; use `str_replace` or `insert`"
+                    )
+            except ToolError as e:
+                raise ToolError(
+                    f"No files were changed. Edit {number} ({edit_command} on {edit_path}) failed: {e.message}"
+                ) from None
 
+            snippets.append(
+                self._make_output(snippet, f"edit {number} in {edit_path}", start_line)
+            )
+
+        changed = {p: c for p, c in contents.items() if c != originals[p]}
+        if changed:
+            await operator.write_many(changed)
+            self._file_history.record_transaction(
+                {p: (originals[p], changed[p]) for p in changed}
+            )
+
+        success_msg = (
+            f"Applied {len(edits)} edits to {len(contents)} file(s). "
+            + maybe_truncate("".join(snippets))
+            + "Review the changes and make sure they are as expected. Use `undo_edit` on any of these files to revert the whole batch."
+        )
         return CLIResult(output=success_msg)
 
     async def undo_edit(
         self, path: PathLike, operator: FileOperator = None
     ) -> CLIResult:
         """Revert the last edit made to a file."""
-        if not self._file_history[path]:
+        if not self._file_history.has_history(path):
             raise ToolError(f"No edit history found for {path}.")
 
-        old_text = self._file_history[path].pop()
+        transaction = self._file_history.last_transaction(path)
+        if transaction is not None:
+            return await self._undo_transaction(transaction, operator)
+
+        current_text = await operator.read_file(path)
+        old_text = self._file_history.undo(path, current_text)
         await operator.write_file(path, old_text)
 
         return CLIResult(
             output=f"Last edit to {path} undone successfully. {self._make_output(old_text, str(path))}"
         )
 
+    async def _undo_transaction(
+        self, transaction: int, operator: FileOperator
+    ) -> CLIResult:
+        """Revert all files of a `multi_edit` transaction."""
+        paths = self._file_history.transaction_paths(transaction)
+        current = await operator.read_many(paths)
+
+        # Check every file before reverting any of them
+        for file_path in paths:
+            self._file_history.check_undo(file_path, current[file_path])
+        restored = {p: self._file_history.undo(p, current[p]) for p in paths}
+
+        await operator.write_many(restored)
+
+        return CLIResult(
+            output=f"Last multi_edit undone successfully. Restored: {', '.join(paths)}"
+        )
+
+    async def cleanup(self) -> None:
+        """Drops the edit history at the end of an agent run."""
+        self._file_history.clear()
+
     def _make_output(
         self,
         file_content: str,
@@ -1,14 +1,17 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+import time
+from collections import deque
+from typing import Any, Awaitable, Dict, List, Optional
+from urllib.parse import urlsplit
 
-import requests
-from bs4 import BeautifulSoup
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from app.config import config
+from app.config import SearchSettings, config
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
+from app.tool.html_extract import extract_main_content_async
+from app.tool.http_client import get_http_client
 from app.tool.search import (
     BaiduSearchEngine,
     BingSearchEngine,
@@ -17,6 +20,8 @@ from app.tool.search import (
     WebSearchEngine,
 )
 from app.tool.search.base import SearchItem
+from app.tool.search.cache import get_search_result_cache
+from app.tool.search.health import get_engine_health_tracker
 
 
 class SearchResult(BaseModel):
@@ -111,6 +116,10 @@ class WebContentFetcher:
         """
         Fetch and extract the main content from a webpage.
 
+        Pages are fetched with the shared pooled HTTP client, so concurrent
+        fetches reuse connections, are limited per host rather than by a
+        thread pool, and revalidate against the on-disk HTTP cache.
+
         Args:
             url: The URL to fetch content from
             timeout: Request timeout in seconds
@@ -118,15 +127,8 @@ class WebContentFetcher:
         Returns:
             Extracted text content or None if fetching fails
         """
-        headers = {
-            "WebSearch": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-
         try:
-            # Use asyncio to run requests in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: requests.get(url, headers=headers, timeout=timeout)
-            )
+            response = await get_http_client().get(url, timeout=timeout)
 
             if response.status_code != 200:
                 logger.warning(
@@ -134,19 +136,7 @@ class WebContentFetcher:
                 )
                 return None
 
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Remove script and style elements
-            for script in soup(["script", "style", "header", "footer", "nav"]):
-                script.extract()
-
-            # Get text content
-            text = soup.get_text(separator="\n", strip=True)
-
-            # Clean up whitespace and limit size (100KB max)
-            text = " ".join(text.split())
-            return text[:10000] if text else None
+            return await extract_main_content_async(response.text, max_chars=10000)
 
         except Exception as e:
             logger.warning(f"Error fetching content from {url}: {e}")
@@ -248,9 +238,26 @@ class WebSearch(BaseTool):
 
         search_params = {"lang": lang, "country": country}
 
+        # Reuse results of the same search from this or an earlier run
+        cache = get_search_result_cache()
+        cached = await asyncio.to_thread(cache.get, query, lang, country, num_results)
+        results = [SearchResult(**result) for result in cached or []]
+        if results:
+            logger.info(f"Using cached search results for '{query}'")
+
         # Try searching with retries when all engines fail
         for retry_count in range(max_retries + 1):
-            results = await self._try_all_engines(query, num_results, search_params)
+            if not results:
+                results = await self._try_all_engines(query, num_results, search_params)
+                if results:
+                    await asyncio.to_thread(
+                        cache.put,
+                        query,
+                        lang,
+                        country,
+                        num_results,
+                        [result.model_dump() for result in results],
+                    )
 
             if results:
                 # Fetch content if requested
@@ -291,17 +298,32 @@ class WebSearch(BaseTool):
         self, query: str, num_results: int, search_params: Dict[str, Any]
     ) -> List[SearchResult]:
         """Try all search engines in the configured order."""
+        settings = config.search_config or SearchSettings()
+        strategy = settings.strategy.lower()
+        if strategy in ("race", "hedge"):
+            return await self._race_engines(
+                query, num_results, search_params, settings, hedge=strategy == "hedge"
+            )
+
         engine_order = self._get_engine_order()
         failed_engines = []
 
         for engine_name in engine_order:
             engine = self._search_engine[engine_name]
             logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
-            search_items = await self._perform_search_with_engine(
-                engine, query, num_results, search_params
-            )
+            try:
+                search_items = await self._search_and_record(
+                    engine_name,
+                    self._perform_search_with_engine(
+                        engine, query, num_results, search_params
+                    ),
+                )
+            except Exception as e:
+                logger.warning(f"{engine_name.capitalize()} search failed: {e}")
+                search_items = []
 
             if not search_items:
+                failed_engines.append(engine_name)
                 continue
 
             if failed_engines:
@@ -310,22 +332,163 @@ class WebSearch(BaseTool):
                 )
 
             # Transform search items into structured results
-            return [
-                SearchResult(
-                    position=i + 1,
-                    url=item.url,
-                    title=item.title
-                    or f"Result {i+1}",  # Ensure we always have a title
-                    description=item.description or "",
-                    source=engine_name,
-                )
-                for i, item in enumerate(search_items)
-            ]
+            return self._to_search_results(engine_name, search_items)
 
         if failed_engines:
             logger.error(f"All search engines failed: {', '.join(failed_engines)}")
         return []
 
+    async def _race_engines(
+        self,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+        settings: SearchSettings,
+        hedge: bool,
+    ) -> List[SearchResult]:
+        """Query engines concurrently and keep the first good result set.
+
+        In race mode the first `parallel_engines` engines start together; in
+        hedge mode one engine starts, and another joins whenever none has
+        answered within `hedge_delay`. A failed engine is replaced by the next
+        one in the configured order. Each engine is queried once, without the
+        per-engine retries of the sequential mode, since the others cover for
+        it. With `merge_results`, engines answering within `merge_window` of
+        the first are merged in. Engines still running are cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        pending_engines = deque(self._get_engine_order())
+        running: Dict[asyncio.Task, str] = {}
+        collected: List[List[SearchResult]] = []
+        failed_engines: List[str] = []
+        merge_deadline: Optional[float] = None
+
+        def launch() -> None:
+            engine_name = pending_engines.popleft()
+            logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
+            task = asyncio.create_task(
+                self._search_and_record(
+                    engine_name,
+                    self._search_once(
+                        self._search_engine[engine_name],
+                        query,
+                        num_results,
+                        search_params,
+                    ),
+                )
+            )
+            running[task] = engine_name
+
+        for _ in range(1 if hedge else max(1, settings.parallel_engines)):
+            if pending_engines:
+                launch()
+
+        try:
+            while running:
+                if merge_deadline is not None:
+                    timeout = max(0.0, merge_deadline - loop.time())
+                elif hedge and pending_engines:
+                    timeout = settings.hedge_delay
+                else:
+                    timeout = None
+
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if merge_deadline is not None:
+                        break
+                    # Hedge: the running engines are slow, start another one
+                    launch()
+                    continue
+
+                for task in done:
+                    engine_name = running.pop(task)
+                    try:
+                        search_items = task.result()
+                    except Exception as e:
+                        logger.warning(f"{engine_name.capitalize()} search failed: {e}")
+                        search_items = []
+
+                    if search_items:
+                        collected.append(
+                            self._to_search_results(engine_name, search_items)
+                        )
+                    else:
+                        failed_engines.append(engine_name)
+                        if not collected and pending_engines:
+                            launch()
+
+                if collected:
+                    if not settings.merge_results:
+                        break
+                    if merge_deadline is None:
+                        merge_deadline = loop.time() + settings.merge_window
+        finally:
+            for task in running:
+                task.cancel()
+
+        if not collected:
+            if failed_engines:
+                logger.error(f"All search engines failed: {', '.join(failed_engines)}")
+            return []
+
+        if running:
+            logger.info(
+                f"Cancelled slower search engines: {', '.join(running.values())}"
+            )
+        if len(collected) == 1:
+            return collected[0]
+        return self._merge_results(collected, num_results)
+
+    @staticmethod
+    def _to_search_results(
+        engine_name: str, search_items: List[SearchItem]
+    ) -> List[SearchResult]:
+        """Transform an engine's search items into structured results."""
+        return [
+            SearchResult(
+                position=i + 1,
+                url=item.url,
+                title=item.title or f"Result {i+1}",  # Ensure we always have a title
+                description=item.description or "",
+                source=engine_name,
+            )
+            for i, item in enumerate(search_items)
+        ]
+
+    @staticmethod
+    def _merge_results(
+        result_sets: List[List[SearchResult]], num_results: int
+    ) -> List[SearchResult]:
+        """Interleave result sets by rank, dropping duplicate URLs.
+
+        URLs are compared without scheme, `www.` prefix, fragment and trailing
+        slash, so the same page reported by two engines is kept once, at the
+        best rank it reached.
+        """
+        merged: List[SearchResult] = []
+        seen = set()
+        for rank in range(max(len(results) for results in result_sets)):
+            for results in result_sets:
+                if rank >= len(results):
+                    continue
+                parts = urlsplit(results[rank].url.strip())
+                key = (
+                    parts.netloc.lower().removeprefix("www."),
+                    parts.path.rstrip("/"),
+                    parts.query,
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(
+                    results[rank].model_copy(update={"position": len(merged) + 1})
+                )
+                if len(merged) >= num_results:
+                    return merged
+        return merged
+
     async def _fetch_content_for_results(
         self, results: List[SearchResult]
     ) -> List[SearchResult]:
@@ -382,7 +545,31 @@ class WebSearch(BaseTool):
         )
         engine_order.extend([e for e in self._search_engine if e not in engine_order])
 
-        return engine_order
+        # Demote clearly unhealthy engines and skip engines whose circuit
+        # breaker is open, unless no other engine is left
+        tracker = get_engine_health_tracker()
+        engine_order = tracker.rank(engine_order)
+        available = [e for e in engine_order if tracker.is_available(e)]
+        return available or engine_order
+
+    @staticmethod
+    async def _search_and_record(
+        engine_name: str, search: Awaitable[List[SearchItem]]
+    ) -> List[SearchItem]:
+        """Awaits an engine search and records its latency and outcome.
+
+        Only exceptions count as failures; an empty result set is a valid
+        answer for rare queries and must not trip the engine's breaker.
+        """
+        tracker = get_engine_health_tracker()
+        started = time.monotonic()
+        try:
+            search_items = await search
+        except Exception:
+            tracker.record(engine_name, time.monotonic() - started, success=False)
+            raise
+        tracker.record(engine_name, time.monotonic() - started, success=True)
+        return search_items
 
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10)
@@ -395,6 +582,20 @@ class WebSearch(BaseTool):
         search_params: Dict[str, Any],
     ) -> List[SearchItem]:
         """Execute search with the given engine and parameters."""
+        return await self._search_once(engine, query, num_results, search_params)
+
+    @staticmethod
+    async def _search_once(
+        engine: WebSearchEngine,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+    ) -> List[SearchItem]:
+        """Run one search request on a worker thread.
+
+        Cancelling the returned coroutine stops waiting for the engine; the
+        blocking request itself finishes in the background and is discarded.
+        """
         return await asyncio.get_event_loop().run_in_executor(
             None,
             lambda: list(
@@ -0,0 +1,255 @@
+import ast
+import bisect
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# Fenced code blocks, optionally tagged as json (```json ... ```)
+_FENCE_PATTERN = re.compile(
+    r"```[ \t]*(?:json|JSON|json5)?[ \t]*\n?(.*?)```", re.DOTALL
+)
+
+# Trailing commas before a closing brace/bracket, e.g. {"a": 1,}; strings
+# are matched too so their content is left alone
+_TRAILING_COMMA_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|,\s*([}\]])')
+
+# Python literals that models sometimes emit inside otherwise valid JSON;
+# strings are matched too so their content is left alone
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PY_LITERAL_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\b(True|False|None)\b')
+
+_DECODER = json.JSONDecoder()
+
+# An object whose first key is single-quoted is scanned as a Python literal
+_PY_DICT_START = re.compile(r"\{\s*'")
+
+# Characters that can change the scanner's state
+_STRUCTURE_PATTERN = re.compile(r"[{}\"'\\]")
+
+# Strict parses start with this prefix of a span and grow it by 4x; errors
+# this close to the end of a prefix are re-checked on a longer one
+_FIRST_WINDOW = 256
+_WINDOW_MARGIN = 8
+
+# Characters at which a strict parse error may be fixed by `loads_lenient`:
+# single quotes, Python literals and the bracket after a trailing comma
+_REPAIRABLE_CHARS = frozenset("'TFN}]")
+
+
+def _scan_objects(text: str) -> Tuple[List[int], Dict[int, int], List[int]]:
+    """Find every object brace pair in one pass over the text.
+
+    Braces inside strings are ignored. Only double quotes delimit strings,
+    unless the object (or an enclosing one) looks like a Python dict
+    (single-quoted first key), so an apostrophe in surrounding prose cannot
+    hide the rest of the text. A quote that is never closed is treated as a
+    plain character; since no later quote of its kind exists, this rescans
+    the rest of the text at most once per quote kind.
+
+    Returns:
+        Tuple of (object start offsets in order, mapping of start offset to
+        the offset just past its closing brace, starts of the objects still
+        open at the end of the text, outermost first).
+    """
+    starts: List[int] = []
+    ends: Dict[int, int] = {}
+    stack: List[Tuple[int, bool]] = []  # (start, python dict)
+    disabled_quotes = ""
+    quote, string_start, skip_to = "", -1, 0
+
+    matches = _STRUCTURE_PATTERN.finditer(text)
+    while True:
+        match = next(matches, None)
+        if match is None:
+            if not quote:
+                break
+            # Unterminated string: rescan after its quote as plain text
+            disabled_quotes += quote
+            matches = _STRUCTURE_PATTERN.finditer(text, string_start + 1)
+            quote, skip_to = "", 0
+            continue
+
+        idx = match.start()
+        if idx < skip_to:
+            continue
+        char = match.group()
+        if quote:
+            if char == "\\":
+                skip_to = idx + 2
+            elif char == quote:
+                quote = ""
+        elif char == "{":
+            python_dict = bool(stack and stack[-1][1]) or bool(
+                _PY_DICT_START.match(text, idx)
+            )
+            stack.append((idx, python_dict))
+            starts.append(idx)
+        elif char == "}":
+            if stack:
+                ends[stack.pop()[0]] = idx + 1
+        elif char == '"' or (char == "'" and stack and stack[-1][1]):
+            if char not in disabled_quotes:
+                quote, string_start = char, idx
+
+    return starts, ends, [start for start, _ in stack]
+
+
+def _strict_parse(text: str, start: int, end: int) -> Tuple[Optional[Any], int]:
+    """Strictly parse ``text[start:end]``, returning (value or None, error offset).
+
+    The span is parsed through growing prefixes, so a span that fails early
+    costs only the characters before the error (a `JSONDecodeError` also
+    counts the lines before its position, which makes parsing the whole
+    span or the text in place too slow for long runs of nested braces).
+    """
+    size = _FIRST_WINDOW
+    while True:
+        stop_at = min(end, start + size)
+        window = text[start:stop_at]
+        try:
+            value, stop = _DECODER.raw_decode(window)
+        except json.JSONDecodeError as e:
+            # Errors near the end of a prefix may come from cutting it there
+            if stop_at == end or (
+                e.pos < len(window) - _WINDOW_MARGIN
+                and not e.msg.startswith("Unterminated string")
+            ):
+                return None, e.pos
+        except RecursionError:
+            # Nested too deeply to be a tool call; skip the whole span
+            return None, end - start
+        else:
+            if stop_at == end and stop == len(window):
+                return value, -1
+            # The value ended before the brace that closes the span
+            return None, stop
+        size *= 4
+
+
+def _parse_span(
+    text: str, start: int, end: int, repair: bool
+) -> Tuple[Optional[Any], int, bool]:
+    """Parse a span, repairing it if allowed and needed.
+
+    Returns:
+        Tuple of (value or None, offset of the first strict error or -1,
+        whether a repair was attempted).
+    """
+    value, error = _strict_parse(text, start, end)
+    if error < 0:
+        return value, error, False
+    # Repairs cost a full pass, so only try them when they can help
+    if not repair or (
+        start + error < end and text[start + error] not in _REPAIRABLE_CHARS
+    ):
+        return None, error, False
+    return loads_lenient(text[start:end]), error, True
+
+
+def _occurrences(text: str, needle: str) -> List[int]:
+    positions, position = [], text.find(needle)
+    while position != -1:
+        positions.append(position)
+        position = text.find(needle, position + 1)
+    return positions
+
+
+def iter_json_objects(
+    text: str, must_contain: Optional[str] = None
+) -> Iterator[Tuple[str, Any]]:
+    """Yield JSON objects embedded in text, outermost first.
+
+    The text is scanned once to pair up braces, then objects are parsed in
+    order of appearance with `loads_lenient`. After a successful parse
+    scanning continues behind the object; when a span does not parse (e.g.
+    a stray brace in code or prose swallowed the text after it) it resumes
+    at the next object starting at or after the first invalid character, so
+    a malformed prefix never hides later objects and the text before the
+    error is not parsed again. Objects nested in a span whose repair failed
+    are only parsed strictly. Objects still open when the text ends are
+    completed with the missing closing braces, since truncated model output
+    is a common failure mode.
+
+    Args:
+        text: Arbitrary text that may contain embedded JSON objects.
+        must_contain: Substring every wanted object contains; spans without
+            it are skipped unparsed.
+
+    Yields:
+        Tuples of (candidate span, parsed value) in order of appearance.
+    """
+    starts, ends, unclosed = _scan_objects(text)
+    if unclosed:
+        # Complete the truncated objects at the end of the text
+        length = len(text)
+        text += "}" * len(unclosed)
+        for depth, start in enumerate(unclosed):
+            ends[start] = length + len(unclosed) - depth
+    needles = _occurrences(text, must_contain) if must_contain else []
+
+    resume = repair_from = 0
+    for start in starts:
+        end = ends.get(start)
+        if start < resume or end is None:
+            continue
+        if must_contain:
+            first = bisect.bisect_left(needles, start)
+            if first == len(needles) or needles[first] + len(must_contain) > end:
+                # No object nested in this span can contain it either
+                resume = end
+                continue
+
+        value, error, repaired = _parse_span(text, start, end, start >= repair_from)
+        if value is not None:
+            yield text[start:end], value
+            resume = end
+        else:
+            # The invalid character may itself open the next object
+            resume = start + max(error, 1)
+            if repaired:
+                # Objects nested in a span whose repair failed are only
+                # parsed strictly, so deep nesting is not repaired repeatedly
+                repair_from = end
+
+
+def iter_fenced_blocks(text: str) -> Iterator[str]:
+    """Yield the bodies of Markdown fenced code blocks in text."""
+    for match in _FENCE_PATTERN.finditer(text):
+        yield match.group(1)
+
+
+def loads_lenient(candidate: str) -> Optional[Any]:
+    """Parse a JSON candidate, repairing common model mistakes.
+
+    Tries strict JSON first, then with trailing commas removed and Python
+    literals (True/False/None) converted, and finally as a Python literal
+    (which accepts single-quoted strings).
+
+    Args:
+        candidate: String that should contain a single JSON value.
+
+    Returns:
+        The parsed value, or None if no repair produced valid data.
+    """
+    try:
+        return json.loads(candidate)
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    repaired = _TRAILING_COMMA_PATTERN.sub(
+        lambda m: m.group(1) if m.group(1) else m.group(0), candidate
+    )
+    repaired = _PY_LITERAL_PATTERN.sub(
+        lambda m: _PY_LITERALS[m.group(1)] if m.group(1) else m.group(0), repaired
+    )
+    try:
+        return json.loads(repaired)
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    try:
+        # Python literals allow trailing commas
+        return ast.literal_eval(candidate)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
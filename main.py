@@ -3,6 +3,10 @@ import asyncio
 
 from app.agent.manus import Manus
 from app.logger import logger
+from app.tool import crawl4ai
+from app.tool.bash import close_bash_sessions
+from app.tool.browser_pool import get_browser_pool
+from app.tool.http_client import get_http_client
 
 
 async def main():
@@ -30,6 +34,10 @@ async def main():
     finally:
         # Ensure agent resources are cleaned up before exiting
         await agent.cleanup()
+        await get_browser_pool().close()
+        await crawl4ai.close()
+        await close_bash_sessions()
+        await get_http_client().aclose()
 
 
 if __name__ == "__main__":
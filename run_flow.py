@@ -6,6 +6,10 @@ from app.agent.manus import Manus
 from app.config import config
 from app.flow.flow_factory import FlowFactory, FlowType
 from app.logger import logger
+from app.tool import crawl4ai
+from app.tool.bash import close_bash_sessions
+from app.tool.browser_pool import get_browser_pool
+from app.tool.http_client import get_http_client
 
 
 async def run_flow():
@@ -46,6 +50,11 @@ async def run_flow():
         logger.info("Operation cancelled by user.")
     except Exception as e:
         logger.error(f"Error: {str(e)}")
+    finally:
+        await get_browser_pool().close()
+        await crawl4ai.close()
+        await close_bash_sessions()
+        await get_http_client().aclose()
 
 
 if __name__ == "__main__":
@@ -6,6 +6,10 @@ import sys
 from app.agent.mcp import MCPAgent
 from app.config import config
 from app.logger import logger
+from app.tool import crawl4ai
+from app.tool.bash import close_bash_sessions
+from app.tool.browser_pool import get_browser_pool
+from app.tool.http_client import get_http_client
 
 
 class MCPRunner:
@@ -63,6 +67,10 @@ class MCPRunner:
     async def cleanup(self) -> None:
         """Clean up agent resources."""
         await self.agent.cleanup()
+        await get_browser_pool().close()
+        await crawl4ai.close()
+        await close_bash_sessions()
+        await get_http_client().aclose()
         logger.info("Session ended")
 
 
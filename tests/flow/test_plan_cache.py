@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from app.flow.plan_cache import PlanCache
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> PlanCache:
+    return PlanCache(path=tmp_path / "plan_cache.json")
+
+
+def _plan(*steps: str) -> dict:
+    return {"title": "plan", "steps": list(steps), "step_dependencies": None}
+
+
+def test_exact_hit_substitutes_all_slots_in_one_pass(cache: PlanCache):
+    cache.store(
+        "Compare result 1 and result 2 from 2024 data",
+        _plan("Take result 1 and result 2 from 2024 data", "Apply a 1.5 ratio"),
+    )
+
+    key, plan = cache.lookup("Compare result 2 and result 3 from 2025 data")
+
+    assert key
+    assert plan["steps"] == [
+        "Take result 2 and result 3 from 2025 data",
+        "Apply a 1.5 ratio",
+    ]
+
+
+def test_urls_and_paths_are_substituted(cache: PlanCache):
+    cache.store(
+        "Download https://a.example/x.csv to data/x.csv",
+        _plan("Fetch https://a.example/x.csv", "Save it as data/x.csv"),
+    )
+
+    _, plan = cache.lookup("Download https://b.example/y.csv to out/y.csv")
+
+    assert plan["steps"] == ["Fetch https://b.example/y.csv", "Save it as out/y.csv"]
+
+
+def test_refuses_hit_with_different_slot_count(tmp_path: Path):
+    cache = PlanCache(path=tmp_path / "plan_cache.json", similarity_threshold=0.5)
+    cache.store(
+        "Summarize https://a.example/page in 3 bullets and translate it",
+        _plan("Read https://a.example/page", "Write 3 bullets"),
+    )
+
+    assert (
+        cache.lookup("Summarize https://b.example/page in bullets and translate it")
+        is None
+    )
+    assert cache.get_stats()["refused"] == 1
+
+
+def test_refuses_hit_with_different_slot_kinds(cache: PlanCache):
+    cache.store("Open report 42 and summarize it", _plan("Open report 42"))
+
+    assert cache.lookup("Open report docs/a.md and summarize it") is None
+
+
+def test_miss_for_unrelated_request(cache: PlanCache):
+    cache.store("Compare result 1 and result 2", _plan("Compare"))
+
+    assert cache.lookup("Write a poem about the sea") is None
+
+
+def test_invalidate_removes_entry(cache: PlanCache):
+    cache.store("Compare result 1 and result 2", _plan("Compare"))
+    key, _ = cache.lookup("Compare result 1 and result 2")
+
+    cache.invalidate(key)
+
+    assert cache.lookup("Compare result 1 and result 2") is None
+
+
+def test_entries_persist(tmp_path: Path):
+    path = tmp_path / "plan_cache.json"
+    PlanCache(path=path).store("Compare result 1 and result 2", _plan("Use 1"))
+
+    _, plan = PlanCache(path=path).lookup("Compare result 7 and result 8")
+
+    assert plan["steps"] == ["Use 7"]
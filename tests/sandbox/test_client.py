@@ -77,6 +77,26 @@ async def test_local_file_operations(local_client: LocalSandboxClient, temp_dir:
     assert dst_file.read_text().strip() == test_content
 
 
+@pytest.mark.asyncio
+async def test_local_batched_file_operations(local_client: LocalSandboxClient):
+    """Tests writing and reading many files in single transfers."""
+    await local_client.create()
+
+    files = {f"/workspace/pkg{i % 3}/module{i}.py": f"x = {i}\n" for i in range(50)}
+    await local_client.write_files(files)
+
+    contents = await local_client.read_files(list(files))
+    assert contents == files
+
+    contents = await local_client.read_files(
+        ["/workspace/pkg0/module0.py", "/workspace/missing.py"], missing_ok=True
+    )
+    assert list(contents) == ["/workspace/pkg0/module0.py"]
+
+    with pytest.raises(FileNotFoundError):
+        await local_client.read_files(["/workspace/missing.py"])
+
+
 @pytest.mark.asyncio
 async def test_local_volume_binding(local_client: LocalSandboxClient, temp_dir: Path):
     """Tests volume binding in local sandbox."""
@@ -106,5 +126,37 @@ async def test_local_error_handling(local_client: LocalSandboxClient):
     assert "not found" in str(exc.value).lower()
 
 
+@pytest.mark.asyncio
+async def test_lease_keeps_sandbox_warm(local_client: LocalSandboxClient):
+    """Tests that finishing a run under a lease resets instead of destroying."""
+    async with local_client.lease():
+        await local_client.create()
+        container_id = local_client.sandbox.container.id
+        await local_client.write_file("/workspace/run1.txt", "first run")
+
+        await local_client.finish_run()
+        assert local_client.sandbox is not None
+        assert local_client.sandbox.container.id == container_id
+        result = await local_client.run_command("ls -A /workspace")
+        assert "run1.txt" not in result
+
+    assert local_client.sandbox is None
+
+
+@pytest.mark.asyncio
+async def test_lease_restores_snapshot(local_client: LocalSandboxClient):
+    """Tests that resets under a snapshot lease restore the leased workspace."""
+    await local_client.create()
+    await local_client.write_file("/workspace/seed.txt", "seed")
+
+    async with local_client.lease(restore_snapshot=True):
+        await local_client.write_file("/workspace/run1.txt", "first run")
+        await local_client.finish_run()
+
+        result = await local_client.run_command("ls -A /workspace")
+        assert "seed.txt" in result
+        assert "run1.txt" not in result
+
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
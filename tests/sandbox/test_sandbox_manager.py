@@ -117,6 +117,23 @@ async def test_idle_sandbox_cleanup(manager):
     assert sandbox_id not in manager._sandboxes
 
 
+@pytest.mark.asyncio
+async def test_lease_reuses_warm_sandbox(manager):
+    """Tests that a released sandbox is reset and reused by the next lease."""
+    async with manager.lease() as sandbox:
+        await sandbox.write_file("leftover.txt", "stale")
+        first_container = sandbox.container.id
+
+    assert len(manager._warm) == 1
+
+    async with manager.lease() as sandbox:
+        assert sandbox.container.id == first_container
+        result = await sandbox.run_command("ls -A /workspace")
+        assert "leftover.txt" not in result
+
+    assert len(manager._sandboxes) == 1
+
+
 @pytest.mark.asyncio
 async def test_manager_cleanup(manager):
     """Tests manager cleanup functionality."""
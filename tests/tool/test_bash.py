@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from app.tool.bash import Bash, close_bash_sessions
+from app.tool.tool_collection import ToolCollection
+
+
+async def _cleanup_like_agent(tools: ToolCollection) -> None:
+    # Mirrors ToolCallAgent.cleanup, which runs after every agent run
+    for tool in tools:
+        if hasattr(tool, "cleanup"):
+            await tool.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_background_job_outlives_agent_cleanup():
+    bash = Bash()
+    try:
+        started = await bash.execute(action="background", command="sleep 30")
+        job_id = started.output.split()[3]
+
+        await _cleanup_like_agent(ToolCollection(bash))
+
+        result = await bash.execute(action="jobs")
+        assert job_id in result.output
+        assert "running" in result.output
+    finally:
+        await close_bash_sessions()
+
+
+@pytest.mark.asyncio
+async def test_close_bash_sessions_stops_jobs_and_removes_files():
+    bash = Bash()
+    await bash.execute(command="echo hi")
+    await bash.execute(action="background", command="sleep 30")
+    manager = bash._manager
+    job = manager.list_jobs()[0]
+    spill_dir = manager._sessions["default"]._spill_dir
+
+    await close_bash_sessions()
+
+    assert job.process.returncode is not None
+    assert not os.path.exists(manager._log_dir)
+    assert not os.path.exists(spill_dir)
+
+    # The tool starts over with a fresh manager after shutdown
+    result = await bash.execute(action="jobs")
+    assert result.output == "No background jobs."
+    await close_bash_sessions()
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.tool import browser_pool
+from app.tool.browser_pool import BrowserPool
+
+
+class FakePlaywrightBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+
+class FakeContext:
+    def __init__(self, browser: "FakeBrowser"):
+        self.browser = browser
+        self.closed = False
+
+    async def get_session(self):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    instances = []
+
+    def __init__(self, config=None):
+        self.playwright_browser = None
+        self.contexts = []
+        self.closed = False
+        FakeBrowser.instances.append(self)
+
+    async def get_playwright_browser(self):
+        if self.playwright_browser is None:
+            self.playwright_browser = FakePlaywrightBrowser()
+        return self.playwright_browser
+
+    async def new_context(self, config=None):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_browsers(monkeypatch):
+    FakeBrowser.instances = []
+    monkeypatch.setattr(browser_pool, "BrowserUseBrowser", FakeBrowser)
+    monkeypatch.setattr(BrowserPool, "_max_browsers", lambda self: self.max_browsers)
+    return FakeBrowser.instances
+
+
+def _pool(**kwargs) -> BrowserPool:
+    kwargs.setdefault("warm_contexts", 0)
+    return BrowserPool(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_leases_spread_over_browsers_then_wait(fake_browsers):
+    pool = _pool(max_browsers=2, max_contexts_per_browser=2)
+
+    contexts = [await pool.acquire() for _ in range(4)]
+
+    assert len(fake_browsers) == 2
+    assert [entry.leased for entry in pool._browsers] == [2, 2]
+
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    await pool.release(contexts[0])
+    context = await asyncio.wait_for(waiter, 1)
+    assert contexts[0].closed
+    assert context.browser is contexts[0].browser
+    assert [entry.leased for entry in pool._browsers] == [2, 2]
+
+    await pool.close()
+    assert all(browser.closed for browser in fake_browsers)
+
+
+@pytest.mark.asyncio
+async def test_prewarm_keeps_warm_contexts(fake_browsers):
+    pool = _pool(warm_contexts=1)
+
+    pool.prewarm()
+    await pool._refill_task
+    (entry,) = pool._browsers
+    warm = entry.warm[0]
+    assert entry.load == 1 and entry.leased == 0
+
+    context = await pool.acquire()
+    assert context is warm
+    await pool._refill_task
+    assert entry.leased == 1 and len(entry.warm) == 1
+
+    await pool.release(context)
+    assert entry.load == 1
+    await pool.close()
+    assert entry.warm == [] and fake_browsers[0].contexts[1].closed
+
+
+@pytest.mark.asyncio
+async def test_failed_launch_returns_the_slot(fake_browsers, monkeypatch):
+    pool = _pool(max_browsers=1, max_contexts_per_browser=1)
+
+    async def fail(self, config=None):
+        raise RuntimeError("launch failed")
+
+    monkeypatch.setattr(FakeBrowser, "new_context", fail)
+    with pytest.raises(RuntimeError):
+        await pool.acquire()
+    assert pool._browsers[0].leased == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_replaced(fake_browsers):
+    pool = _pool(max_browsers=1)
+    context = await pool.acquire()
+    assert pool.is_alive(context)
+
+    fake_browsers[0].playwright_browser.connected = False
+    assert not pool.is_alive(context)
+    replacement = await pool.acquire()
+
+    assert replacement.browser is fake_browsers[1]
+    await asyncio.gather(*pool._closing)
+    assert fake_browsers[0].closed
+    await pool.close()
+
+
+def test_browsers_of_a_running_previous_loop_are_closed(fake_browsers):
+    pool = _pool()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(pool.acquire(), loop).result(5)
+        old_browser = fake_browsers[0]
+
+        async def use_from_new_loop():
+            await pool.acquire()
+            await pool.close()
+
+        asyncio.run(use_from_new_loop())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(5)
+
+        assert old_browser.closed
+        assert fake_browsers[1].closed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+
+from app.config import Config
+from app.exceptions import ToolError
+from app.tool.code_search import CodeSearch, TrigramIndex, _required_literals
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch) -> Path:
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "core.py").write_text(
+        "class Engine:\n    def start(self):\n        return 'Started'\n"
+    )
+    (tmp_path / "pkg" / "util.py").write_text("def helper():\n    return 42\n")
+    (tmp_path / "README.md").write_text("Engine docs\n")
+    monkeypatch.setattr(Config, "workspace_root", property(lambda self: tmp_path))
+    return tmp_path
+
+
+def test_candidates_need_every_trigram(workspace: Path):
+    index = TrigramIndex(str(workspace))
+    index.refresh(force=True)
+
+    assert index.candidates(["engine"]) == [
+        str(workspace / "README.md"),
+        str(workspace / "pkg" / "core.py"),
+    ]
+    assert index.candidates(["helper"]) == [str(workspace / "pkg" / "util.py")]
+    assert index.candidates(["nowhere"]) == []
+    assert len(index.candidates([])) == 3
+
+
+def test_changed_and_deleted_files_are_reindexed(workspace: Path):
+    index = TrigramIndex(str(workspace))
+    index.refresh(force=True)
+
+    (workspace / "pkg" / "util.py").write_text("def renamed():\n    pass\n")
+    (workspace / "README.md").unlink()
+    index.refresh(force=True)
+
+    assert index.candidates(["helper"]) == []
+    assert index.candidates(["renamed"]) == [str(workspace / "pkg" / "util.py")]
+    assert index.candidates(["engine"]) == [str(workspace / "pkg" / "core.py")]
+
+    index._compact()
+    assert index.candidates(["renamed"]) == [str(workspace / "pkg" / "util.py")]
+
+
+def test_file_limit_sets_truncated(workspace: Path):
+    index = TrigramIndex(str(workspace), max_files=2)
+    index.refresh(force=True)
+
+    assert index.truncated
+    assert len(index.candidates([])) == 2
+
+
+def test_required_literals():
+    assert _required_literals(r"def \w+_handler\(") == ["def ", "_handler("]
+    assert _required_literals("foo|bar") == []
+    with pytest.raises(ToolError):
+        _required_literals("(")
+
+
+@pytest.mark.asyncio
+async def test_literal_search_with_glob(workspace: Path):
+    result = await CodeSearch().execute(query="Engine", glob="*.py")
+
+    assert f"{workspace / 'pkg' / 'core.py'}:1: class Engine:" in result.output
+    assert "README.md" not in result.output
+
+
+@pytest.mark.asyncio
+async def test_symbol_search(workspace: Path):
+    result = await CodeSearch().execute(query="helper", mode="symbol")
+
+    assert result.output == f"{workspace / 'pkg' / 'util.py'}:1: def helper():"
+
+
+@pytest.mark.asyncio
+async def test_path_restricted_to_workspace(workspace: Path, tmp_path_factory):
+    result = await CodeSearch().execute(query="Engine", path=str(workspace / "pkg"))
+    assert "README.md" not in result.output
+
+    outside = tmp_path_factory.mktemp("outside")
+    with pytest.raises(ToolError, match="outside the workspace"):
+        await CodeSearch().execute(query="Engine", path=str(outside))
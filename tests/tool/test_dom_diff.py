@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+from app.tool.dom_diff import DomDiffTracker
+
+
+def _page(*elements: str):
+    """Listing and selector map for (xpath, html) elements in index order."""
+    listing, selector_map = [], {}
+    for index, xpath_and_html in enumerate(elements):
+        xpath, html = xpath_and_html.split(" ", 1)
+        listing.append(f"[{index}]{html}")
+        selector_map[index] = SimpleNamespace(xpath=xpath)
+    return "\n".join(listing), selector_map
+
+
+URL = "https://example.com/page"
+BASE = [
+    f"/html/body/a[{i}] <a>Link number {i} with a long label</a>" for i in range(20)
+]
+
+
+def test_first_and_navigated_observations_are_full():
+    tracker = DomDiffTracker()
+    listing, selector_map = _page(*BASE)
+
+    assert tracker.observe(URL, listing, selector_map) == ("full", listing)
+    assert tracker.observe(URL + "/other", listing, selector_map)[0] == "full"
+
+
+def test_unchanged_page():
+    tracker = DomDiffTracker()
+    listing, selector_map = _page(*BASE)
+    tracker.observe(URL, listing, selector_map)
+
+    mode, _ = tracker.observe(URL + "#section", listing, selector_map)
+
+    assert mode == "unchanged"
+
+
+def test_diff_reports_added_changed_removed_and_renumbered():
+    tracker = DomDiffTracker()
+    tracker.observe(URL, *_page(*BASE))
+
+    changed = BASE[:]
+    changed.insert(1, "/html/body/button <button>New</button>")
+    changed[4] = "/html/body/a[3] <a>Renamed link</a>"
+    del changed[-1]
+    mode, diff = tracker.observe(URL, *_page(*changed))
+
+    assert mode == "diff"
+    lines = diff.splitlines()
+    assert "+ [1]<button>New</button>" in lines
+    assert "~ [4]<a>Renamed link</a>" in lines
+    assert "- (was [19])<a>Link number 19 with a long label</a>" in lines
+    assert "Renumbered: [1-2]→[2-3], [4-18]→[5-19]" in lines
+
+
+def test_large_change_falls_back_to_full_listing():
+    tracker = DomDiffTracker()
+    tracker.observe(URL, *_page(*BASE))
+
+    listing, selector_map = _page(
+        *(f"/html/body/b[{i}] <b>Other {i}</b>" for i in range(20))
+    )
+
+    assert tracker.observe(URL, listing, selector_map) == ("full", listing)
+
+
+def test_same_listing_with_different_xpaths_is_not_shared():
+    tracker = DomDiffTracker()
+    listing, selector_map = _page(*BASE)
+    moved = {i: SimpleNamespace(xpath=f"/html/body/div/a[{i}]") for i in selector_map}
+
+    first = tracker.snapshot(listing, selector_map)
+    second = tracker.snapshot(listing, moved)
+
+    assert first is not second
+    assert set(second.elements) == {node.xpath for node in moved.values()}
+    assert tracker.snapshot(listing, selector_map) is first
+
+
+def test_reset_forces_full_listing():
+    tracker = DomDiffTracker()
+    listing, selector_map = _page(*BASE)
+    tracker.observe(URL, listing, selector_map)
+
+    tracker.reset()
+
+    assert tracker.observe(URL, listing, selector_map)[0] == "full"
+
+
+def test_diff_reports_changed_page_text():
+    tracker = DomDiffTracker()
+    listing, selector_map = _page(*BASE)
+    tracker.observe(URL, listing + "\n\tTotal: 3 items", selector_map)
+
+    mode, diff = tracker.observe(URL, listing + "\n\tTotal: 4 items", selector_map)
+
+    assert mode == "diff"
+    lines = diff.splitlines()
+    assert "+ text: Total: 4 items" in lines
+    assert "- text: Total: 3 items" in lines
@@ -0,0 +1,62 @@
+import pytest
+
+from app.exceptions import ToolError
+from app.tool.edit_history import EditHistory
+
+
+def test_undo_restores_previous_text():
+    history = EditHistory()
+    history.record("a.py", "x = 1\ny = 2\n", "x = 1\ny = 3\n")
+    history.record("a.py", "x = 1\ny = 3\n", "x = 4\ny = 3\n")
+
+    assert history.undo("a.py", "x = 4\ny = 3\n") == "x = 1\ny = 3\n"
+    assert history.undo("a.py", "x = 1\ny = 3\n") == "x = 1\ny = 2\n"
+    assert not history.has_history("a.py")
+
+
+def test_undo_refuses_externally_modified_file():
+    history = EditHistory()
+    history.record("a.py", "old", "new")
+
+    with pytest.raises(ToolError):
+        history.undo("a.py", "changed elsewhere")
+    assert history.has_history("a.py")
+
+
+def test_transaction_paths_lists_all_files():
+    history = EditHistory()
+    history.record_transaction({"a.py": ("a", "A"), "b.py": ("b", "B")})
+    transaction = history.last_transaction("a.py")
+
+    assert history.last_transaction("b.py") == transaction
+    assert history.transaction_paths(transaction) == ["a.py", "b.py"]
+
+
+def test_transaction_refused_after_later_edit_of_one_file():
+    history = EditHistory()
+    history.record_transaction({"a.py": ("a", "A"), "b.py": ("b", "B")})
+    history.record("b.py", "B", "BB")
+
+    with pytest.raises(ToolError, match="b.py"):
+        history.transaction_paths(history.last_transaction("a.py"))
+
+
+def test_transaction_refused_after_eviction():
+    history = EditHistory(max_total_bytes=150)
+    history.record_transaction({"a.py": ("a", "A"), "b.py": ("b", "B")})
+    # Evicts the least recently edited file (a.py)
+    history.record("c.py", "c", "cc")
+
+    assert not history.has_history("a.py")
+    with pytest.raises(ToolError, match="a.py"):
+        history.transaction_paths(history.last_transaction("b.py"))
+
+
+def test_oldest_patches_dropped_per_file():
+    history = EditHistory(max_entries_per_file=2)
+    for i in range(3):
+        history.record("a.py", str(i), str(i + 1))
+
+    assert history.undo("a.py", "3") == "2"
+    assert history.undo("a.py", "2") == "1"
+    assert not history.has_history("a.py")
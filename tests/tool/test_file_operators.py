@@ -0,0 +1,56 @@
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from app.tool.file_operators import LocalFileOperator
+
+
+def _mode(path: Path) -> int:
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+@pytest.mark.asyncio
+async def test_write_keeps_mode_of_existing_file(tmp_path: Path):
+    path = tmp_path / "script.sh"
+    path.write_text("echo old\n")
+    path.chmod(0o755)
+
+    await LocalFileOperator().write_file(path, "echo new\n")
+
+    assert path.read_text() == "echo new\n"
+    assert _mode(path) == 0o755
+
+
+@pytest.mark.asyncio
+async def test_new_file_gets_umask_mode(tmp_path: Path):
+    umask = os.umask(0o022)
+    os.umask(umask)
+
+    await LocalFileOperator().write_many({tmp_path / "new.txt": "x"})
+
+    assert _mode(tmp_path / "new.txt") == 0o666 & ~umask
+
+
+@pytest.mark.asyncio
+async def test_write_through_symlink_updates_target(tmp_path: Path):
+    target = tmp_path / "real.txt"
+    target.write_text("old")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    await LocalFileOperator().write_file(link, "new")
+
+    assert link.is_symlink()
+    assert target.read_text() == "new"
+
+
+@pytest.mark.asyncio
+async def test_exists_and_is_directory(tmp_path: Path):
+    operator = LocalFileOperator()
+
+    assert await operator.is_directory(tmp_path)
+    assert not await operator.is_directory(tmp_path / "missing")
+    assert await operator.exists(tmp_path)
+    assert not await operator.exists(tmp_path / "missing")
@@ -0,0 +1,88 @@
+import pytest
+
+from app.tool.html_extract import extract_main_content, extract_main_content_async
+
+
+def _page(body: str) -> str:
+    return f"<html><head><title>t</title></head><body>{body}</body></html>"
+
+
+ARTICLE = (
+    "<p>The quick brown fox jumps over the lazy dog, again and again, "
+    "until the dog finally wakes up and chases it away.</p>"
+)
+
+
+def test_extracts_article_and_skips_boilerplate():
+    html = _page(
+        "<nav><a href='/'>Home</a> <a href='/about'>About the site</a></nav>"
+        f"<div class='content'><h1>Foxes</h1>{ARTICLE}</div>"
+        "<footer>Copyright notice for the whole website</footer>"
+    )
+
+    text = extract_main_content(html)
+
+    assert text.startswith("# Foxes\n\n")
+    assert "quick brown fox" in text
+    assert "Home" not in text
+    assert "Copyright" not in text
+
+
+def test_table_with_short_cells_is_kept():
+    html = _page(
+        f"<div class='content'>{ARTICLE}<table>"
+        "<tr><th>Name</th><th>Age</th></tr>"
+        "<tr><td>Alice</td><td>30</td></tr>"
+        "<tr><td>Bob</td><td>25</td></tr>"
+        "<tr><td>Carol</td><td>41</td></tr>"
+        "</table></div>"
+    )
+
+    text = extract_main_content(html)
+
+    assert "| Name | Age |\n| Alice | 30 |\n| Bob | 25 |\n| Carol | 41 |" in text
+
+
+def test_list_with_short_items_is_kept():
+    html = _page(
+        f"<div class='content'>{ARTICLE}"
+        "<ul><li>eggs</li><li>milk</li><li>flour</li><li>sugar</li>"
+        "<li>butter</li><li>salt</li></ul></div>"
+    )
+
+    text = extract_main_content(html)
+
+    assert "- eggs\n- milk\n- flour\n- sugar\n- butter\n- salt" in text
+
+
+def test_short_list_is_dropped():
+    html = _page(f"<div class='content'>{ARTICLE}<ul><li>ok</li></ul></div>")
+
+    assert "- ok" not in extract_main_content(html)
+
+
+def test_falls_back_to_whole_page_for_short_fragments():
+    fragments = "".join(f"<p>word{i}</p>" for i in range(200))
+    html = _page(f"<div>{fragments}</div>{ARTICLE}")
+
+    text = extract_main_content(html)
+
+    assert "word0" in text and "word199" in text
+
+
+def test_respects_max_chars():
+    html = _page("<div class='content'>" + ARTICLE * 50 + "</div>")
+
+    assert len(extract_main_content(html, max_chars=300)) <= 300
+
+
+def test_empty_page():
+    assert extract_main_content("") is None
+    assert extract_main_content(_page("<script>var x = 1;</script>")) is None
+
+
+@pytest.mark.asyncio
+async def test_async_matches_sync():
+    html = _page(f"<div class='content'><h2>Foxes</h2>{ARTICLE}</div>")
+
+    assert await extract_main_content_async(html) == extract_main_content(html)
@@ -0,0 +1,71 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from app.exceptions import ToolError
+from app.tool import line_index
+from app.tool.line_index import LineIndex, LineIndexCache, stream_replace
+
+
+def _write(tmp_path: Path, content: str) -> Path:
+    path = tmp_path / "big.txt"
+    path.write_bytes(content.encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_read_lines_matches_split(tmp_path, monkeypatch, trailing_newline):
+    # Small chunks so lines and checkpoints straddle chunk boundaries
+    monkeypatch.setattr(line_index, "_CHUNK_SIZE", 97)
+    rng = random.Random(0)
+    lines = ["x" * rng.randrange(0, 40) + f" {i} é" for i in range(500)]
+    content = "\n".join(lines) + ("\n" if trailing_newline else "")
+    index = LineIndex(_write(tmp_path, content))
+    expected = content.split("\n")
+
+    assert index.line_count == len(expected)
+    for first, last in [(1, 1), (1, 64), (63, 66), (128, 129), (450, len(expected))]:
+        assert index.read_lines(first, last) == "\n".join(expected[first - 1 : last])
+
+
+def test_empty_file(tmp_path):
+    index = LineIndex(_write(tmp_path, ""))
+
+    assert index.line_count == 1
+    assert index.read_lines(1, 1) == ""
+
+
+def test_cache_rebuilds_changed_file(tmp_path):
+    path = _write(tmp_path, "a\nb\n")
+    cache = LineIndexCache()
+    assert cache.get(path).line_count == 3
+
+    path.write_text("a\nb\nc\nd\n")
+
+    assert cache.get(path).line_count == 5
+
+
+def test_stream_replace(tmp_path):
+    path = _write(tmp_path, "one\ntwo\nthree\n")
+
+    assert stream_replace(path, "three", "3") == 3
+    assert path.read_text() == "one\ntwo\n3\n"
+
+    with pytest.raises(ToolError):
+        stream_replace(path, "missing", "x")
+    with pytest.raises(ToolError):
+        stream_replace(_write(tmp_path, "a a"), "a", "b")
+
+
+def test_stream_replace_keeps_mode_and_symlink(tmp_path):
+    target = _write(tmp_path, "a = 1\n")
+    target.chmod(0o750)
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    stream_replace(link, "1", "2")
+
+    assert link.is_symlink()
+    assert target.read_text() == "a = 2\n"
+    assert target.stat().st_mode & 0o777 == 0o750
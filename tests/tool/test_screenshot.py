@@ -0,0 +1,93 @@
+import base64
+import io
+
+from PIL import Image, ImageDraw
+
+from app.tool.screenshot import ScreenshotPolicy, perceptual_hash, target_size
+
+
+def _image(size=(1280, 720), stripes=8) -> Image.Image:
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(stripes):
+        x = i * size[0] // stripes
+        draw.rectangle([x, 0, x + size[0] // (2 * stripes), size[1]], fill="black")
+    return image
+
+
+def _encode(image: Image.Image, format: str) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format=format)
+    return output.getvalue()
+
+
+def _decode(data: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(data)))
+
+
+def test_target_size():
+    assert target_size(1280, 720) == (1280, 720)
+    assert target_size(1024, 768) == (1024, 768)
+    assert target_size(4000, 1000) == (2048, 512)
+    assert target_size(1600, 3200) == (768, 1536)
+
+
+def test_perceptual_hash():
+    image = _image()
+
+    assert perceptual_hash(image) == perceptual_hash(image.resize((640, 360)))
+    assert perceptual_hash(image) != perceptual_hash(_image(stripes=3))
+
+
+def test_jpeg_at_target_size_is_sent_unchanged():
+    data = _encode(_image((1024, 768)), "JPEG")
+
+    result = ScreenshotPolicy().process(data, "state")
+
+    assert base64.b64decode(result) == data
+
+
+def test_large_png_is_downscaled_to_jpeg():
+    data = _encode(_image((2560, 1440)), "PNG")
+
+    image = _decode(ScreenshotPolicy().process(data, "state"))
+
+    assert image.format == "JPEG"
+    assert image.size == target_size(2560, 1440)
+
+
+def test_capture_options():
+    policy = ScreenshotPolicy(quality=60)
+
+    assert policy.capture_options((1024, 768))["type"] == "jpeg"
+    assert policy.capture_options((1024, 768))["quality"] == 60
+    assert policy.capture_options((2560, 1440))["type"] == "png"
+    assert policy.capture_options(None)["type"] == "png"
+
+
+def test_dedup_same_state_only():
+    policy = ScreenshotPolicy()
+    data = _encode(_image((1024, 768)), "JPEG")
+
+    assert policy.process(data, "a") is not None
+    assert policy.process(data, "a") is None
+    assert policy.process(data, "b") is not None
+
+    policy.reset()
+    assert policy.process(data, "b") is not None
+
+
+def test_dedup_keeps_changed_capture():
+    policy = ScreenshotPolicy()
+
+    assert policy.process(_encode(_image((1024, 768)), "JPEG"), "a") is not None
+    changed = _encode(_image((1024, 768), stripes=3), "JPEG")
+    assert policy.process(changed, "a") is not None
+
+
+def test_dedup_disabled():
+    policy = ScreenshotPolicy(dedup_distance=-1)
+    data = _encode(_image((1024, 768)), "JPEG")
+
+    assert policy.process(data, "a") is not None
+    assert policy.process(data, "a") is not None
@@ -0,0 +1,40 @@
+from app.tool.search.health import EngineHealthTracker
+
+
+ENGINES = ["google", "duckduckgo", "baidu", "bing"]
+
+
+def test_one_success_keeps_configured_order():
+    tracker = EngineHealthTracker()
+    tracker.record("google", 0.8, success=True)
+    assert tracker.rank(ENGINES) == ENGINES
+
+
+def test_comparable_engines_keep_configured_order():
+    tracker = EngineHealthTracker()
+    tracker.record("google", 1.2, success=True)
+    tracker.record("duckduckgo", 0.6, success=True)
+    assert tracker.rank(ENGINES) == ENGINES
+
+
+def test_failing_engine_is_demoted():
+    tracker = EngineHealthTracker()
+    tracker.record("google", 0.8, success=False)
+    tracker.record("duckduckgo", 0.8, success=True)
+    assert tracker.rank(ENGINES) == ["duckduckgo", "baidu", "bing", "google"]
+
+
+def test_slow_engine_is_demoted():
+    tracker = EngineHealthTracker()
+    tracker.record("google", 6.0, success=True)
+    tracker.record("duckduckgo", 0.5, success=True)
+    assert tracker.rank(ENGINES) == ["duckduckgo", "baidu", "bing", "google"]
+
+
+def test_open_circuit_goes_last():
+    tracker = EngineHealthTracker(failure_threshold=1)
+    tracker.record("google", 0.8, success=False)
+    tracker.record("bing", 10.0, success=True)
+    tracker.record("duckduckgo", 0.5, success=True)
+    assert not tracker.is_available("google")
+    assert tracker.rank(ENGINES) == ["duckduckgo", "baidu", "bing", "google"]
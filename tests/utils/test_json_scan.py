@@ -0,0 +1,86 @@
+import time
+
+from app.utils.json_scan import iter_fenced_blocks, iter_json_objects, loads_lenient
+
+
+def _values(text: str, must_contain=None):
+    return [value for _, value in iter_json_objects(text, must_contain)]
+
+
+def test_finds_objects_in_order():
+    text = 'a {"x": 1} b {"y": {"z": 2}} c'
+    assert _values(text) == [{"x": 1}, {"y": {"z": 2}}]
+
+
+def test_ignores_braces_inside_strings():
+    assert _values('{"code": "if (x) { y }"}') == [{"code": "if (x) { y }"}]
+
+
+def test_resynchronizes_after_unbalanced_brace():
+    text = (
+        'if (x) { return 1; then call {"name": "bash", "arguments": {"command": "ls"}}'
+    )
+    assert {"name": "bash", "arguments": {"command": "ls"}} in _values(text)
+
+
+def test_apostrophe_in_prose_does_not_hide_later_objects():
+    text = """{'x': it's} {"name": "bash", "arguments": {}}"""
+    assert _values(text) == [{"name": "bash", "arguments": {}}]
+
+
+def test_single_quoted_python_dict():
+    assert _values("call {'name': 'bash', 'arguments': {'a': '}'}}") == [
+        {"name": "bash", "arguments": {"a": "}"}}
+    ]
+
+
+def test_truncated_object_is_completed():
+    assert _values('{"name": "bash", "arguments": {"command": "ls"') == [
+        {"name": "bash", "arguments": {"command": "ls"}}
+    ]
+
+
+def test_must_contain_skips_spans():
+    assert _values('{"a": 1} {"name": "x"}', must_contain="name") == [{"name": "x"}]
+
+
+def test_loads_lenient_repairs_outside_strings_only():
+    assert loads_lenient('{"a": True, "b": "True or None,}", "c": [1,],}') == {
+        "a": True,
+        "b": "True or None,}",
+        "c": [1],
+    }
+
+
+def test_loads_lenient_rejects_garbage():
+    assert loads_lenient("{not json at all") is None
+
+
+def test_iter_fenced_blocks():
+    text = 'before\n```json\n{"a": 1}\n```\nafter ```\n{"b": 2}```'
+    assert [b.strip() for b in iter_fenced_blocks(text)] == ['{"a": 1}', '{"b": 2}']
+
+
+def test_finds_object_at_error_position():
+    text = "{ " + '{"name": "x"} ' * 3 + "}"
+    assert _values(text, must_contain="name") == [{"name": "x"}] * 3
+
+
+def test_open_objects_are_completed():
+    text = 'a { b {"name": "bash"} c {"name": "ls", "arguments": {'
+    assert _values(text) == [{"name": "bash"}, {"name": "ls", "arguments": {}}]
+
+
+def test_scan_is_linear_on_code_like_text():
+    samples = [
+        'if (x) { y = "name"; ' * 2000,
+        '{"name" ' * 8000,
+        "{" * 20000 + "}" * 20000,
+        '{"a": [1,}' * 5000,
+        "{'a': " * 8000,
+    ]
+    start = time.perf_counter()
+    for text in samples:
+        list(iter_json_objects(text))
+        list(iter_json_objects(text, must_contain="name"))
+    assert time.perf_counter() - start < 2.0